@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+import hmac
+from core.config import settings
+from core.loop_monitor import loop_monitor
+from core.profiling import profile_store
+
+def is_admin_key(key: Optional[str]) -> bool:
+    """Comprueba la clave de administración (siempre falso si no hay ADMIN_API_KEY)."""
+    return bool(settings.ADMIN_API_KEY and key and hmac.compare_digest(key, settings.ADMIN_API_KEY))
+
+async def require_admin(x_admin_key: Optional[str] = Header(None)) -> None:
+    """Dependencia que restringe un endpoint a los administradores (cabecera X-Admin-Key)."""
+    if not is_admin_key(x_admin_key):
+        raise HTTPException(status_code=403, detail="Acceso restringido a administradores")
+
+# Crear router de administración
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+@router.post("/perfilado")
+async def arm_profiling(ruta: str, peticiones: int = 1):
+    """Perfila las próximas peticiones a una ruta (por ejemplo, /api/v1/blog/generar).
+    
+    Alternativa a la cabecera X-Profile para clientes que no pueden enviarla. Los
+    perfiles se guardan en el worker que atiende cada petición.
+    """
+    if not 1 <= peticiones <= 100:
+        raise HTTPException(status_code=400, detail="peticiones debe estar entre 1 y 100")
+    profile_store.arm(ruta, peticiones)
+    return {"armed": profile_store.armed()}
+
+@router.get("/perfiles")
+async def list_profiles():
+    """Lista los perfiles capturados en este worker, del más reciente al más antiguo."""
+    return {"profiles": profile_store.list(), "armed": profile_store.armed()}
+
+@router.get("/perfiles/{profile_id}")
+async def get_profile(profile_id: str):
+    """Resumen de un perfil: tiempo real y de CPU por etapa y reparto por categoría."""
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    return profile.summary()
+
+@router.get("/perfiles/{profile_id}/collapsed", response_class=PlainTextResponse)
+async def download_profile(profile_id: str):
+    """Descarga las pilas colapsadas del perfil (para flamegraph.pl o speedscope)."""
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    return PlainTextResponse(
+        profile.collapsed(),
+        headers={"Content-Disposition": f'attachment; filename="perfil-{profile_id}.collapsed"'}
+    )
+
+@router.get("/bucle")
+async def get_loop_stalls():
+    """Bloqueos recientes del bucle de eventos de este worker, con la pila del callback culpable."""
+    return {"event_loop": loop_monitor.snapshot(), "stalls": loop_monitor.recent_stalls()}
@@ -1,19 +1,48 @@
-from fastapi import FastAPI
+import time
+
+# Medir el tiempo de importación de la aplicación (arranque en frío)
+_import_start = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import logging
+import uuid
+from api.admin import is_admin_key
 from api.router import api_router
+from api.startup import recover_documents, run_warmup, startup_stats
+from common.services.cpu_pool import cpu_pool
 from core.config import settings
+from core.logger import configure_logging, request_id_var
+from core.loop_monitor import loop_monitor
+from core.profiling import RequestProfile, profile_store, profile_var
+from core.tenancy import tenant_from_headers, tenant_var
 
 # Configurar logging
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Ciclo de vida de la aplicación: lanza el precalentamiento sin retrasar el arranque
+    y vigila el bucle de eventos."""
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    app.state.document_recovery = asyncio.create_task(asyncio.to_thread(recover_documents))
+    if settings.WARMUP_ON_STARTUP:
+        app.state.warmup = asyncio.create_task(asyncio.to_thread(run_warmup))
+    yield
+    await loop_monitor.stop()
+    cpu_pool.shutdown()
+
 # Crear aplicación FastAPI
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description=settings.PROJECT_DESCRIPTION,
     version=settings.PROJECT_VERSION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -25,6 +54,51 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def should_profile(request: Request) -> bool:
+    """Perfilar la petición si un administrador lo pide (X-Profile) o está armada su ruta."""
+    if not settings.ADMIN_API_KEY:
+        return False
+    if request.headers.get("X-Profile", "").lower() in ("1", "true"):
+        return is_admin_key(request.headers.get("X-Admin-Key"))
+    return profile_store.take_armed(request.url.path)
+
+async def call_profiled(request: Request, call_next, request_id: str):
+    """Ejecuta la petición perfilándola y guarda el perfil con el ID de la petición."""
+    profile = RequestProfile(request_id, request.url.path, interval=settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+    profile_token = profile_var.set(profile)
+    status_code = None
+    try:
+        # El hilo del bucle de eventos se muestrea también; el trabajo que las rutas pasan a
+        # hilos (generación, serialización) se muestrea a través de bind_log_context
+        with profile.tracked("bucle_eventos"):
+            response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        profile_var.reset(profile_token)
+        profile.stop(status_code)
+        profile_store.add(profile)
+    response.headers["X-Profile-ID"] = request_id
+    return response
+
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    """Asigna un ID a cada petición (o usa el de X-Request-ID) para correlacionar sus logs
+    e identifica su tenant para la planificación justa. Las peticiones perfiladas
+    devuelven X-Profile-ID (ver /admin/perfiles)."""
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex[:12]
+    token = request_id_var.set(request_id)
+    tenant_token = tenant_var.set(tenant_from_headers(request.headers))
+    try:
+        if should_profile(request):
+            response = await call_profiled(request, call_next, request_id)
+        else:
+            response = await call_next(request)
+    finally:
+        tenant_var.reset(tenant_token)
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
 # Incluir router principal
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -37,6 +111,9 @@ async def root():
         "docs": "/docs"
     }
 
+startup_stats["import_seconds"] = round(time.perf_counter() - _import_start, 3)
+logger.info(f"Aplicación importada en {startup_stats['import_seconds']} s")
+
 # Ejecutar la aplicación
 if __name__ == "__main__":
     import uvicorn
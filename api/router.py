@@ -1,15 +1,50 @@
 from fastapi import APIRouter
+from api.admin import router as admin_router
+from api.startup import startup_stats
+from common.services.admission import admission_controller
+from common.services.cache import shared_cache
+from common.services.cpu_pool import cpu_pool
+from common.services.fair_scheduler import fair_scheduler
+from common.services.model_router import model_router
+from common.services.provider_pool import provider_pool
+from core.loop_monitor import loop_monitor
 from blog.api.routes import router as blog_router
-#from linkedin.api.routes import router as linkedin_router
+from linkedin.api.routes import router as linkedin_router
 
 # Crear router principal
 api_router = APIRouter()
 
 # Incluir routers de dominios
 api_router.include_router(blog_router)
-#api_router.include_router(linkedin_router)
+api_router.include_router(linkedin_router)
+api_router.include_router(admin_router)
 
 @api_router.get("/health")
 async def health_check():
-    """Endpoint para verificar el estado de la API."""
-    return {"status": "ok"}
\ No newline at end of file
+    """Endpoint para verificar el estado de la API (incluido el cortacircuitos de cada endpoint del proveedor)."""
+    return {
+        "status": "ok",
+        "startup": startup_stats,
+        "admission": admission_controller.snapshot(),
+        "providers": provider_pool.snapshot(),
+        "event_loop": {
+            "lag_ms": round(loop_monitor.last_lag * 1000, 1),
+            "stalls": loop_monitor.stall_count,
+        },
+    }
+
+@api_router.get("/metrics")
+async def metrics():
+    """Métricas de planificación (admisión y colas por tenant), de salud de los modelos y de
+    los endpoints del proveedor (cortacircuitos y peticiones en curso), de la caché por
+    nivel, del pool de procesos de CPU y del bucle de eventos (histograma de retraso y
+    bloqueos)."""
+    return {
+        "admission": admission_controller.snapshot(),
+        "tenants": fair_scheduler.snapshot(),
+        "models": model_router.snapshot(),
+        "providers": provider_pool.snapshot(),
+        "cache": shared_cache.snapshot(),
+        "cpu_pool": cpu_pool.snapshot(),
+        "event_loop": loop_monitor.snapshot(),
+    }
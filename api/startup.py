@@ -0,0 +1,35 @@
+from typing import Any, Dict
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Tiempos de arranque del proceso, expuestos en /health
+startup_stats: Dict[str, Any] = {
+    "import_seconds": None,
+    "warmup_seconds": None,
+    "warm": False,
+}
+
+def run_warmup() -> None:
+    """Precalienta el orquestador y las conexiones con los proveedores (en segundo plano)."""
+    from blog.api.routes import warm_up
+    
+    start = time.perf_counter()
+    try:
+        warm_up()
+        startup_stats["warm"] = True
+    except Exception as e:
+        logger.warning(f"Error en el precalentamiento: {str(e)}")
+    startup_stats["warmup_seconds"] = round(time.perf_counter() - start, 3)
+    logger.info(f"Precalentamiento completado en {startup_stats['warmup_seconds']} s")
+
+def recover_documents() -> None:
+    """Marca como fallidos los documentos que dejó a medias un proceso anterior."""
+    from blog.api.routes import pdf_ingestion
+    from core.config import settings
+    
+    try:
+        pdf_ingestion.recover(settings.PDF_STALE_MINUTES * 60)
+    except Exception as e:
+        logger.warning(f"No se pudieron recuperar los documentos interrumpidos: {str(e)}")
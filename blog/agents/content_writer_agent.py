@@ -7,6 +7,8 @@ class ContentWriterAgent(BaseAgent):
     Se encarga de escribir el contenido completo con un tono profesional pero humano.
     """
     
+    stage = "writing"
+    
     def _get_prompt_data(self) -> Dict[str, str]:
         """Obtiene los datos de prompt específicos para este agente."""
         system_message = """Eres un redactor profesional especializado en crear contenido de blog de alta calidad con un equilibrio perfecto entre voz humana natural y formalidad profesional. Tu tarea es escribir un artículo que suene a experto humano pero mantenga un nivel adecuado de profesionalismo.
@@ -94,6 +96,37 @@ OBJETIVO: Crear un artículo profesional que demuestre autoridad y expertise, ma
         Returns:
             Contenido del artículo
         """
+        response = self.generate_content(
+            **self._get_prompt_variables(tema, outline, longitud, estilos, urls, prompt_personalizado)
+        )
+        
+        return response["content"]
+    
+    def write_variants(self, n: int, tema: str, outline: Dict[str, Any], longitud: str, estilos: List[str],
+                       urls: Optional[List[str]] = None, prompt_personalizado: Optional[str] = None) -> List[str]:
+        """Escribe varias versiones alternativas del artículo a partir del mismo prompt.
+        
+        Args:
+            n: Número de variantes
+            tema: Tema del artículo
+            outline: Estructura del artículo
+            longitud: Longitud deseada ('short', 'medium', 'long')
+            estilos: Lista de estilos ('informativo', 'persuasivo', 'narrativo', 'técnico')
+            urls: Lista de URLs de referencia
+            prompt_personalizado: Instrucciones adicionales
+            
+        Returns:
+            Lista con el contenido de cada variante
+        """
+        responses = self.generate_variants(
+            n, **self._get_prompt_variables(tema, outline, longitud, estilos, urls, prompt_personalizado)
+        )
+        
+        return [response["content"] for response in responses]
+    
+    def _get_prompt_variables(self, tema: str, outline: Dict[str, Any], longitud: str, estilos: List[str],
+                              urls: Optional[List[str]], prompt_personalizado: Optional[str]) -> Dict[str, str]:
+        """Prepara las variables de la plantilla a partir del outline y las opciones de la petición."""
         # Preparar el outline de forma más organizada
         title = outline['title']
         introduction_points = outline['introduction']
@@ -143,8 +176,7 @@ OBJETIVO: Crear un artículo profesional que demuestre autoridad y expertise, ma
             for url in urls:
                 urls_text += f"- {url}\n"
         
-        # Generar el contenido
-        response = self.generate_content(
+        return dict(
             tema=tema,
             title=title,
             introduction_points=introduction_points,
@@ -155,8 +187,6 @@ OBJETIVO: Crear un artículo profesional que demuestre autoridad y expertise, ma
             urls_text=urls_text,
             prompt_personalizado=prompt_personalizado if prompt_personalizado else "Sin instrucciones adicionales."
         )
-        
-        return response["content"]
     
     def _format_response(self, raw_content: str) -> Dict[str, Any]:
         """Formatea la respuesta."""
@@ -0,0 +1,31 @@
+from typing import Dict
+from blog.agents.content_writer_agent import ContentWriterAgent
+
+class FastWriterAgent(ContentWriterAgent):
+    """
+    Agente Redactor en una sola pasada (Fast Writer) - Especialidad: redacción y edición de estilo combinadas
+    Escribe directamente la versión final del artículo, integrando las pautas del editor de estilo
+    para evitar una segunda generación completa en el nivel de calidad 'fast'.
+    """
+    
+    def _get_prompt_data(self) -> Dict[str, str]:
+        """Obtiene los datos de prompt específicos para este agente."""
+        prompt_data = super()._get_prompt_data()
+        
+        system_message = prompt_data["system_message"] + """
+
+EDICIÓN INTEGRADA (entrega directamente la versión final, sin borradores):
+- Elimina cualquier rastro de estructura artificial o patrones repetitivos que delaten generación automatizada
+- Evita referencias a "secciones", "en este artículo" o cualquier meta-referencia
+- Utiliza párrafos de longitud variable para un ritmo natural pero profesional
+- Recurre ocasionalmente a la primera persona profesional ("he observado en mi práctica profesional...")
+- Evita frases demasiado entusiastas, exclamaciones frecuentes y conclusiones genéricas que solo resumen lo dicho"""
+        
+        human_template = prompt_data["human_template"] + """
+
+IMPORTANTE: Este texto se publicará sin una edición posterior. Entrega la versión final pulida, con voz humana profesional y sin artificialidad."""
+        
+        return {
+            "system_message": system_message,
+            "human_template": human_template
+        }
@@ -1,5 +1,8 @@
 from typing import Dict, Any, Optional
 from common.base_agent import BaseAgent
+from common.services.cpu_pool import cpu_pool
+from common.services.model_router import InvalidModelResponse
+from common.utils.json_stream import repair_json
 import json
 import logging
 
@@ -11,6 +14,11 @@ class OutlinePlannerAgent(BaseAgent):
     Se encarga de generar la estructura del artículo a partir de un tema dado.
     """
     
+    stage = "outline"
+    
+    # Solicitar la respuesta en modo JSON estructurado
+    response_format = {"type": "json_object"}
+    
     def _get_prompt_data(self) -> Dict[str, str]:
         """Obtiene los datos de prompt específicos para este agente."""
         system_message = """Eres un experto en content marketing y redacción SEO. Vas a crear la estructura para un artículo de blog al estilo Product Hackers sobre el tema proporcionado.
@@ -57,17 +65,25 @@ Genera una estructura completa y bien organizada en formato JSON válido, siguie
             "human_template": human_template
         }
     
-    def generate_outline(self, tema: str, longitud: str, estilos: list, prompt_personalizado: Optional[str] = None) -> Dict[str, Any]:
+    def generate_outline(self, tema: str, longitud: str, estilos: list,
+                         prompt_personalizado: Optional[str] = None) -> Dict[str, Any]:
         """Genera la estructura del artículo.
         
+        La respuesta se pide en modo JSON y se recibe en streaming, para poder cortarla
+        si la petición agota su plazo. Si llega truncada se repara; si no se puede
+        reparar, se repite una vez sin streaming.
+        
         Args:
             tema: Tema del artículo
             longitud: Longitud deseada ('short', 'medium', 'long')
             estilos: Lista de estilos ('informativo', 'persuasivo', 'narrativo', 'técnico')
             prompt_personalizado: Instrucciones adicionales
-            
+        
         Returns:
             Estructura del artículo en formato JSON
+        
+        Raises:
+            InvalidModelResponse: Si el modelo no devuelve una estructura JSON interpretable
         """
         # Adaptar según la longitud solicitada
         instrucciones_longitud = {
@@ -87,38 +103,68 @@ Genera una estructura completa y bien organizada en formato JSON válido, siguie
         if "técnico" in estilos:
             instrucciones_estilo += "• Estilo técnico: Profundizando en aspectos especializados con precisión y claridad para audiencias con conocimiento del sector.\n"
         
-        # Generar la estructura
-        response = self.generate_content(
+        prompt_kwargs = dict(
             tema=tema,
             instrucciones_longitud=instrucciones_longitud.get(longitud, instrucciones_longitud["medium"]),
             instrucciones_estilo=instrucciones_estilo,
             prompt_personalizado=prompt_personalizado if prompt_personalizado else "Sin instrucciones adicionales."
         )
         
-        return response
+        # En modo diferido la estructura llega entera en el lote; si no, en streaming
+        prompt = self._build_prompt(**prompt_kwargs)
+        deferred = self._generate_deferred(prompt.format_messages())
+        if deferred is not None:
+            raw_content = deferred[0]
+        else:
+            raw_content = self.run_with_fallback(
+                lambda model_config: "".join(self.stream_content(model_config, **prompt_kwargs))
+            )
+        try:
+            outline = self._format_response(raw_content)
+        except InvalidModelResponse:
+            if deferred is not None:
+                raise
+            # Un stream cortado no siempre se puede reparar: se repite una vez sin streaming
+            logger.warning("Estructura irrecuperable en la respuesta en streaming; reintentando sin streaming")
+            raw_content = self.run_with_fallback(
+                lambda model_config: (prompt | self.get_llm(model_config) | self.output_parser).invoke({})
+            )
+            outline = self._format_response(raw_content)
+        if not outline["title"]:
+            outline["title"] = tema
+        
+        return outline
     
     def _format_response(self, raw_content: str) -> Dict[str, Any]:
         """Formatea la respuesta JSON."""
         try:
             # Intentar parsear la respuesta como JSON
-            return json.loads(raw_content)
+            outline = json.loads(raw_content)
         except json.JSONDecodeError:
-            logger.error(f"Error parsing JSON response: {raw_content}")
-            # Si falla, extraer la parte JSON de la respuesta
-            try:
-                json_start = raw_content.find('{')
-                json_end = raw_content.rfind('}') + 1
-                if json_start >= 0 and json_end > json_start:
-                    json_str = raw_content[json_start:json_end]
-                    return json.loads(json_str)
-                else:
-                    raise ValueError("No se pudo encontrar un objeto JSON en la respuesta")
-            except Exception as e:
-                logger.error(f"Error extracting JSON from response: {e}")
-                # Crear una estructura básica como fallback
-                return {
-                    "title": f"Artículo sobre {raw_content[:50]}...",
-                    "introduction": "Introducción al tema.",
-                    "sections": [{"heading": "Sección 1", "subheadings": [], "key_points": []}],
-                    "conclusion": "Conclusión sobre el tema."
-                }
\ No newline at end of file
+            logger.warning(f"Respuesta JSON inválida o truncada ({len(raw_content)} caracteres), intentando reparar")
+            # La reparación recorre la respuesta carácter a carácter: en el pool si es larga
+            outline = cpu_pool.run(repair_json, raw_content, size=len(raw_content))
+        
+        if not isinstance(outline, dict):
+            raise InvalidModelResponse("El modelo no devolvió una estructura válida para el artículo")
+        
+        return {
+            "title": str(outline.get("title") or ""),
+            "introduction": outline.get("introduction") or "",
+            "sections": [
+                self._normalize_section(section)
+                for section in outline.get("sections") or []
+                if isinstance(section, dict)
+            ],
+            "conclusion": outline.get("conclusion") or ""
+        }
+    
+    @staticmethod
+    def _normalize_section(section: Dict[str, Any]) -> Dict[str, Any]:
+        """Garantiza que una sección tenga las claves esperadas por los agentes posteriores."""
+        return {
+            **section,
+            "heading": str(section.get("heading") or ""),
+            "subheadings": [point for point in section.get("subheadings") or [] if point],
+            "key_points": [point for point in section.get("key_points") or [] if point]
+        }
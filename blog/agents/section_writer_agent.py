@@ -0,0 +1,94 @@
+from typing import Dict, Any, List, Optional
+from common.base_agent import BaseAgent
+
+# Caracteres de investigación y de secciones vecinas que se envían como contexto
+MAX_RESEARCH_CHARS = 6000
+MAX_NEIGHBOUR_CHARS = 3000
+
+class SectionWriterAgent(BaseAgent):
+    """
+    Agente Redactor de Secciones (Section Writer) - Especialidad: reescritura de una sección de un artículo existente
+    Reescribe solo la sección indicada, integrada con las secciones vecinas, para que corregir una parte
+    del artículo cueste una llamada corta en lugar de regenerarlo entero.
+    """
+    
+    stage = "section_writing"
+    
+    def _get_prompt_data(self) -> Dict[str, str]:
+        """Obtiene los datos de prompt específicos para este agente."""
+        system_message = """Eres un redactor profesional que revisa artículos de blog ya escritos. Reescribes una única sección para mejorarla sin romper la continuidad con el resto del artículo.
+
+PAUTAS:
+- Mantén la voz, el tono y la terminología de las secciones vecinas: el lector no debe notar que la sección se reescribió
+- Conserva el encabezado markdown de la sección (# para el título, ## para secciones); puedes pulir su redacción
+- No repitas lo que ya cuentan la sección anterior ni la siguiente, y enlaza con ellas con transiciones naturales
+- Usa solo datos presentes en la información de referencia o en el propio artículo; no inventes cifras ni fuentes
+- Evita metareferencias al artículo o a su estructura y frases que delaten generación automatizada"""
+        
+        human_template = """Artículo sobre: {tema}
+
+{instrucciones_estilo}
+
+INFORMACIÓN DE REFERENCIA:
+{investigacion}
+
+PLAN DE LA SECCIÓN:
+{plan_seccion}
+
+SECCIÓN ANTERIOR:
+{seccion_anterior}
+
+SECCIÓN A REESCRIBIR:
+{seccion}
+
+SECCIÓN SIGUIENTE:
+{seccion_siguiente}
+
+INDICACIONES DEL EDITOR:
+{instrucciones}
+
+Devuelve únicamente la nueva versión de la sección a reescribir, con su encabezado y en formato markdown."""
+        
+        return {
+            "system_message": system_message,
+            "human_template": human_template
+        }
+    
+    def rewrite_section(self, tema: str, sections: List[str], index: int, estilos: List[str],
+                        research: Optional[str] = None, plan: Optional[Dict[str, Any]] = None,
+                        instrucciones: Optional[str] = None) -> str:
+        """Reescribe una sección usando las vecinas como contexto.
+        
+        Args:
+            tema: Tema del artículo
+            sections: Secciones actuales del artículo (la 0 contiene el título y la introducción)
+            index: Posición de la sección a reescribir
+            estilos: Lista de estilos ('informativo', 'persuasivo', 'narrativo', 'técnico')
+            research: Investigación utilizada en el artículo
+            plan: Entrada del outline para la sección (heading, subheadings, key_points), si la hay
+            instrucciones: Indicaciones del editor
+        
+        Returns:
+            Nueva versión de la sección
+        """
+        plan_seccion = "Sin plan específico."
+        if plan:
+            points = (plan.get("subheadings") or []) + (plan.get("key_points") or [])
+            plan_seccion = f"{plan.get('heading', '')}\n" + "\n".join(f"• {point}" for point in points)
+        
+        response = self.generate_content(
+            tema=tema,
+            instrucciones_estilo=f"Estilos del artículo: {', '.join(estilos)}.",
+            investigacion=(research or "Sin información adicional.")[:MAX_RESEARCH_CHARS],
+            plan_seccion=plan_seccion,
+            seccion_anterior=sections[index - 1][-MAX_NEIGHBOUR_CHARS:] if index > 0 else "(es el comienzo del artículo)",
+            seccion=sections[index],
+            seccion_siguiente=sections[index + 1][:MAX_NEIGHBOUR_CHARS] if index + 1 < len(sections) else "(es el final del artículo)",
+            instrucciones=instrucciones or "Mejora la claridad, la profundidad y la naturalidad de la sección."
+        )
+        
+        return response["content"]
+    
+    def _format_response(self, raw_content: str) -> Dict[str, Any]:
+        """Formatea la respuesta."""
+        return {"content": raw_content.strip()}
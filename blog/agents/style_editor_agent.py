@@ -7,6 +7,8 @@ class StyleCoherenceEditorAgent(BaseAgent):
     Convierte el texto técnico en un artículo profesional que suena natural pero formal.
     """
     
+    stage = "editing"
+    
     def _get_prompt_data(self) -> Dict[str, str]:
         """Obtiene los datos de prompt específicos para este agente."""
         system_message = """Eres un editor profesional de alto nivel especializado en transformar textos técnicos en artículos profesionales que mantienen un equilibrio perfecto entre formalidad y naturalidad humana. Tu objetivo es transformar el contenido para que suene como si hubiera sido escrito por un experto humano con amplia experiencia en publicaciones profesionales.
@@ -0,0 +1,51 @@
+from typing import Dict, Any
+from common.base_agent import BaseAgent
+
+class TranslatorAgent(BaseAgent):
+    """
+    Agente Traductor (Translator) - Especialidad: traducción editorial de artículos ya terminados
+    Traslada el artículo final a otro idioma conservando el formato markdown, la voz y la
+    terminología, sin repetir la investigación, el outline ni la redacción.
+    """
+    
+    stage = "translation"
+    
+    def _get_prompt_data(self) -> Dict[str, str]:
+        """Obtiene los datos de prompt específicos para este agente."""
+        system_message = """Eres un traductor editorial profesional especializado en contenido divulgativo y de negocio. Traduces artículos ya publicados manteniendo la voz profesional y humana del original.
+
+PAUTAS DE TRADUCCIÓN:
+- Traduce con naturalidad, como lo escribiría un redactor nativo del idioma de destino, no palabra por palabra
+- Conserva exactamente el formato markdown: encabezados, listas, negritas, enlaces y saltos de párrafo
+- Mantén la terminología técnica habitual en el idioma de destino (deja en inglés los términos que se usan así)
+- No añadas, resumas ni omitas información; no incluyas notas del traductor
+- Adapta expresiones idiomáticas y ejemplos solo cuando su traducción literal no tenga sentido"""
+        
+        human_template = """Traduce al {idioma} el siguiente fragmento del artículo "{titulo}":
+
+{content}
+
+Devuelve únicamente la traducción del fragmento, con el mismo formato markdown."""
+        
+        return {
+            "system_message": system_message,
+            "human_template": human_template
+        }
+    
+    def translate(self, content: str, idioma: str, titulo: str) -> str:
+        """Traduce un fragmento de un artículo.
+        
+        Args:
+            content: Fragmento en markdown a traducir
+            idioma: Nombre del idioma de destino (por ejemplo, 'inglés')
+            titulo: Título del artículo, como contexto para traducir cada fragmento de forma coherente
+        
+        Returns:
+            Fragmento traducido
+        """
+        response = self.generate_content(content=content, idioma=idioma, titulo=titulo)
+        return response["content"]
+    
+    def _format_response(self, raw_content: str) -> Dict[str, Any]:
+        """Formatea la respuesta."""
+        return {"content": raw_content.strip()}
@@ -1,6 +1,19 @@
 from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from common.models.config import ModelConfiguration
+from common.services.cache import content_key, shared_cache
 from common.services.openai_service import OpenAIService
+from common.services.model_router import model_router
+from common.services.retrieval_index import (
+    KIND_SYNTHESIS, KIND_URL, KIND_WEB_SEARCH, retrieval_index
+)
+from common.utils.single_flight import SingleFlightCache
+from core.config import settings
+from core.deadline import DeadlineExceeded
+from core.logger import bind_log_context
+from core.tenancy import tenant_var
 import logging
+import sqlite3
 
 logger = logging.getLogger(__name__)
 
@@ -8,23 +21,35 @@ class WebResearchAgent:
     """
     Agente Investigador Web (Web Research Agent) - Especialidad: buscar y sintetizar información de URLs
     Se encarga de investigar en la web para enriquecer el contenido del artículo.
+    Todo lo que investiga queda en el índice local, que se consulta antes de volver
+    a llamar a la web sobre temas o URLs recientes.
     """
-    def __init__(self, model_name: str = "gpt-4o"):
+    def __init__(self, model_name: Optional[str] = None):
         """Inicializa el agente de investigación web.
         
         Args:
-            model_name: Nombre del modelo a utilizar
+            model_name: Nombre del modelo a utilizar (por defecto, el de la política de cada etapa)
         """
         self.openai_service = OpenAIService()
         self.model_name = model_name
+        self.pinned_model = ModelConfiguration(model_id=model_name) if model_name else None
+        self.index = retrieval_index
     
-    def research_urls(self, tema: str, urls: Optional[List[str]] = None) -> List[Dict[str, str]]:
+    def research_urls(self, tema: str, urls: Optional[List[str]] = None,
+                      url_cache: Optional[SingleFlightCache] = None,
+                      max_urls: Optional[int] = None) -> List[Dict[str, str]]:
         """Investiga un tema usando la funcionalidad de búsqueda web y/o las URLs proporcionadas.
         
         Args:
             tema: Tema a investigar
             urls: Lista de URLs a analizar
-            
+            url_cache: Caché compartida entre artículos (por ejemplo, de un mismo lote). Cuando
+                se proporciona, cada URL se analiza una sola vez con una consulta general, y la
+                adaptación al tema de cada artículo queda para la síntesis
+            max_urls: Si se indica y hay más URLs, se analizan todas a la vez y solo se
+                esperan las ``max_urls`` más rápidas (el resto terminan en segundo plano
+                y quedan en el índice local)
+        
         Returns:
             Lista de resultados de investigación
         """
@@ -32,35 +57,150 @@ class WebResearchAgent:
         
         # Si no hay URLs proporcionadas, realizar búsqueda web sobre el tema
         if not urls or len(urls) == 0:
+            local_research = self.find_local_research(tema)
+            if local_research:
+                logger.info(f"Reutilizando {len(local_research)} pasajes del índice local para: {tema}")
+                return local_research
             try:
                 logger.info(f"Realizando búsqueda web sobre: {tema}")
                 query = f"""Investiga información actualizada, estadísticas, y perspectivas 
                 relevantes sobre: {tema}. Proporciona un resumen detallado de los hallazgos más importantes 
                 que serían útiles para escribir un artículo de blog profesional sobre este tema."""
                 
-                research_summary = self.openai_service.web_search(query, self.model_name)
+                research_summary = model_router.execute(
+                    "web_search",
+                    lambda model_config: self.openai_service.web_search(query, model_config=model_config),
+                    pinned=self.pinned_model
+                )
                 research_results.append({"source": "web_search", "content": research_summary})
-                
+                self._index(KIND_WEB_SEARCH, "web_search", research_summary, tema)
+            
+            except DeadlineExceeded:
+                raise
             except Exception as e:
                 logger.error(f"Error en la búsqueda web: {str(e)}")
                 research_results.append({"source": "web_search", "content": f"Error en la búsqueda web: {str(e)}"})
         
         # Investigar cada URL proporcionada
         if urls and len(urls) > 0:
+            if max_urls is not None and len(urls) > max_urls:
+                return research_results + self._research_fastest_urls(tema, urls, url_cache, max_urls)
             for url in urls:
+                research_results.append(self._research_url(tema, url, url_cache))
+        
+        return research_results
+    
+    def _research_url(self, tema: str, url: str, url_cache: Optional[SingleFlightCache]) -> Dict[str, str]:
+        """Analiza una URL y devuelve su resultado de investigación (o el error, como contenido)."""
+        try:
+            return {"source": url, "content": self._summarize_url(tema, url, url_cache)}
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"Error al analizar URL {url}: {str(e)}")
+            return {"source": url, "content": f"Error al analizar esta URL: {str(e)}"}
+    
+    def _summarize_url(self, tema: str, url: str, url_cache: Optional[SingleFlightCache]) -> str:
+        logger.info(f"Analizando URL: {url}")
+        if url_cache is not None:
+            query = """Extrae la información más relevante y valiosa de esta página para crear artículos de blog. 
+            Resume los puntos clave, datos importantes y perspectivas que serían útiles."""
+            return url_cache.get_or_compute(url, lambda: self._get_url_summary(url, query, tema))
+        query = f"""Extrae la información más relevante y valiosa para crear un artículo de blog sobre: {tema}. 
+        Resume los puntos clave, datos importantes y perspectivas que serían útiles."""
+        return self._get_url_summary(url, query, tema)
+    
+    def _research_fastest_urls(self, tema: str, urls: List[str], url_cache: Optional[SingleFlightCache],
+                               max_urls: int) -> List[Dict[str, str]]:
+        """Analiza todas las URLs a la vez y devuelve los ``max_urls`` primeros análisis válidos."""
+        results: List[Dict[str, str]] = []
+        executor = ThreadPoolExecutor(max_workers=len(urls), thread_name_prefix="url-research")
+        try:
+            futures = {
+                executor.submit(bind_log_context(self._summarize_url), tema, url, url_cache): url
+                for url in urls
+            }
+            for future in as_completed(futures):
                 try:
-                    logger.info(f"Analizando URL: {url}")
-                    query = f"""Extrae la información más relevante y valiosa para crear un artículo de blog sobre: {tema}. 
-                    Resume los puntos clave, datos importantes y perspectivas que serían útiles."""
-                    
-                    url_summary = self.openai_service.analyze_url(url, query, "gpt-4o-search-preview")
-                    research_results.append({"source": url, "content": url_summary})
-                    
+                    results.append({"source": futures[future], "content": future.result()})
+                except DeadlineExceeded:
+                    raise
                 except Exception as e:
-                    logger.error(f"Error al analizar URL {url}: {str(e)}")
-                    research_results.append({"source": url, "content": f"Error al analizar esta URL: {str(e)}"})
+                    logger.error(f"Error al analizar URL {futures[future]}: {str(e)}")
+                    continue
+                if len(results) >= max_urls:
+                    break
+        finally:
+            # No esperar a las URLs más lentas
+            executor.shutdown(wait=False, cancel_futures=True)
+        logger.info(f"Investigación limitada a las {len(results)} URLs más rápidas de {len(urls)}")
+        return results
+    
+    def find_local_research(self, tema: str, exclude_sources: Optional[List[str]] = None) -> List[Dict[str, str]]:
+        """Busca en el índice local material de investigación reciente sobre el tema.
         
-        return research_results
+        Solo se devuelven pasajes del tenant de la petición en curso que cubren la mayor parte de los términos del tema
+        (RESEARCH_INDEX_MIN_COVERAGE) y no superan la antigüedad máxima configurada.
+        
+        Args:
+            tema: Tema a investigar
+            exclude_sources: Fuentes cuyos pasajes no se devuelven (por ejemplo, las URLs que
+                se van a analizar igualmente en la petición)
+        
+        Returns:
+            Resultados de investigación reutilizables (vacío si no hay material suficiente)
+        """
+        if not settings.RESEARCH_INDEX_REUSE:
+            return []
+        try:
+            passages = self.index.search(
+                tema,
+                limit=settings.RESEARCH_INDEX_PASSAGES,
+                kinds=[KIND_WEB_SEARCH, KIND_URL, KIND_SYNTHESIS],
+                max_age=settings.RESEARCH_INDEX_MAX_AGE_HOURS * 3600,
+                tenant=tenant_var.get()
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudo consultar el índice local: {str(e)}")
+            return []
+        excluded = set(exclude_sources or [])
+        return [
+            {"source": f"índice local ({passage['source']})", "content": passage["text"]}
+            for passage in passages
+            if passage["coverage"] >= settings.RESEARCH_INDEX_MIN_COVERAGE and passage["source"] not in excluded
+        ]
+    
+    def _get_url_summary(self, url: str, query: str, tema: str) -> str:
+        """Obtiene el resumen de una URL, reutilizando el del índice local si es reciente."""
+        if settings.RESEARCH_INDEX_REUSE:
+            try:
+                summary = self.index.latest(
+                    KIND_URL, url, tenant_var.get(), max_age=settings.RESEARCH_INDEX_MAX_AGE_HOURS * 3600
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"No se pudo consultar el índice local: {str(e)}")
+                summary = None
+            if summary:
+                logger.info(f"Reutilizando el análisis reciente de la URL: {url}")
+                return summary
+        
+        summary = self._analyze_url(url, query)
+        self._index(KIND_URL, url, summary, tema)
+        return summary
+    
+    def _index(self, kind: str, source: str, text: str, tema: str) -> None:
+        """Guarda un resultado en el índice local sin interrumpir la investigación si falla."""
+        try:
+            self.index.add(kind, source, text, tema=tema, tenant=tenant_var.get())
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudo indexar el resultado de {source}: {str(e)}")
+    
+    def _analyze_url(self, url: str, query: str) -> str:
+        """Analiza una URL con el modelo enrutado para la etapa de análisis de URLs."""
+        return model_router.execute(
+            "url_analysis",
+            lambda model_config: self.openai_service.analyze_url(url, query, model_config=model_config)
+        )
     
     def synthesize_research(self, research_results: List[Dict[str, str]], tema: str) -> str:
         """Sintetiza los resultados de investigación en un formato útil para la generación de contenido.
@@ -68,13 +208,13 @@ class WebResearchAgent:
         Args:
             research_results: Resultados de investigación
             tema: Tema del artículo
-            
+        
         Returns:
             Síntesis de la investigación
         """
         if not research_results:
             return "No se encontró información relevante."
-            
+        
         try:
             # Concatenar todos los resultados de investigación
             all_research = "\n\n".join([f"Fuente: {r['source']}\n{r['content']}" for r in research_results])
@@ -92,8 +232,26 @@ class WebResearchAgent:
             Organiza los datos importantes, perspectivas valiosas, citas relevantes y tendencias en categorías 
             lógicas. Identifica también los puntos de consenso y controversia, si los hay."""
             
-            return self.openai_service.chat_completion(system_message, user_message, self.model_name)
+            # Las mismas fuentes sobre el mismo tema dan la misma síntesis, en cualquier worker
+            cache_key = content_key("sintesis", tema, all_research, self.model_name)
+            found, synthesis = shared_cache.get(cache_key)
+            if found:
+                logger.info(f"Reutilizando una síntesis en caché para el tema: {tema}")
+                return synthesis
             
+            synthesis = model_router.execute(
+                "research_synthesis",
+                lambda model_config: self.openai_service.chat_completion(
+                    system_message, user_message, model_config=model_config
+                ),
+                pinned=self.pinned_model
+            )
+            shared_cache.set(cache_key, synthesis)
+            self._index(KIND_SYNTHESIS, f"síntesis: {tema}", synthesis, tema)
+            return synthesis
+        
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error al sintetizar la investigación: {str(e)}")
             return f"Error al sintetizar la investigación: {str(e)}"
\ No newline at end of file
@@ -1,9 +1,30 @@
-from fastapi import APIRouter, HTTPException, File, UploadFile
-from typing import Dict, Any, List
+from fastapi import APIRouter, HTTPException, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+import asyncio
+import hashlib
+import json
 import logging
-from blog.models.requests import BlogRequest
-from blog.models.responses import BlogResponse
-from blog.services.orchestrator import BlogOrchestrator
+import threading
+from blog.models.requests import BlogRequest, BlogBatchRequest, SectionRegenerationRequest
+from blog.models.responses import ArticleResponse, BlogResponse
+from blog.services.batch_service import BatchGenerator
+from blog.services.pdf_ingestion import PdfIngestionService, UploadTooLarge
+from common.services.admission import AdmissionRejected, admission_controller
+from common.services.article_store import article_store
+from common.utils.text_processor import TextProcessor
+from common.services.document_store import document_store
+from common.services.idempotency import IdempotencyKeyReused, idempotency_store
+from common.services.model_router import InvalidModelResponse
+from common.services.retrieval_index import retrieval_index
+from core.config import settings
+from core.deadline import Deadline, DeadlineExceeded, deadline_scope
+from core.logger import bind_log_context
+from core.tenancy import tenant_var
+
+if TYPE_CHECKING:
+    from blog.services.orchestrator import BlogOrchestrator
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -11,8 +32,64 @@ logger = logging.getLogger(__name__)
 # Crear router - asegurarse de que se llame 'router' para que pueda ser importado
 router = APIRouter(prefix="/blog", tags=["blog"])
 
-# Inicializar orquestador
-orchestrator = BlogOrchestrator()
+# El orquestador (y con él langchain y los clientes de los proveedores) se crea en el
+# primer uso o en el precalentamiento, para que la API arranque sin esperar a importarlos
+_orchestrator: Optional["BlogOrchestrator"] = None
+_batch_generator: Optional[BatchGenerator] = None
+_init_lock = threading.Lock()
+pdf_ingestion = PdfIngestionService(
+    document_store,
+    retrieval_index,
+    workers=settings.PDF_WORKERS,
+    max_bytes=settings.PDF_MAX_MB * 1024 * 1024
+)
+
+# Formulario de /subir-pdf para la documentación (la ruta lee el cuerpo directamente)
+UPLOAD_PDF_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"]
+                }
+            }
+        }
+    }
+}
+
+def get_orchestrator() -> "BlogOrchestrator":
+    """Obtiene el orquestador compartido, creándolo en el primer uso."""
+    global _orchestrator
+    if _orchestrator is None:
+        with _init_lock:
+            if _orchestrator is None:
+                from blog.services.orchestrator import BlogOrchestrator
+                _orchestrator = BlogOrchestrator()
+    return _orchestrator
+
+def get_batch_generator() -> BatchGenerator:
+    """Obtiene el generador de lotes compartido, creándolo en el primer uso."""
+    global _batch_generator
+    if _batch_generator is None:
+        orchestrator = get_orchestrator()
+        with _init_lock:
+            if _batch_generator is None:
+                _batch_generator = BatchGenerator(orchestrator, concurrency=settings.BATCH_CONCURRENCY)
+    return _batch_generator
+
+def warm_up() -> None:
+    """Crea el orquestador y abre las conexiones con los proveedores por adelantado."""
+    get_orchestrator().warm_up()
+
+async def cancel_on_disconnect(request: Request, deadline: Deadline) -> None:
+    """Cancela el plazo de la petición en cuanto el cliente se desconecta."""
+    while not await request.is_disconnected():
+        await asyncio.sleep(0.5)
+    logger.info("Cliente desconectado: se cancelan las llamadas pendientes de la petición")
+    deadline.cancel("cliente desconectado")
 
 @router.get("/")
 async def blog_root():
@@ -33,29 +110,70 @@ async def get_styles():
             {"id": "short", "name": "Corto", "description": "Aproximadamente 500 palabras"},
             {"id": "medium", "name": "Medio", "description": "Aproximadamente 1000 palabras"},
             {"id": "long", "name": "Largo", "description": "Aproximadamente 2000 palabras"}
+        ],
+        "calidades": [
+            {"id": "standard", "name": "Estándar", "description": "Redacción seguida de una edición de estilo completa"},
+            {"id": "fast", "name": "Rápida", "description": "Redacción y edición combinadas en una sola pasada. Aproximadamente la mitad de tiempo y tokens de salida"}
         ]
     }
 
 @router.post("/generar", response_model=BlogResponse)
-async def generate_blog(request: BlogRequest):
-    """Genera contenido de blog basado en los parámetros proporcionados."""
-    try:
-        result = orchestrator.generate_blog_content(
-            tema=request.tema,
-            longitud=request.longitud,
-            estilos=request.estilos,
-            urls=request.urls,
-            prompt_personalizado=request.prompt_personalizado,
-            parametros=request.parametros
+async def generate_blog(request: BlogRequest, http_request: Request, x_deadline_seconds: Optional[float] = Header(None),
+                        idempotency_key: Optional[str] = Header(None, max_length=255)):
+    """Genera contenido de blog basado en los parámetros proporcionados.
+    
+    Pasa por el control de admisión: con el servicio saturado responde 429 o 503
+    con Retry-After. Las peticiones de la API van siempre por el carril interactivo: el
+    de lotes, que espera sin límite, solo lo usa /generar-lote.
+    El plazo se indica con la cabecera X-Deadline-Seconds o el campo ``plazo_segundos``
+    (responde 504 si se agota); si el cliente se desconecta, la generación se cancela.
+    Con la cabecera Idempotency-Key, los reintentos de la misma petición reciben la
+    respuesta de la primera (marcada con Idempotent-Replayed) en lugar de generarla
+    de nuevo; reutilizar la clave con otra petición responde 422.
+    """
+    async def generate() -> Response:
+        async with admission_controller.slot():
+            response = await run_in_threadpool(bind_log_context(get_orchestrator().generate), request)
+        # Con variantes y traducciones la respuesta ocupa cientos de KB: se serializa fuera del bucle,
+        # con el contexto de la petición para que el perfil muestree también ese hilo
+        return Response(
+            await run_in_threadpool(bind_log_context(response.model_dump_json)), media_type="application/json"
         )
+    
+    async def generate_once() -> Response:
+        async def produce():
+            # La respuesta se serializa una vez y se guarda tal cual para los reintentos
+            return 200, (await generate()).body
         
-        return BlogResponse(
-            content=result["content"],
-            title=result["title"],
-            summary=result["summary"],
-            sections=result["sections"],
-            metadata=result["metadata"],
+        key = f"{tenant_var.get()}:{idempotency_key}"
+        fingerprint = hashlib.sha256(request.model_dump_json().encode("utf-8")).hexdigest()
+        status_code, body, replayed = await idempotency_store.run_once(key, fingerprint, produce)
+        if replayed:
+            logger.info(f"Respuesta repetida para la clave de idempotencia {idempotency_key}")
+        return Response(
+            content=body, status_code=status_code, media_type="application/json",
+            headers={"Idempotent-Replayed": "true" if replayed else "false"}
         )
+    
+    try:
+        with deadline_scope(x_deadline_seconds or settings.REQUEST_DEADLINE_SECONDS or None) as deadline:
+            watcher = asyncio.create_task(cancel_on_disconnect(http_request, deadline))
+            try:
+                if idempotency_key:
+                    return await generate_once()
+                return await generate()
+            finally:
+                watcher.cancel()
+    except IdempotencyKeyReused as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+    except DeadlineExceeded as e:
+        logger.warning(f"Generación interrumpida: {str(e)}")
+        raise HTTPException(status_code=504, detail=f"Generación interrumpida: {str(e)}")
+    except InvalidModelResponse as e:
+        logger.error(f"Respuesta inválida del proveedor: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"{str(e)}. Por favor, inténtalo de nuevo.")
     except ValueError as e:
         logger.error(f"Error de validación: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -63,13 +181,114 @@ async def generate_blog(request: BlogRequest):
         logger.error(f"Error generando contenido: {str(e)}")
         raise HTTPException(status_code=500, detail="Error generando contenido. Por favor, inténtalo de nuevo.")
 
-@router.post("/subir-pdf")
-async def upload_pdf(file: UploadFile = File(...)):
-    """Recibe un archivo PDF para procesamiento futuro."""
+@router.post("/generar-lote")
+async def generate_blog_batch(batch: BlogBatchRequest):
+    """Genera un lote de artículos y devuelve cada uno en cuanto termina.
+    
+    La respuesta es NDJSON: una línea por artículo ({"index", "status", "result"/"error"})
+    en orden de finalización, y una última línea de resumen con status "done".
+    """
+    batch_generator = get_batch_generator()
+    
+    async def stream_results():
+        async for item in batch_generator.stream(batch.peticiones):
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@router.post("/subir-pdf", status_code=202, openapi_extra=UPLOAD_PDF_OPENAPI)
+async def upload_pdf(request: Request):
+    """Recibe un archivo PDF (campo ``file`` de un formulario multipart) y lo procesa en segundo plano.
+    
+    El cuerpo se escribe en disco a medida que llega, sin pasar por el formulario en
+    memoria de FastAPI, para rechazar las subidas demasiado grandes antes de recibirlas
+    enteras. Devuelve el ID del documento, que puede indicarse en el campo ``documentos``
+    de las peticiones de generación una vez su estado sea 'ready'.
+    """
     try:
-        # Aquí se implementaría la lógica para procesar el PDF
-        # Por ahora solo devolvemos confirmación
-        return {"filename": file.filename, "status": "PDF recibido correctamente"}
+        document_id, filename = await pdf_ingestion.ingest(request.headers, request.stream())
+        return {"document_id": document_id, "filename": filename, "status": "processing"}
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error al procesar el PDF: {str(e)}")
-        raise HTTPException(status_code=500, detail="Error al procesar el archivo PDF")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Error al procesar el archivo PDF")
+
+@router.get("/documentos/{document_id}")
+async def get_document(document_id: str):
+    """Consulta el estado de procesamiento de un documento subido."""
+    document = await asyncio.to_thread(document_store.get_document, document_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Documento no encontrado")
+    return document
+
+def _article_response(article: Dict[str, Any], **metadata) -> ArticleResponse:
+    """Convierte un artículo del almacén en la respuesta de la API."""
+    return ArticleResponse(
+        id=article["id"],
+        version=article["version"],
+        latest_version=article["latest_version"],
+        title=TextProcessor.extract_sections(article["content"])["title"] or article["tema"],
+        content=article["content"],
+        sections=article["sections"],
+        metadata={"tema": article["tema"], **metadata}
+    )
+
+@router.get("/articulos/{article_id}", response_model=ArticleResponse)
+async def get_article(article_id: str, version: Optional[int] = Query(None, ge=1)):
+    """Obtiene un artículo generado en su versión actual o en una anterior."""
+    try:
+        # Reconstruir una versión anterior descomprime sus cambios: fuera del bucle de eventos
+        article = await asyncio.to_thread(article_store.get, article_id, tenant_var.get(), version)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if article is None:
+        raise HTTPException(status_code=404, detail="Artículo no encontrado")
+    return _article_response(article)
+
+@router.get("/articulos/{article_id}/historial")
+async def get_article_history(article_id: str):
+    """Lista las versiones de un artículo y la sección que cambió en cada una."""
+    tenant = tenant_var.get()
+    if not await asyncio.to_thread(article_store.exists, article_id, tenant):
+        raise HTTPException(status_code=404, detail="Artículo no encontrado")
+    return {"id": article_id, "changes": await asyncio.to_thread(article_store.history, article_id, tenant)}
+
+@router.post("/articulos/{article_id}/secciones/{index}/regenerar", response_model=ArticleResponse)
+async def regenerate_section(article_id: str, index: int, request: SectionRegenerationRequest, http_request: Request,
+                             x_deadline_seconds: Optional[float] = Header(None)):
+    """Reescribe una sección de un artículo generado y devuelve la nueva versión.
+    
+    La sección 0 es el título con la introducción; las siguientes, las secciones del
+    artículo en orden. Admisión, plazo y cancelación funcionan igual que en /generar.
+    """
+    if not await asyncio.to_thread(article_store.exists, article_id, tenant_var.get()):
+        raise HTTPException(status_code=404, detail="Artículo no encontrado")
+    try:
+        with deadline_scope(x_deadline_seconds or settings.REQUEST_DEADLINE_SECONDS or None) as deadline:
+            watcher = asyncio.create_task(cancel_on_disconnect(http_request, deadline))
+            try:
+                async with admission_controller.slot():
+                    article = await run_in_threadpool(
+                        bind_log_context(get_orchestrator().regenerate_section),
+                        article_id, index, request.instrucciones, request.editar_estilo, request.parametros
+                    )
+            finally:
+                watcher.cancel()
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+    except DeadlineExceeded as e:
+        logger.warning(f"Regeneración interrumpida: {str(e)}")
+        raise HTTPException(status_code=504, detail=f"Regeneración interrumpida: {str(e)}")
+    except InvalidModelResponse as e:
+        logger.error(f"Respuesta inválida del proveedor: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"{str(e)}. Por favor, inténtalo de nuevo.")
+    except ValueError as e:
+        logger.error(f"Error de validación: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error regenerando la sección: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error regenerando la sección. Por favor, inténtalo de nuevo.")
+    return _article_response(article, seccion=article["seccion"], editado=article["editado"], tiempo=article["tiempo"])
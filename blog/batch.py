@@ -0,0 +1,259 @@
+"""Generación masiva de artículos a partir de un fichero JSONL.
+
+Cada línea del fichero de entrada es un ``BlogRequest`` en JSON, opcionalmente con
+un campo ``id``. Los resultados se escriben de forma incremental en un JSONL de
+salida; al relanzar la ejecución se omiten los ``id`` ya completados.
+
+Con ``--deferred`` las llamadas a los LLM no se hacen de una en una: se agrupan en
+lotes de la API de lotes del proveedor, más baratos y con su propio límite de tasa, a
+cambio de que cada etapa tarde lo que tarde su lote (hasta horas). Pensado para las
+ejecuciones nocturnas que no necesitan latencia interactiva.
+
+Uso:
+    python -m blog.batch peticiones.jsonl -o resultados.jsonl --concurrency 4 --llm-rpm 120
+    python -m blog.batch peticiones.jsonl --deferred
+"""
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from pydantic import ValidationError
+from blog.models.requests import BlogRequest
+from blog.services.orchestrator import BlogOrchestrator
+from common.services.batch_api import DeferredBatchQueue, LocalBatchClient, batch_queue_var
+from common.services.model_router import model_router
+from common.services.openai_service import OpenAIService
+from common.utils.rate_limiter import RateLimiter
+from core.config import settings
+from core.logger import bind_log_context, configure_logging, request_id_var
+
+logger = logging.getLogger(__name__)
+
+
+def read_requests(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Lee las peticiones del fichero de entrada línea a línea.
+    
+    Args:
+        path: Ruta del fichero JSONL
+    
+    Returns:
+        Iterador de tuplas (id, datos de la línea)
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield f"linea-{line_number}", {"_error": f"JSON inválido: {str(e)}"}
+                continue
+            request_id = str(data.pop("id", None) or data.pop("request_id", None) or f"linea-{line_number}")
+            yield request_id, data
+
+
+def load_completed_ids(path: str) -> Set[str]:
+    """Obtiene los ids ya completados en un fichero de salida previo.
+    
+    Args:
+        path: Ruta del fichero JSONL de salida
+    
+    Returns:
+        Conjunto de ids con estado 'ok'
+    """
+    completed: Set[str] = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Línea truncada por una interrupción: se regenerará
+                continue
+            if record.get("status") == "ok":
+                completed.add(record["id"])
+    return completed
+
+
+class Progress:
+    """Seguimiento del avance con rendimiento y tiempo estimado restante."""
+    
+    def __init__(self, total: int, stream=sys.stderr):
+        self.total = total
+        self.stream = stream
+        self.done = 0
+        self.failed = 0
+        self.start = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def update(self, success: bool) -> None:
+        with self._lock:
+            self.done += 1
+            if not success:
+                self.failed += 1
+            elapsed = time.monotonic() - self.start
+            per_minute = self.done / elapsed * 60 if elapsed > 0 else 0.0
+            remaining = self.total - self.done
+            eta = remaining / per_minute * 60 if per_minute > 0 else 0.0
+            self.stream.write(
+                f"\r[{self.done}/{self.total}] {per_minute:.1f} art/min · "
+                f"errores: {self.failed} · ETA {time.strftime('%H:%M:%S', time.gmtime(eta))}"
+            )
+            self.stream.flush()
+
+
+def run_batch(input_path: str,
+              output_path: str,
+              concurrency: int = 4,
+              articles_per_minute: Optional[float] = None,
+              orchestrator: Optional[BlogOrchestrator] = None,
+              batch_queue: Optional[DeferredBatchQueue] = None) -> Dict[str, int]:
+    """Ejecuta todas las peticiones pendientes del fichero de entrada.
+    
+    Args:
+        input_path: Fichero JSONL con las peticiones
+        output_path: Fichero JSONL donde se añaden los resultados
+        concurrency: Número máximo de artículos generándose a la vez
+        articles_per_minute: Máximo de artículos iniciados por minuto (None para no limitar)
+        orchestrator: Orquestador a utilizar
+        batch_queue: Cola de lotes para el modo diferido (None: llamadas síncronas)
+    
+    Returns:
+        Resumen con el número de artículos generados, fallidos y omitidos
+    """
+    orchestrator = orchestrator or BlogOrchestrator()
+    completed = load_completed_ids(output_path)
+    pending = sum(1 for request_id, _ in read_requests(input_path) if request_id not in completed)
+    progress = Progress(pending)
+    start_limiter = RateLimiter(articles_per_minute) if articles_per_minute else None
+    slots = threading.BoundedSemaphore(concurrency)
+    write_lock = threading.Lock()
+    
+    with open(output_path, "a", encoding="utf-8") as output:
+        
+        def write_record(record: Dict[str, Any]) -> None:
+            with write_lock:
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+        
+        @bind_log_context
+        def process(request_id: str, data: Dict[str, Any]) -> None:
+            request_id_var.set(request_id)
+            batch_queue_var.set(batch_queue)
+            started = time.monotonic()
+            try:
+                if "_error" in data:
+                    raise ValueError(data["_error"])
+                response = orchestrator.generate(BlogRequest(**data))
+                write_record({
+                    "id": request_id,
+                    "status": "ok",
+                    "elapsed": round(time.monotonic() - started, 3),
+                    "result": response.model_dump()
+                })
+                progress.update(success=True)
+            except (ValidationError, ValueError) as e:
+                write_record({"id": request_id, "status": "error", "error": str(e)})
+                progress.update(success=False)
+            except Exception as e:
+                logger.error(f"Error generando el artículo {request_id}: {str(e)}")
+                write_record({"id": request_id, "status": "error", "error": str(e)})
+                progress.update(success=False)
+            finally:
+                slots.release()
+        
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            # El semáforo evita leer el fichero entero en memoria como tareas pendientes
+            for request_id, data in read_requests(input_path):
+                if request_id in completed:
+                    continue
+                slots.acquire()
+                if start_limiter is not None:
+                    start_limiter.acquire()
+                completed.add(request_id)
+                executor.submit(process, request_id, data)
+    
+    progress.stream.write("\n")
+    return {
+        "generados": progress.done - progress.failed,
+        "fallidos": progress.failed,
+        "omitidos": len(completed) - progress.done,
+    }
+
+
+def build_batch_queue(local: bool = False) -> DeferredBatchQueue:
+    """Crea la cola de lotes del modo diferido.
+    
+    Args:
+        local: Usar el sustituto local de la API de lotes, que ejecuta cada lote con
+            llamadas síncronas (para probar el modo sin esperar a lotes reales)
+    
+    Returns:
+        Cola de lotes
+    """
+    openai_service = OpenAIService()
+    
+    def client_for(model_config):
+        client = openai_service.client_for(model_config)
+        return LocalBatchClient(client) if local else client
+    
+    return DeferredBatchQueue(
+        client_for,
+        collect_seconds=settings.BATCH_COLLECT_SECONDS,
+        max_requests=settings.BATCH_MAX_REQUESTS,
+        poll_seconds=1.0 if local else settings.BATCH_POLL_SECONDS
+    )
+
+
+def main(argv: Optional[list] = None) -> int:
+    """Punto de entrada de la línea de comandos."""
+    parser = argparse.ArgumentParser(description="Generación masiva de artículos de blog desde un fichero JSONL")
+    parser.add_argument("input", help="Fichero JSONL con una petición (BlogRequest) por línea")
+    parser.add_argument("-o", "--output", help="Fichero JSONL de resultados (por defecto, <input>.resultados.jsonl)")
+    parser.add_argument("--concurrency", type=int,
+                        help="Artículos generándose a la vez (por defecto 4, o BATCH_DEFERRED_CONCURRENCY con --deferred)")
+    parser.add_argument("--articles-per-minute", type=float, help="Máximo de artículos iniciados por minuto")
+    parser.add_argument("--llm-rpm", type=float, help="Máximo de llamadas a los LLM por minuto en todo el lote")
+    parser.add_argument("--deferred", action="store_true",
+                        help="Agrupar las llamadas a los LLM en lotes de la API de lotes del proveedor")
+    parser.add_argument("--batch-api", choices=("openai", "local"), default="openai",
+                        help="API de lotes del modo diferido ('local': sustituto que ejecuta cada lote en síncrono)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Mostrar el log de generación")
+    args = parser.parse_args(argv)
+    
+    configure_logging("INFO" if args.verbose else "WARNING")
+    
+    # En modo diferido los artículos esperan a sus lotes: cuantos más haya en curso,
+    # más llamadas reúne cada lote
+    concurrency = max(1, args.concurrency or (settings.BATCH_DEFERRED_CONCURRENCY if args.deferred else 4))
+    if args.llm_rpm:
+        model_router.rate_limiter = RateLimiter(args.llm_rpm, burst=concurrency)
+    
+    batch_queue = build_batch_queue(local=args.batch_api == "local") if args.deferred else None
+    output_path = args.output or f"{os.path.splitext(args.input)[0]}.resultados.jsonl"
+    try:
+        summary = run_batch(
+            args.input,
+            output_path,
+            concurrency=concurrency,
+            articles_per_minute=args.articles_per_minute,
+            batch_queue=batch_queue
+        )
+    finally:
+        if batch_queue is not None:
+            batch_queue.close()
+    if batch_queue is not None:
+        summary["lotes"] = batch_queue.snapshot()["batches"]
+    print(json.dumps(summary, ensure_ascii=False))
+    return 0 if summary["fallidos"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,7 @@ from typing import List, Optional, Dict, Any
 
 class GenerationParameters(BaseModel):
     """Parámetros de configuración para la generación de contenido."""
-    model: str = Field("gpt-4o", description="Modelo a utilizar")
+    model: Optional[str] = Field(None, description="Modelo a utilizar en todas las etapas (por defecto, el de la política de enrutado)")
     temperature: float = Field(0.7, ge=0.0, le=1.0, description="Temperatura para la generación")
     top_p: float = Field(1.0, ge=0.0, le=1.0, description="Valor de Top P para nucleus sampling")
     max_tokens: Optional[int] = Field(None, description="Número máximo de tokens a generar")
@@ -19,4 +19,20 @@ class BlogRequest(BaseModel):
     longitud: str = Field("medium", description="Longitud del artículo: 'short', 'medium', 'long'")
     estilos: List[str] = Field(default=["informativo"], description="Estilos de contenido")
     urls: Optional[List[str]] = Field(None, description="URLs de referencia para el contenido")
-    parametros: Optional[GenerationParameters] = Field(None, description="Parámetros avanzados de generación")
\ No newline at end of file
+    documentos: Optional[List[str]] = Field(None, description="IDs de documentos PDF subidos en /blog/subir-pdf a usar como referencia")
+    parametros: Optional[GenerationParameters] = Field(None, description="Parámetros avanzados de generación")
+    calidad: str = Field("standard", description="Nivel de calidad: 'standard' (redacción y edición de estilo) o 'fast' (una sola pasada)")
+    variantes: int = Field(1, ge=1, le=5, description="Número de versiones alternativas del artículo (comparten investigación y outline)")
+    reutilizar_similares: bool = Field(True, description="Reutilizar la investigación y el outline de peticiones recientes casi idénticas")
+    plazo_segundos: Optional[float] = Field(None, gt=0, description="Plazo máximo de la generación; si el tiempo no alcanza se omiten etapas opcionales")
+    idiomas: Optional[List[str]] = Field(None, max_length=7, description="Idiomas de publicación ('es', 'en', 'pt', ...); el artículo se redacta una vez en español y se traduce al resto")
+
+class SectionRegenerationRequest(BaseModel):
+    """Modelo para solicitudes de regeneración de una sección de un artículo guardado."""
+    instrucciones: Optional[str] = Field(None, description="Indicaciones del editor para la nueva versión de la sección")
+    editar_estilo: bool = Field(False, description="Pasar la sección reescrita por el editor de estilo (una llamada corta más)")
+    parametros: Optional[GenerationParameters] = Field(None, description="Parámetros avanzados de generación")
+
+class BlogBatchRequest(BaseModel):
+    """Modelo para solicitudes de generación de un lote de artículos."""
+    peticiones: List[BlogRequest] = Field(..., min_length=1, max_length=100, description="Artículos a generar en el lote")
\ No newline at end of file
@@ -7,4 +7,16 @@ class BlogResponse(BaseModel):
     title: str = Field(..., description="Título del artículo")
     summary: str = Field(..., description="Resumen del artículo")
     sections: List[Dict[str, Any]] = Field(..., description="Estructura de secciones del artículo")
+    metadata: Optional[Dict[str, Any]] = Field({}, description="Metadatos adicionales")
+    variants: Optional[List[Dict[str, Any]]] = Field(None, description="Variantes alternativas ordenadas por puntuación (la primera coincide con el contenido principal)")
+    translations: Optional[Dict[str, Dict[str, str]]] = Field(None, description="Contenido, título y resumen por idioma, si se pidieron varios idiomas")
+
+class ArticleResponse(BaseModel):
+    """Modelo para una versión de un artículo guardado."""
+    id: str = Field(..., description="ID del artículo")
+    version: int = Field(..., description="Versión devuelta")
+    latest_version: int = Field(..., description="Última versión del artículo")
+    title: str = Field(..., description="Título del artículo")
+    content: str = Field(..., description="Contenido completo del artículo en formato markdown")
+    sections: List[str] = Field(..., description="Contenido de cada sección (la 0 contiene el título y la introducción)")
     metadata: Optional[Dict[str, Any]] = Field({}, description="Metadatos adicionales")
\ No newline at end of file
@@ -0,0 +1,23 @@
+from typing import Any, Dict, List, Optional
+from common.utils.text_processor import TextProcessor
+
+
+def summarize_article(content: str, headings: Optional[List[str]] = None,
+                      target_words: Optional[int] = None) -> Dict[str, Any]:
+    """Título, resumen y, si se indica la estructura, puntuación de un artículo.
+    
+    Se define a nivel de módulo para poder ejecutarse en el pool de procesos de CPU.
+    
+    Args:
+        content: Artículo en markdown
+        headings: Encabezados esperados, para puntuarlo
+        target_words: Palabras objetivo, para puntuarlo
+    
+    Returns:
+        Diccionario con 'title', 'summary' y 'score' (None si no se puntúa)
+    """
+    return {
+        "title": TextProcessor.extract_sections(content)["title"],
+        "summary": TextProcessor.extract_summary(content),
+        "score": TextProcessor.score_article(content, headings, target_words) if headings is not None else None,
+    }
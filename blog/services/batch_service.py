@@ -0,0 +1,110 @@
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import logging
+import time
+from blog.models.requests import BlogRequest
+from common.services.admission import admission_controller
+from common.services.model_router import InvalidModelResponse
+from common.utils.single_flight import SingleFlightCache
+from core.deadline import Deadline, DeadlineExceeded, deadline_var
+from core.logger import bind_log_context, request_id_var
+from core.tenancy import tenant_var
+
+if TYPE_CHECKING:
+    from blog.services.orchestrator import BlogOrchestrator
+
+logger = logging.getLogger(__name__)
+
+class BatchGenerator:
+    """Generación de lotes de artículos como una única unidad de trabajo.
+    
+    Los artículos del lote se ejecutan en paralelo sobre un pool de hilos acotado,
+    de modo que sus etapas se intercalan y el proveedor se mantiene ocupado; el
+    presupuesto global de llamadas (LLM_CALLS_PER_MINUTE) evita superar los límites
+    de tasa. El análisis de URLs se comparte entre todos los artículos del lote.
+    """
+    
+    def __init__(self, orchestrator: "BlogOrchestrator", concurrency: int = 8):
+        """Inicializa el generador de lotes.
+        
+        Args:
+            orchestrator: Orquestador de blog a utilizar
+            concurrency: Artículos generándose a la vez entre todos los lotes
+        """
+        self.orchestrator = orchestrator
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="blog-batch")
+    
+    async def stream(self, requests: List[BlogRequest]) -> AsyncIterator[Dict[str, Any]]:
+        """Genera los artículos del lote y los devuelve a medida que terminan.
+        
+        Args:
+            requests: Peticiones del lote
+        
+        Returns:
+            Iterador asíncrono con un resultado por artículo y un resumen final
+        """
+        loop = asyncio.get_running_loop()
+        url_cache = SingleFlightCache()
+        start = time.perf_counter()
+        batch_id = request_id_var.get() or "lote"
+        tenant = tenant_var.get()
+        # Plazo común del lote: se cancela si el cliente se desconecta, y con él las
+        # llamadas en curso de todos sus artículos
+        batch_deadline = Deadline(parent=deadline_var.get())
+        
+        @bind_log_context
+        def run(index: int, request: BlogRequest) -> Tuple[int, Dict[str, Any]]:
+            request_id_var.set(f"{batch_id}-{index}")
+            deadline_var.set(batch_deadline)
+            try:
+                response = self.orchestrator.generate(request, url_cache=url_cache)
+                return index, {"index": index, "status": "ok", "result": response.model_dump()}
+            except DeadlineExceeded as e:
+                logger.warning(f"Artículo {index} del lote interrumpido: {str(e)}")
+                return index, {"index": index, "status": "error", "error": f"Generación interrumpida: {str(e)}"}
+            except (ValueError, InvalidModelResponse) as e:
+                return index, {"index": index, "status": "error", "error": str(e)}
+            except Exception as e:
+                logger.error(f"Error generando el artículo {index} del lote: {str(e)}")
+                return index, {"index": index, "status": "error", "error": "Error generando contenido"}
+        
+        async def run_admitted(index: int, request: BlogRequest) -> Tuple[int, Dict[str, Any]]:
+            # Los artículos del lote ocupan huecos del carril de menor prioridad; el hueco
+            # se libera cuando termina el hilo, aunque el cliente se haya desconectado
+            await admission_controller.acquire("batch", tenant)
+            started = time.monotonic()
+            task = self.executor.submit(run, index, request)
+            task.add_done_callback(
+                lambda _: loop.call_soon_threadsafe(admission_controller.release, time.monotonic() - started, tenant)
+            )
+            return await asyncio.wrap_future(task)
+        
+        futures = [
+            asyncio.ensure_future(run_admitted(index, request))
+            for index, request in enumerate(requests)
+        ]
+        completed = 0
+        failed = 0
+        try:
+            for future in asyncio.as_completed(futures):
+                _, item = await future
+                completed += 1
+                if item["status"] != "ok":
+                    failed += 1
+                yield item
+        finally:
+            # Si el cliente se desconecta, no empezar los artículos pendientes y cortar
+            # las llamadas de los que están en curso
+            for future in futures:
+                future.cancel()
+            if completed < len(requests):
+                batch_deadline.cancel("cliente desconectado")
+        
+        yield {
+            "status": "done",
+            "total": len(requests),
+            "failed": failed,
+            "urls_analyzed": len(url_cache),
+            "elapsed": round(time.perf_counter() - start, 3)
+        }
@@ -2,33 +2,191 @@ from typing import Dict, Any, List, Optional
 from blog.agents.web_research_agent import WebResearchAgent
 from blog.agents.outline_planner_agent import OutlinePlannerAgent
 from blog.agents.content_writer_agent import ContentWriterAgent
+from blog.agents.fast_writer_agent import FastWriterAgent
+from blog.agents.section_writer_agent import SectionWriterAgent
 from blog.agents.style_editor_agent import StyleCoherenceEditorAgent
+from blog.agents.translator_agent import TranslatorAgent
+from blog.models.requests import BlogRequest
+from blog.models.responses import BlogResponse
+from blog.services.analysis import summarize_article
+from common.services.article_store import article_store
+from common.services.cpu_pool import cpu_pool
+from common.services.cache import shared_cache
+from common.services.document_store import document_store
+from common.services.retrieval_index import KIND_DOCUMENT, retrieval_index
+from common.services.run_store import run_store
+from common.services.similar_requests import similar_requests
+from common.stage_graph import Stage, StageGraph
+from common.utils.single_flight import SingleFlightCache
 from common.utils.text_processor import TextProcessor
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from core.config import settings
+from core.deadline import deadline_scope, remaining_time
+from core.logger import bind_log_context
+from core.tenancy import tenant_var
+import json
 import logging
+import sqlite3
+import time
+import uuid
 
 logger = logging.getLogger(__name__)
 
+# Niveles de calidad disponibles
+QUALITY_TIERS = ("standard", "fast")
+
+# Palabras objetivo por longitud, usadas para puntuar variantes
+TARGET_WORDS = {"short": 500, "medium": 1000, "long": 2000}
+
+# Idiomas de publicación; el pipeline redacta en el de origen y traduce al resto
+SOURCE_LANGUAGE = "es"
+LANGUAGES = {
+    "es": "español",
+    "en": "inglés",
+    "pt": "portugués",
+    "fr": "francés",
+    "it": "italiano",
+    "de": "alemán",
+    "ca": "catalán",
+}
+
+# Valores iniciales del grafo de etapas del pipeline de blog
+GRAPH_INPUTS = (
+    "agents", "tema", "longitud", "estilos", "urls", "documentos", "prompt_personalizado",
+    "calidad", "variantes", "url_cache", "reutilizar_similares", "degradaciones", "ejecucion_id",
+    "idiomas",
+)
+
 class BlogOrchestrator:
     """Orquestador para la generación de contenido de blog."""
     
-    def __init__(self, model_name: str = "gpt-4o"):
+    def __init__(self, model_name: Optional[str] = None):
         """Inicializa el orquestador con los agentes necesarios.
         
         Args:
-            model_name: Nombre del modelo a utilizar
+            model_name: Nombre del modelo a utilizar en todas las etapas
+                (por defecto, cada etapa usa el modelo de su política de enrutado)
         """
         self.outline_planner = OutlinePlannerAgent(model_name)
         self.content_writer = ContentWriterAgent(model_name)
+        self.fast_writer = FastWriterAgent(model_name)
         self.style_editor = StyleCoherenceEditorAgent(model_name)
         self.web_researcher = WebResearchAgent(model_name)
+        self.translator = TranslatorAgent(model_name)
+        self.section_writer = SectionWriterAgent(model_name)
+        self.stage_cache = shared_cache
+        self.graph = self._build_graph()
+    
+    def warm_up(self) -> None:
+        """Prepara los clientes de los agentes compartidos y abre sus conexiones con el proveedor.
+        
+        Los fallos solo se registran: la primera petición volverá a crear lo que falte.
+        """
+        agents = [self.outline_planner, self.content_writer, self.fast_writer, self.style_editor, self.translator,
+                  self.section_writer]
+        for agent in agents:
+            try:
+                agent.warm_up()
+            except Exception as e:
+                logger.warning(f"No se pudo precalentar {type(agent).__name__}: {str(e)}")
+        try:
+            self.web_researcher.openai_service.warm_up()
+        except Exception as e:
+            logger.warning(f"No se pudo precalentar el cliente de OpenAI: {str(e)}")
+        try:
+            cpu_pool.warm_up()
+        except Exception as e:
+            logger.warning(f"No se pudo arrancar el pool de procesos de CPU: {str(e)}")
+    
+    def _get_agents(self, parametros: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Obtiene los agentes a utilizar en una petición.
+        
+        Sin parámetros se reutilizan los agentes compartidos; con parámetros se crean
+        agentes propios de la petición para no modificar los compartidos.
+        
+        Args:
+            parametros: Parámetros avanzados de generación
+        
+        Returns:
+            Diccionario con los agentes por nombre
+        """
+        if not parametros:
+            return {
+                "outline_planner": self.outline_planner,
+                "content_writer": self.content_writer,
+                "fast_writer": self.fast_writer,
+                "style_editor": self.style_editor,
+                "web_researcher": self.web_researcher,
+                "translator": self.translator,
+                "section_writer": self.section_writer,
+            }
+        
+        model_params = dict(parametros)
+        model_name = model_params.pop('model', None)
+        return {
+            "outline_planner": OutlinePlannerAgent(model_name=model_name, **model_params),
+            "content_writer": ContentWriterAgent(model_name=model_name, **model_params),
+            "fast_writer": FastWriterAgent(model_name=model_name, **model_params),
+            "style_editor": StyleCoherenceEditorAgent(model_name=model_name, **model_params),
+            "web_researcher": WebResearchAgent(model_name=model_name),
+            "translator": TranslatorAgent(model_name=model_name, **model_params),
+            "section_writer": SectionWriterAgent(model_name=model_name, **model_params),
+        }
     
-    def generate_blog_content(self, 
-                             tema: str, 
-                             longitud: str, 
-                             estilos: List[str], 
-                             urls: Optional[List[str]] = None, 
+    def generate(self, request: BlogRequest, url_cache: Optional[SingleFlightCache] = None) -> BlogResponse:
+        """Genera un artículo a partir de una petición validada.
+        
+        Args:
+            request: Petición de generación de blog
+            url_cache: Caché de análisis de URLs compartida con otros artículos
+        
+        Returns:
+            Respuesta con el artículo generado
+        
+        Raises:
+            DeadlineExceeded: Si se agota el plazo de la petición o se cancela
+        """
+        # El plazo de la petición se anida en el de la llamada (cabecera o lote), si lo hay
+        with deadline_scope(request.plazo_segundos) if request.plazo_segundos else nullcontext():
+            result = self.generate_blog_content(
+                tema=request.tema,
+                longitud=request.longitud,
+                estilos=request.estilos,
+                urls=request.urls,
+                prompt_personalizado=request.prompt_personalizado,
+                parametros=request.parametros,
+                documentos=request.documentos,
+                calidad=request.calidad,
+                variantes=request.variantes,
+                url_cache=url_cache,
+                reutilizar_similares=request.reutilizar_similares,
+                idiomas=request.idiomas
+            )
+        
+        return BlogResponse(
+            content=result["content"],
+            title=result["title"],
+            summary=result["summary"],
+            sections=result["sections"],
+            metadata=result["metadata"],
+            variants=result["variants"],
+            translations=result["translations"],
+        )
+    
+    def generate_blog_content(self,
+                             tema: str,
+                             longitud: str,
+                             estilos: List[str],
+                             urls: Optional[List[str]] = None,
                              prompt_personalizado: Optional[str] = None,
-                             parametros: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+                             parametros: Optional[Dict[str, Any]] = None,
+                             calidad: str = "standard",
+                             variantes: int = 1,
+                             url_cache: Optional[SingleFlightCache] = None,
+                             documentos: Optional[List[str]] = None,
+                             reutilizar_similares: bool = True,
+                             idiomas: Optional[List[str]] = None) -> Dict[str, Any]:
         """Genera contenido de blog completo.
         
         Args:
@@ -37,69 +195,549 @@ class BlogOrchestrator:
             estilos: Lista de estilos ('informativo', 'persuasivo', 'narrativo', 'técnico')
             urls: Lista de URLs de referencia
             prompt_personalizado: Instrucciones adicionales
-            
+            parametros: Parámetros avanzados de generación
+            calidad: Nivel de calidad ('standard': redacción y edición de estilo;
+                'fast': una sola pasada que combina ambas)
+            variantes: Número de versiones alternativas; la investigación y el outline
+                se comparten y solo se multiplican las etapas de redacción y edición
+            url_cache: Caché de análisis de URLs compartida con otros artículos
+            documentos: IDs de documentos subidos cuyos fragmentos relevantes se usan como referencia
+            reutilizar_similares: Partir de la investigación y el outline de una petición reciente
+                casi idéntica, si la hay (solo sin URLs ni documentos propios)
+            idiomas: Idiomas en los que publicar el artículo; la investigación, el outline y la
+                redacción se hacen una vez y el artículo final se traduce a la vez a cada idioma
+        
         Returns:
             Diccionario con el contenido generado
         """
+        if calidad not in QUALITY_TIERS:
+            raise ValueError(f"Nivel de calidad no válido: {calidad}. Opciones: {', '.join(QUALITY_TIERS)}")
+        if variantes < 1:
+            raise ValueError("El número de variantes debe ser al menos 1")
+        unknown = [idioma for idioma in idiomas or [] if idioma not in LANGUAGES]
+        if unknown:
+            raise ValueError(f"Idiomas no soportados: {', '.join(unknown)}. Opciones: {', '.join(LANGUAGES)}")
         
         # Configurar parámetros del modelo
-        model_params = parametros or {}
-        model_name = model_params.get('model', "gpt-4o")
-        
-        # Inicializar agentes con los parámetros proporcionados
-        if parametros:
-            self.outline_planner = OutlinePlannerAgent(model_name=model_name, **model_params)
-            self.content_writer = ContentWriterAgent(model_name=model_name, **model_params)
-            self.style_editor = StyleCoherenceEditorAgent(model_name=model_name, **model_params)
-            self.web_researcher = WebResearchAgent(model_name=model_name)
-            
-        # Realizar investigación web si se proporcionan URLs
-        url_research = ""
-        if urls and len(urls) > 0:
-            logger.info(f"Procesando {len(urls)} URLs para el tema: {tema}")
-            research_results = self.web_researcher.research_urls(tema, urls)
-            url_research = self.web_researcher.synthesize_research(research_results, tema)
-            
-            # Añadir la investigación al prompt personalizado
-            additional_context = f"\n\nINFORMACIÓN DE REFERENCIA:\n{url_research}"
-            if prompt_personalizado:
-                prompt_personalizado += additional_context
-            else:
-                prompt_personalizado = additional_context
-        
-        # Generar estructura del artículo
-        logger.info(f"Generando outline para tema: {tema}")
-        outline = self.outline_planner.generate_outline(
-            tema=tema,
-            longitud=longitud,
-            estilos=estilos,
-            prompt_personalizado=prompt_personalizado
+        if parametros is not None and not isinstance(parametros, dict):
+            parametros = parametros.model_dump(exclude_none=True)
+        agents = self._get_agents(parametros)
+        
+        start = time.perf_counter()
+        run_id = uuid.uuid4().hex
+        graph_run = self.graph.run({
+            "agents": agents,
+            "tema": tema,
+            "longitud": longitud,
+            "estilos": estilos,
+            "urls": urls,
+            "documentos": documentos,
+            "prompt_personalizado": prompt_personalizado,
+            "calidad": calidad,
+            "variantes": variantes,
+            "url_cache": url_cache,
+            "reutilizar_similares": reutilizar_similares,
+            "degradaciones": [],
+            "ejecucion_id": run_id,
+            "idiomas": list(dict.fromkeys(idiomas or [])),
+        })
+        outline = graph_run["outline_generado"] or graph_run["outline_previo"]
+        variants = graph_run["ranking"]
+        timings = dict(graph_run.timings)
+        timings["total"] = time.perf_counter() - start
+        
+        return {
+            "content": variants[0]["content"],
+            "title": outline["title"],
+            "summary": variants[0]["summary"],
+            "sections": outline["sections"],
+            "variants": variants if variantes > 1 else None,
+            "translations": graph_run["traduccion"],
+            "metadata": {
+                "ejecucion_id": run_id if graph_run["artefactos"] else None,
+                "articulo_id": run_id if graph_run["articulo"] else None,
+                "calidad": calidad,
+                "variantes": variantes,
+                "idiomas": list(graph_run["traduccion"]) if graph_run["traduccion"] else [SOURCE_LANGUAGE],
+                "investigacion_local": len(graph_run["investigacion_local"]),
+                "reutilizado": graph_run["reutilizado"],
+                "degradaciones": graph_run["degradaciones"],
+                "tiempos": {stage: round(seconds, 3) for stage, seconds in timings.items()}
+            }
+        }
+    
+    def _build_graph(self) -> StageGraph:
+        """Define el pipeline de blog como grafo de etapas.
+        
+        Antes de investigar se consulta el índice local del tenant; después, la
+        investigación de URLs y la de documentos se ejecutan a la vez, y el registro
+        de la petición para reutilizarla se solapa con la redacción.
+        
+        Returns:
+            Grafo listo para ejecutar
+        """
+        graph = StageGraph("blog", max_workers=settings.PIPELINE_MAX_WORKERS)
+        no_sources = lambda urls, documentos, **_: not urls and not documentos
+        
+        graph.add(Stage(
+            "reutilizacion", self._reuse_similar,
+            inputs=("tema", "prompt_personalizado", "longitud", "estilos", "urls", "documentos", "reutilizar_similares"),
+            outputs=("investigacion_previa", "outline_previo", "reutilizado"),
+            when=lambda reutilizar_similares, **kwargs: reutilizar_similares and no_sources(**kwargs)
+        ))
+        graph.add(Stage(
+            "investigacion_local",
+            lambda agents, tema, urls, **_: agents["web_researcher"].find_local_research(tema, exclude_sources=urls),
+            inputs=("agents", "tema", "urls", "documentos"),
+            # Solo complementa la investigación pedida: sin fuentes, la petición no lleva investigación
+            when=lambda **kwargs: not no_sources(**kwargs),
+            default=[]
+        ))
+        graph.add(Stage(
+            "investigacion_urls",
+            lambda investigacion_local, **kwargs: self._research_urls(**kwargs),
+            inputs=("agents", "tema", "urls", "url_cache", "degradaciones", "investigacion_local"),
+            when=lambda urls, **_: bool(urls),
+            default=[]
+        ))
+        graph.add(Stage(
+            "investigacion_documentos", self._get_document_research,
+            inputs=("documentos", "tema", "prompt_personalizado"),
+            when=lambda documentos, **_: bool(documentos),
+            default=[],
+            # El índice puede estar bloqueado un instante mientras se indexa un PDF
+            retries=2,
+            retry_on=(sqlite3.OperationalError,)
+        ))
+        graph.add(Stage(
+            "sintesis",
+            lambda agents, tema, investigacion_local, investigacion_urls, investigacion_documentos, **_:
+                agents["web_researcher"].synthesize_research(
+                    investigacion_local + investigacion_urls + investigacion_documentos, tema
+                ),
+            inputs=("agents", "tema", "calidad", "urls", "documentos", "investigacion_local",
+                    "investigacion_urls", "investigacion_documentos"),
+            # En el nivel rápido, una única fuente se usa directamente sin sintetizar
+            when=lambda calidad, investigacion_local, investigacion_urls, investigacion_documentos, **kwargs: (
+                not no_sources(**kwargs) and not (
+                    calidad == "fast"
+                    and len(investigacion_local) + len(investigacion_urls) + len(investigacion_documentos) == 1
+                )
+            )
+        ))
+        graph.add(Stage(
+            "investigacion", self._combine_research,
+            inputs=("prompt_personalizado", "investigacion_previa", "investigacion_local",
+                    "investigacion_urls", "investigacion_documentos", "sintesis"),
+            outputs=("investigacion", "prompt_redaccion")
+        ))
+        graph.add(Stage(
+            "outline",
+            lambda agents, tema, longitud, estilos, prompt_redaccion, **_: agents["outline_planner"].generate_outline(
+                tema=tema, longitud=longitud, estilos=estilos, prompt_personalizado=prompt_redaccion
+            ),
+            inputs=("agents", "tema", "longitud", "estilos", "prompt_redaccion", "outline_previo"),
+            outputs=("outline_generado",),
+            when=lambda outline_previo, **_: outline_previo is None,
+            # Una petición repetida (por ejemplo, reintentada tras agotar su plazo) reutiliza el outline
+            cache=self.stage_cache,
+            # (solo con los agentes compartidos: los parámetros propios cambian el resultado)
+            cache_key=lambda agents, outline_previo, **kwargs: (
+                json.dumps(kwargs, sort_keys=True, ensure_ascii=False)
+                if agents["outline_planner"] is self.outline_planner else None
+            )
+        ))
+        graph.add(Stage(
+            "memoria",
+            lambda tema, prompt_personalizado, longitud, estilos, investigacion, outline_generado, **_:
+                self._remember_request(tema, prompt_personalizado, longitud, estilos, investigacion, outline_generado),
+            inputs=("tema", "prompt_personalizado", "longitud", "estilos", "investigacion", "outline_generado", "documentos"),
+            # Los documentos subidos son privados de cada petición: no se ofrecen a otras
+            when=lambda outline_generado, documentos, **_: (
+                outline_generado is not None and not documentos and settings.SIMILAR_REQUESTS_REUSE
+            )
+        ))
+        graph.add(Stage(
+            "redaccion", self._write,
+            inputs=("agents", "calidad", "variantes", "tema", "longitud", "estilos", "urls",
+                    "prompt_redaccion", "outline_previo", "outline_generado"),
+        ))
+        graph.add(Stage(
+            "edicion", self._edit,
+            inputs=("agents", "tema", "estilos", "redaccion", "degradaciones"),
+            when=lambda redaccion, **_: redaccion["editar"]
+        ))
+        graph.add(Stage(
+            "ranking",
+            lambda redaccion, edicion, outline_previo, outline_generado, longitud: self._rank_variants(
+                edicion or redaccion["contenidos"], outline_generado or outline_previo, longitud
+            ),
+            inputs=("redaccion", "edicion", "outline_previo", "outline_generado", "longitud")
+        ))
+        graph.add(Stage(
+            "traduccion", self._translate,
+            inputs=("agents", "tema", "idiomas", "ranking"),
+            when=lambda idiomas, **_: any(idioma != SOURCE_LANGUAGE for idioma in idiomas)
+        ))
+        graph.add(Stage(
+            "artefactos", self._save_artifacts,
+            inputs=("ejecucion_id", "tema", "estilos", "investigacion", "outline_previo", "outline_generado", "ranking"),
+            default=False
+        ))
+        graph.add(Stage(
+            "articulo", self._save_article,
+            inputs=("ejecucion_id", "tema", "longitud", "estilos", "investigacion",
+                    "outline_previo", "outline_generado", "ranking"),
+            default=False
+        ))
+        graph.validate(GRAPH_INPUTS)
+        return graph
+    
+    def regenerate_section(self, article_id: str, index: int, instrucciones: Optional[str] = None,
+                           editar_estilo: bool = False, parametros: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Reescribe una sección de un artículo guardado y crea una nueva versión.
+        
+        Solo se genera la sección (y, si se pide, se edita su estilo): una o dos llamadas
+        cortas en lugar de repetir la investigación, el outline, la redacción y la edición.
+        
+        Args:
+            article_id: ID del artículo (metadata.articulo_id de la generación)
+            index: Posición de la sección (0: título e introducción)
+            instrucciones: Indicaciones del editor para la nueva versión
+            editar_estilo: Pasar la sección reescrita por el editor de estilo
+            parametros: Parámetros avanzados de generación
+        
+        Returns:
+            Artículo en su nueva versión
+        
+        Raises:
+            ValueError: Si el artículo o la sección no existen
+        """
+        tenant = tenant_var.get()
+        article = article_store.get(article_id, tenant)
+        if article is None:
+            raise ValueError(f"Artículo no encontrado: {article_id}")
+        sections = article["sections"]
+        if not 0 <= index < len(sections):
+            raise ValueError(f"Sección no válida: {index} (el artículo tiene {len(sections)})")
+        
+        if parametros is not None and not isinstance(parametros, dict):
+            parametros = parametros.model_dump(exclude_none=True)
+        agents = self._get_agents(parametros)
+        
+        start = time.perf_counter()
+        logger.info(f"Reescribiendo la sección {index} del artículo {article_id}")
+        content = agents["section_writer"].rewrite_section(
+            tema=article["tema"],
+            sections=sections,
+            index=index,
+            estilos=article["estilos"],
+            research=article["research"],
+            plan=self._section_plan(article["outline"], sections[index]),
+            instrucciones=instrucciones
         )
+        if editar_estilo:
+            content = agents["style_editor"].edit_content(content=content, estilos=article["estilos"])
         
-        # Generar contenido inicial
-        logger.info(f"Generando contenido para tema: {tema}")
-        draft_content = self.content_writer.write_content(
+        version = article_store.update_section(article_id, tenant, index, content, instrucciones)
+        return {**article_store.get(article_id, tenant, version), "seccion": index, "editado": editar_estilo,
+                "tiempo": round(time.perf_counter() - start, 3)}
+    
+    @staticmethod
+    def _section_plan(outline: Optional[Dict[str, Any]], section: str) -> Optional[Dict[str, Any]]:
+        """Busca la entrada del outline que corresponde a una sección por su encabezado."""
+        heading = TextProcessor.extract_sections(section)["sections"]
+        if not outline or not heading:
+            return None
+        title = next(iter(heading))
+        for planned in outline.get("sections") or []:
+            if planned.get("heading", "").strip().lower() == title:
+                return planned
+        return None
+    
+    def _reuse_similar(self, tema: str, prompt_personalizado: Optional[str], longitud: str,
+                       estilos: List[str], **_) -> Dict[str, Any]:
+        """Parte del trabajo de una petición reciente casi idéntica, si la hay."""
+        reused = {"investigacion_previa": "", "outline_previo": None, "reutilizado": None}
+        warm_start = self._find_similar_request(tema, prompt_personalizado)
+        if not warm_start:
+            return reused
+        
+        etapas = []
+        if warm_start["research"]:
+            reused["investigacion_previa"] = warm_start["research"]
+            etapas.append("investigacion")
+        if (warm_start["outline"] and warm_start["longitud"] == longitud
+                and set(warm_start["estilos"]) == set(estilos)):
+            reused["outline_previo"] = warm_start["outline"]
+            etapas.append("outline")
+        if etapas:
+            logger.info(f"Reutilizando {etapas} de la petición similar '{warm_start['tema']}' "
+                        f"(similitud {warm_start['similarity']}) para el tema: {tema}")
+            reused["reutilizado"] = {"tema": warm_start["tema"], "similitud": warm_start["similarity"], "etapas": etapas}
+        return reused
+    
+    def _research_urls(self, agents: Dict[str, Any], tema: str, urls: List[str],
+                       url_cache: Optional[SingleFlightCache], degradaciones: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Analiza las URLs de referencia, limitándolas a las más rápidas si el plazo no alcanza."""
+        logger.info(f"Procesando {len(urls)} URLs para el tema: {tema}")
+        max_urls = None
+        remaining = self._degradation_due("urls", settings.DEADLINE_RESEARCH_MIN_SECONDS)
+        if remaining is not None and len(urls) > settings.DEADLINE_MAX_URLS:
+            max_urls = settings.DEADLINE_MAX_URLS
+            degradaciones.append({
+                "etapa": "investigacion",
+                "accion": f"solo las {max_urls} URLs más rápidas de {len(urls)}",
+                "restante": round(remaining, 1)
+            })
+        return agents["web_researcher"].research_urls(tema, urls, url_cache=url_cache, max_urls=max_urls)
+    
+    @staticmethod
+    def _combine_research(prompt_personalizado: Optional[str], investigacion_previa: Optional[str],
+                          investigacion_local: List[Dict[str, str]], investigacion_urls: List[Dict[str, str]],
+                          investigacion_documentos: List[Dict[str, str]], sintesis: Optional[str]) -> Dict[str, Any]:
+        """Reúne la investigación disponible y la añade a las instrucciones de redacción."""
+        if investigacion_previa:
+            research = investigacion_previa
+        elif sintesis is not None:
+            research = sintesis
+        else:
+            # Fuente única en el nivel rápido (o ninguna investigación)
+            research = "".join(
+                result["content"] for result in investigacion_local + investigacion_urls + investigacion_documentos
+            )
+        
+        prompt = prompt_personalizado
+        if research:
+            # Añadir la investigación al prompt personalizado
+            additional_context = f"\n\nINFORMACIÓN DE REFERENCIA:\n{research}"
+            prompt = prompt + additional_context if prompt else additional_context
+        return {"investigacion": research, "prompt_redaccion": prompt}
+    
+    @staticmethod
+    def _write(agents: Dict[str, Any], calidad: str, variantes: int, tema: str, longitud: str,
+               estilos: List[str], urls: Optional[List[str]], prompt_redaccion: Optional[str],
+               outline_previo: Optional[Dict[str, Any]], outline_generado: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Redacta todas las variantes en una llamada (en el nivel rápido, directamente la versión final)."""
+        write_kwargs = dict(
             tema=tema,
-            outline=outline,
+            outline=outline_generado or outline_previo,
             longitud=longitud,
             estilos=estilos,
             urls=urls,
-            prompt_personalizado=prompt_personalizado
+            prompt_personalizado=prompt_redaccion
         )
+        if calidad == "fast":
+            logger.info(f"Generando {variantes} variante(s) en una sola pasada para tema: {tema}")
+            return {"contenidos": agents["fast_writer"].write_variants(variantes, **write_kwargs), "editar": False}
+        logger.info(f"Generando {variantes} variante(s) de contenido para tema: {tema}")
+        return {"contenidos": agents["content_writer"].write_variants(variantes, **write_kwargs), "editar": True}
+    
+    def _edit(self, agents: Dict[str, Any], tema: str, estilos: List[str], redaccion: Dict[str, Any],
+              degradaciones: List[Dict[str, Any]]) -> List[str]:
+        """Refina el contenido de cada variante en paralelo (o entrega el borrador si el plazo no alcanza)."""
+        drafts = redaccion["contenidos"]
+        remaining = self._degradation_due("edicion", settings.DEADLINE_EDIT_MIN_SECONDS)
+        if remaining is not None:
+            logger.warning(f"Edición de estilo omitida por el plazo ({remaining:.1f} s restantes) para tema: {tema}")
+            degradaciones.append({
+                "etapa": "edicion",
+                "accion": "edición de estilo omitida; se devuelve el borrador",
+                "restante": round(remaining, 1)
+            })
+            return drafts
         
-        # Refinar el contenido
         logger.info(f"Refinando el contenido para tema: {tema}")
-        final_content = self.style_editor.edit_content(
-            content=draft_content,
-            estilos=estilos
+        with ThreadPoolExecutor(max_workers=len(drafts)) as executor:
+            return list(executor.map(
+                bind_log_context(lambda draft: agents["style_editor"].edit_content(content=draft, estilos=estilos)),
+                drafts
+            ))
+    
+    @staticmethod
+    def _translate(agents: Dict[str, Any], tema: str, idiomas: List[str],
+                   ranking: List[Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+        """Publica el artículo final en cada idioma pedido.
+        
+        El artículo se traduce por secciones y todas las secciones de todos los idiomas
+        se traducen a la vez, de modo que el tiempo añadido es el de la sección más larga.
+        
+        Returns:
+            Contenido, título y resumen por código de idioma (el de origen, sin traducir)
+        """
+        best = ranking[0]
+        fragments = TextProcessor.split_sections(best["content"])
+        targets = [idioma for idioma in idiomas if idioma != SOURCE_LANGUAGE]
+        logger.info(f"Traduciendo {len(fragments)} fragmento(s) a {targets} para tema: {tema}")
+        
+        translator = agents["translator"]
+        jobs = [(idioma, fragment) for idioma in targets for fragment in fragments]
+        # Un artículo vacío no tiene fragmentos: el pool necesita al menos un worker
+        with ThreadPoolExecutor(max_workers=max(1, min(len(jobs), settings.TRANSLATION_MAX_WORKERS))) as executor:
+            translated = list(executor.map(
+                bind_log_context(lambda job: translator.translate(job[1], LANGUAGES[job[0]], best["title"])),
+                jobs
+            ))
+        
+        contents = {
+            idioma: "\n\n".join(text for (target, _), text in zip(jobs, translated) if target == idioma)
+            for idioma in targets
+        }
+        summaries = cpu_pool.map(
+            summarize_article, contents.values(), size=sum(len(content) for content in contents.values())
         )
         
-        # Extraer un resumen breve del artículo
-        summary = TextProcessor.extract_summary(final_content)
+        translations = {}
+        for idioma in idiomas:
+            if idioma == SOURCE_LANGUAGE:
+                translations[idioma] = {"content": best["content"], "title": best["title"], "summary": best["summary"]}
+                continue
+            summary = summaries[targets.index(idioma)]
+            translations[idioma] = {
+                "content": contents[idioma],
+                "title": summary["title"] or best["title"],
+                "summary": summary["summary"],
+            }
+        return translations
+    
+    @staticmethod
+    def _degradation_due(name: str, min_seconds: float) -> Optional[float]:
+        """Comprueba si una degradación configurada debe aplicarse por falta de tiempo.
         
-        return {
-            "content": final_content,
-            "title": outline["title"],
-            "summary": summary,
-            "sections": outline["sections"]
-        }
\ No newline at end of file
+        Args:
+            name: Degradación ('edicion', 'urls'; ver DEADLINE_DEGRADATIONS)
+            min_seconds: Tiempo restante por debajo del cual se aplica
+        
+        Returns:
+            Segundos restantes si se debe aplicar, None en otro caso
+        """
+        remaining = remaining_time()
+        if remaining is None or name not in settings.DEADLINE_DEGRADATIONS or remaining >= min_seconds:
+            return None
+        return remaining
+    
+    @staticmethod
+    def _save_artifacts(ejecucion_id: str, tema: str, estilos: List[str], investigacion: str,
+                        outline_previo: Optional[Dict[str, Any]], outline_generado: Optional[Dict[str, Any]],
+                        ranking: List[Dict[str, Any]]) -> bool:
+        """Guarda la investigación, el outline y el contenido final para derivar otros formatos.
+        
+        Returns:
+            True si se guardaron (y el ID de ejecución se puede usar después)
+        """
+        try:
+            run_store.save(
+                ejecucion_id, "blog", tema, estilos, investigacion, outline_generado or outline_previo,
+                ranking[0]["content"], ranking[0]["summary"], tenant=tenant_var.get()
+            )
+            return True
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudieron guardar los artefactos de la ejecución: {str(e)}")
+            return False
+    
+    @staticmethod
+    def _save_article(ejecucion_id: str, tema: str, longitud: str, estilos: List[str], investigacion: str,
+                      outline_previo: Optional[Dict[str, Any]], outline_generado: Optional[Dict[str, Any]],
+                      ranking: List[Dict[str, Any]]) -> bool:
+        """Guarda el artículo por secciones para poder regenerar después solo una de ellas.
+        
+        Returns:
+            True si se guardó (y el ID de artículo se puede usar después)
+        """
+        try:
+            article_store.create(
+                ejecucion_id, tema, longitud, estilos, investigacion, outline_generado or outline_previo,
+                ranking[0]["content"], tenant=tenant_var.get()
+            )
+            return True
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudo guardar el artículo: {str(e)}")
+            return False
+    
+    @staticmethod
+    def _find_similar_request(tema: str, prompt_personalizado: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Busca una petición reciente casi idéntica cuyo trabajo se pueda reutilizar."""
+        if not settings.SIMILAR_REQUESTS_REUSE:
+            return None
+        try:
+            return similar_requests.find(tenant_var.get(), tema, prompt_personalizado)
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudo consultar las peticiones similares: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _remember_request(tema: str, prompt_personalizado: Optional[str], longitud: str,
+                          estilos: List[str], research: str, outline: Dict[str, Any]) -> None:
+        """Guarda la investigación y el outline de la petición para reutilizarlos en otras similares."""
+        try:
+            similar_requests.add(tenant_var.get(), tema, prompt_personalizado, longitud, estilos, research, outline)
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudo guardar la petición para reutilizarla: {str(e)}")
+    
+    @staticmethod
+    def _get_document_research(documentos: List[str], tema: str,
+                               prompt_personalizado: Optional[str]) -> List[Dict[str, str]]:
+        """Obtiene los fragmentos de los documentos de referencia más relevantes para el tema.
+        
+        Args:
+            documentos: IDs de documentos subidos
+            tema: Tema del artículo
+            prompt_personalizado: Instrucciones adicionales
+        
+        Returns:
+            Resultados de investigación con la fuente (documento y página) y el texto
+        """
+        for document_id in documentos:
+            document = document_store.get_document(document_id)
+            if document is None:
+                raise ValueError(f"Documento no encontrado: {document_id}")
+            if document["status"] != "ready":
+                raise ValueError(f"El documento {document_id} no está disponible (estado: {document['status']})")
+        
+        query = f"{tema} {prompt_personalizado or ''}"
+        chunks = retrieval_index.search(
+            query,
+            limit=settings.DOCUMENT_CHUNKS_PER_REQUEST,
+            kinds=[KIND_DOCUMENT],
+            document_ids=documentos
+        )
+        logger.info(f"Usando {len(chunks)} fragmentos de {len(documentos)} documento(s) para el tema: {tema}")
+        return [
+            {"source": f"{chunk['source']} (pág. {chunk['page']})", "content": chunk["text"]}
+            for chunk in chunks
+        ]
+    
+    @staticmethod
+    def _rank_variants(contents: List[str], outline: Dict[str, Any], longitud: str) -> List[Dict[str, Any]]:
+        """Resume y ordena las variantes de mayor a menor puntuación.
+        
+        Args:
+            contents: Contenido final de cada variante
+            outline: Estructura del artículo
+            longitud: Longitud deseada ('short', 'medium', 'long')
+        
+        Returns:
+            Lista de variantes con contenido, título, resumen, puntuación y posición
+        """
+        headings = [section["heading"] for section in outline["sections"]]
+        target_words = TARGET_WORDS.get(longitud, TARGET_WORDS["medium"])
+        
+        # Las variantes se analizan en paralelo en el pool de procesos si son largas
+        analyses = cpu_pool.map(
+            summarize_article, contents, [headings] * len(contents), [target_words] * len(contents),
+            size=sum(len(content) for content in contents)
+        )
+        variants = [
+            {
+                "content": content,
+                "title": analysis["title"] or outline["title"],
+                "summary": analysis["summary"],
+                "score": analysis["score"]
+            }
+            for content, analysis in zip(contents, analyses)
+        ]
+        
+        variants.sort(key=lambda variant: variant["score"], reverse=True)
+        for rank, variant in enumerate(variants, start=1):
+            variant["rank"] = rank
+        return variants
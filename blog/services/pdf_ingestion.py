@@ -0,0 +1,245 @@
+from typing import AsyncIterator, Dict, Mapping, Optional, Set, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import logging
+import multiprocessing
+import os
+import tempfile
+from multipart.multipart import MultipartParser, parse_options_header
+from common.services.document_store import DocumentStore
+from common.services.retrieval_index import RetrievalIndex
+from common.utils.pdf_processor import chunk_pages, extract_pages
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Cabecera con la que empiezan todos los PDF
+PDF_MAGIC = b"%PDF-"
+
+# Margen sobre el tamaño máximo del PDF para las cabeceras y separadores del formulario
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """La subida supera el tamaño máximo admitido."""
+
+
+class _PdfUpload:
+    """Escribe el campo de fichero de un formulario multipart directamente en disco.
+    
+    Recibe el cuerpo de la petición por bloques y guarda el contenido del campo
+    indicado en un fichero temporal, comprobando la cabecera PDF y el tamaño máximo
+    a medida que llegan los datos.
+    """
+    
+    def __init__(self, boundary: bytes, field: str, max_bytes: int):
+        self.field = field.encode("utf-8")
+        self.max_bytes = max_bytes
+        self.filename: Optional[str] = None
+        self.path: Optional[str] = None
+        self.size = 0
+        self._head = b""
+        self._file = None
+        self._in_field = False
+        self._header_name = b""
+        self._header_value = b""
+        self._headers: Dict[bytes, bytes] = {}
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": lambda data, start, end: self._append_header("_header_name", data[start:end]),
+            "on_header_value": lambda data, start, end: self._append_header("_header_value", data[start:end]),
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+    
+    def write(self, chunk: bytes) -> None:
+        self._parser.write(chunk)
+    
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def discard(self) -> None:
+        self.close()
+        if self.path is not None:
+            os.unlink(self.path)
+            self.path = None
+    
+    def _append_header(self, attribute: str, data: bytes) -> None:
+        setattr(self, attribute, getattr(self, attribute) + data)
+    
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+    
+    def _on_header_end(self) -> None:
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name, self._header_value = b"", b""
+    
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._in_field = options.get(b"name") == self.field and self.path is None
+        if self._in_field:
+            self.filename = options.get(b"filename", b"").decode("utf-8", "replace") or None
+            self._file = tempfile.NamedTemporaryFile(prefix="upload-", suffix=".pdf", delete=False)
+            self.path = self._file.name
+    
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self._in_field:
+            return
+        chunk = data[start:end]
+        if len(self._head) < len(PDF_MAGIC):
+            self._head += chunk[:len(PDF_MAGIC) - len(self._head)]
+            if not PDF_MAGIC.startswith(self._head):
+                raise ValueError("El archivo no es un PDF válido")
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadTooLarge(f"El archivo supera el tamaño máximo de {self.max_bytes // (1024 * 1024)} MB")
+        self._file.write(chunk)
+    
+    def _on_part_end(self) -> None:
+        if self._in_field:
+            self._in_field = False
+            self.close()
+    
+    def check(self) -> None:
+        """Comprueba que el formulario traía un PDF completo en el campo esperado."""
+        if self.path is None:
+            raise ValueError(f"Falta el campo '{self.field.decode('utf-8')}' con el archivo PDF")
+        if self.size == 0:
+            raise ValueError("El archivo está vacío")
+        if self._head != PDF_MAGIC:
+            raise ValueError("El archivo no es un PDF válido")
+
+
+def _extract_to_index(path: str, document_id: str, filename: str, index_path: str,
+                      chunk_chars: int, overlap: int) -> Tuple[int, int]:
+    """Extrae un PDF e indexa sus fragmentos (se ejecuta en un proceso del pool).
+    
+    Returns:
+        Tupla (páginas procesadas, fragmentos guardados)
+    """
+    index = RetrievalIndex(index_path)
+    pages = [0]
+    
+    def counted_pages():
+        for page_number, text in extract_pages(path):
+            pages[0] = page_number
+            yield page_number, text
+    
+    chunks = index.add_document_chunks(document_id, filename, chunk_pages(counted_pages(), chunk_chars, overlap))
+    return pages[0], chunks
+
+
+class PdfIngestionService:
+    """Ingesta de PDFs de referencia sin bloquear el bucle de eventos.
+    
+    El cuerpo de la petición se escribe una sola vez, a medida que llega, en un
+    fichero temporal en disco; las subidas que declaran un tamaño excesivo se
+    rechazan antes de leerlas y las demás en cuanto lo superan. La extracción de
+    texto se hace página a página en un pool de procesos que escribe los fragmentos
+    directamente en el índice de recuperación. La memoria se mantiene constante
+    independientemente del tamaño del PDF.
+    """
+    
+    def __init__(self, store: DocumentStore, index: RetrievalIndex, workers: int = 2,
+                 max_bytes: int = 200 * 1024 * 1024):
+        """Inicializa el servicio.
+        
+        Args:
+            store: Almacén de documentos
+            index: Índice de recuperación donde se guardan los fragmentos
+            workers: Procesos dedicados a la extracción
+            max_bytes: Tamaño máximo admitido por fichero
+        """
+        self.store = store
+        self.index = index
+        self.workers = workers
+        self.max_bytes = max_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks: Set[asyncio.Task] = set()
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # 'spawn' evita heredar hilos y conexiones del proceso del servidor
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+    
+    async def ingest(self, headers: Mapping[str, str], body: AsyncIterator[bytes],
+                     field: str = "file") -> Tuple[str, Optional[str]]:
+        """Guarda en disco el PDF de un formulario multipart y lanza la extracción en segundo plano.
+        
+        Args:
+            headers: Cabeceras de la petición (Content-Type y, si la hay, Content-Length)
+            body: Cuerpo de la petición, por bloques
+            field: Campo del formulario con el fichero
+        
+        Returns:
+            Tupla (ID del documento, consultable mientras se procesa; nombre original del fichero)
+        
+        Raises:
+            UploadTooLarge: Si la subida supera el tamaño máximo
+            ValueError: Si el formulario no contiene un PDF válido
+        """
+        content_length = headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes + MULTIPART_OVERHEAD_BYTES:
+            raise UploadTooLarge(f"El archivo supera el tamaño máximo de {self.max_bytes // (1024 * 1024)} MB")
+        content_type, options = parse_options_header(headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or not options.get(b"boundary"):
+            raise ValueError("Se esperaba un formulario multipart/form-data con el archivo PDF")
+        
+        upload = _PdfUpload(options[b"boundary"], field, self.max_bytes)
+        try:
+            async for chunk in body:
+                if chunk:
+                    await asyncio.to_thread(upload.write, chunk)
+            upload.check()
+        except BaseException:
+            upload.discard()
+            raise
+        
+        document_id = await asyncio.to_thread(self.store.create_document, upload.filename)
+        task = asyncio.create_task(self._process(upload.path, document_id, upload.filename or document_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return document_id, upload.filename
+    
+    def recover(self, max_age: float) -> int:
+        """Marca como fallidos los documentos que un proceso anterior dejó a medias.
+        
+        Args:
+            max_age: Segundos en estado 'processing' a partir de los que se da por perdido
+        
+        Returns:
+            Número de documentos recuperados
+        """
+        stale = self.store.fail_stale(max_age, "Procesamiento interrumpido")
+        for document_id in stale:
+            self.index.remove_document(document_id)
+        if stale:
+            logger.warning(f"{len(stale)} documento(s) interrumpidos marcados como fallidos")
+        return len(stale)
+    
+    async def _process(self, path: str, document_id: str, filename: str) -> None:
+        """Extrae el documento en el pool de procesos y actualiza su estado."""
+        loop = asyncio.get_running_loop()
+        try:
+            pages, chunks = await loop.run_in_executor(
+                self._get_executor(),
+                _extract_to_index,
+                path, document_id, filename, self.index.db_path,
+                settings.PDF_CHUNK_CHARS, settings.PDF_CHUNK_OVERLAP
+            )
+            await asyncio.to_thread(self.store.mark_ready, document_id, pages, chunks)
+            logger.info(f"Documento {document_id} procesado: {pages} páginas, {chunks} fragmentos")
+        except Exception as e:
+            logger.error(f"Error al extraer el documento {document_id}: {str(e)}")
+            await asyncio.to_thread(self.index.remove_document, document_id)
+            await asyncio.to_thread(self.store.mark_failed, document_id, str(e))
+        finally:
+            os.unlink(path)
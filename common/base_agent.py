@@ -1,35 +1,101 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple, TypeVar
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.messages import SystemMessage, HumanMessage
-import os
+import logging
+import threading
 
 # Corregir el import para usar el formato con guion
 from langchain_openai import ChatOpenAI
 
+from common.models.config import ModelConfiguration
+from common.services.batch_api import BatchRequestFailed, batch_queue_var
+from common.services.model_router import model_router
+from core.deadline import deadline_var, remaining_time, until_deadline
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Tipos de mensaje de langchain y su rol en la API de chat
+MESSAGE_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
 class BaseAgent(ABC):
     """Clase base abstracta para todos los agentes de generación de contenido."""
     
-    def __init__(self, model_name: str = "gpt-4o", temperature: float = 0.7, **kwargs):
+    # Etapa del pipeline usada para enrutar el modelo (ver ModelRouter)
+    stage: str = "default"
+    
+    # Formato de respuesta solicitado al proveedor (ej: {"type": "json_object"})
+    response_format: Optional[Dict[str, str]] = None
+    
+    def __init__(self, model_name: Optional[str] = None, temperature: float = 0.7,
+                 model_config: Optional[ModelConfiguration] = None, **kwargs):
         """Inicializa el agente base con un modelo de lenguaje y parámetros.
         
         Args:
-            model_name: Nombre del modelo LLM a utilizar
+            model_name: Nombre del modelo LLM a utilizar (por defecto, el de la política de la etapa)
             temperature: Parámetro de creatividad para el LLM (0.0-1.0)
+            model_config: Configuración completa del modelo (proveedor, base_url, api_key)
             **kwargs: Parámetros adicionales para el modelo
         """
-        self.llm = ChatOpenAI(
-            model=model_name, 
-            temperature=temperature,
-            top_p=kwargs.get('top_p', 1.0),
-            max_tokens=kwargs.get('max_tokens'),
-            presence_penalty=kwargs.get('presence_penalty', 0.0),
-            frequency_penalty=kwargs.get('frequency_penalty', 0.0),
-            stop=kwargs.get('stop'),
-            seed=kwargs.get('seed')
-        )
+        if model_config is None and model_name:
+            model_config = ModelConfiguration(model_id=model_name)
+        self.pinned_model = model_config
+        self.llm_params = {
+            "temperature": temperature,
+            "top_p": kwargs.get('top_p', 1.0),
+            "max_tokens": kwargs.get('max_tokens'),
+            "presence_penalty": kwargs.get('presence_penalty', 0.0),
+            "frequency_penalty": kwargs.get('frequency_penalty', 0.0),
+            "stop": kwargs.get('stop'),
+            "seed": kwargs.get('seed'),
+        }
         self.output_parser = StrOutputParser()
+        self._llms: Dict[Tuple[str, Optional[str], Optional[str]], ChatOpenAI] = {}
+        self._llms_lock = threading.Lock()
+    
+    def get_llm(self, model_config: ModelConfiguration) -> ChatOpenAI:
+        """Obtiene (y reutiliza) el cliente LLM para una configuración de modelo.
+        
+        Args:
+            model_config: Modelo y endpoint a utilizar
+            
+        Returns:
+            Instancia de ChatOpenAI configurada
+        """
+        key = (model_config.model_id, model_config.base_url, model_config.api_key)
+        with self._llms_lock:
+            if key not in self._llms:
+                extra = {}
+                if model_config.api_key:
+                    extra["api_key"] = model_config.api_key
+                if model_config.base_url:
+                    extra["base_url"] = model_config.base_url
+                self._llms[key] = ChatOpenAI(
+                    model=model_config.model_id,
+                    model_kwargs={"response_format": self.response_format} if self.response_format else {},
+                    **self.llm_params,
+                    **extra
+                )
+            return self._llms[key]
+    
+    def warm_up(self) -> None:
+        """Crea el cliente del modelo principal de la etapa y abre su conexión por adelantado."""
+        model_config = model_router.candidates(self.stage, self.pinned_model)[0]
+        self.get_llm(model_config).root_client.with_options(max_retries=0, timeout=10).models.list()
+    
+    def run_with_fallback(self, call: Callable[[ModelConfiguration], T]) -> T:
+        """Ejecuta una llamada con el modelo de la etapa, recurriendo a alternativas si falla.
+        
+        Args:
+            call: Función que realiza la llamada con la configuración de modelo recibida
+            
+        Returns:
+            Resultado de la llamada
+        """
+        return model_router.execute(self.stage, call, pinned=self.pinned_model)
     
     @abstractmethod
     def _get_prompt_data(self) -> Dict[str, str]:
@@ -49,21 +115,138 @@ class BaseAgent(ABC):
         Returns:
             Diccionario con el contenido generado
         """
+        prompt = self._build_prompt(**kwargs)
+        
+        # En modo diferido la llamada se envía en el siguiente lote del proveedor
+        deferred = self._generate_deferred(prompt.format_messages())
+        
+        # Ejecutar la cadena con el modelo enrutado para la etapa. Si la petición tiene
+        # plazo, la respuesta se recibe en streaming para poder cortarla al cancelarse
+        if deferred is not None:
+            response = deferred[0]
+        elif deadline_var.get() is not None:
+            response = self.run_with_fallback(
+                lambda model_config: "".join(self.stream_content(model_config, **kwargs))
+            )
+        else:
+            response = self.run_with_fallback(
+                lambda model_config: (prompt | self.get_llm(model_config) | self.output_parser).invoke({})
+            )
+        
+        # Formatear y devolver la respuesta
+        return self._format_response(response)
+    
+    def generate_variants(self, n: int, **kwargs) -> List[Dict[str, Any]]:
+        """Genera varias respuestas alternativas para el mismo prompt.
+        
+        Con proveedores que admiten el parámetro ``n`` de la API de chat se realiza una
+        única llamada, de modo que el prompt de entrada se procesa una sola vez para
+        todas las variantes. En otro caso se hacen llamadas independientes.
+        
+        Args:
+            n: Número de variantes
+            **kwargs: Parámetros específicos del agente
+            
+        Returns:
+            Lista con el contenido formateado de cada variante
+        """
+        if n <= 1:
+            return [self.generate_content(**kwargs)]
+        
+        messages = self._build_prompt(**kwargs).format_messages()
+        
+        deferred = self._generate_deferred(messages, n)
+        if deferred is not None:
+            return [self._format_response(text) for text in deferred]
+        
+        def call(model_config: ModelConfiguration) -> List[str]:
+            llm = self.get_llm(model_config)
+            texts: List[str] = []
+            if model_config.provider == "openai":
+                result = llm.generate([messages], n=n, **self._call_options())
+                texts = [generation.text for generation in result.generations[0]]
+            # Completar con llamadas independientes si el proveedor no devolvió todas
+            while len(texts) < n:
+                texts.append(self.output_parser.invoke(llm.invoke(messages, **self._call_options())))
+            return texts[:n]
+        
+        return [self._format_response(text) for text in self.run_with_fallback(call)]
+    
+    def _generate_deferred(self, messages: List[Any], n: int = 1) -> Optional[List[str]]:
+        """Envía la llamada a la cola de lotes de la ejecución, si está en modo diferido.
+        
+        Se usa el modelo principal de la etapa. Si el lote no devuelve respuesta, la
+        llamada se repite de forma síncrona (con las alternativas del enrutador).
+        
+        Args:
+            messages: Mensajes del prompt
+            n: Número de alternativas
+            
+        Returns:
+            Texto de cada alternativa, o None si la llamada debe hacerse de forma síncrona
+        """
+        queue = batch_queue_var.get()
+        if queue is None:
+            return None
+        model_config = model_router.candidates(self.stage, self.pinned_model)[0]
+        if model_config.provider != "openai":
+            return None
+        
+        body = {
+            "model": model_config.model_id,
+            "messages": [{"role": MESSAGE_ROLES[message.type], "content": message.content} for message in messages],
+            **{key: value for key, value in self.llm_params.items() if value is not None},
+        }
+        if n > 1:
+            body["n"] = n
+        if self.response_format:
+            body["response_format"] = self.response_format
+        try:
+            texts = queue.complete(model_config, body)
+        except BatchRequestFailed as e:
+            logger.warning(f"Llamada de la etapa {self.stage} sin respuesta en el lote ({str(e)}): se repite en síncrono")
+            return None
+        if len(texts) < n:
+            return None
+        return texts[:n]
+    
+    def stream_content(self, model_config: ModelConfiguration, **kwargs) -> Iterator[str]:
+        """Genera contenido en streaming, fragmento a fragmento.
+        
+        Args:
+            model_config: Modelo con el que realizar la llamada
+            **kwargs: Parámetros específicos del agente
+            
+        Returns:
+            Iterador con los fragmentos de texto a medida que llegan del LLM (se corta
+            si el plazo de la petición caduca o se cancela)
+        """
+        llm = self.get_llm(model_config).bind(**self._call_options())
+        chain = self._build_prompt(**kwargs) | llm | self.output_parser
+        return until_deadline(chain.stream({}))
+    
+    @staticmethod
+    def _call_options() -> Dict[str, Any]:
+        """Opciones por llamada: el tiempo de espera no supera el plazo restante de la petición."""
+        remaining = remaining_time()
+        return {"timeout": max(remaining, 1.0)} if remaining is not None else {}
+    
+    def _build_prompt(self, **kwargs) -> ChatPromptTemplate:
+        """Construye el prompt del agente con los parámetros proporcionados.
+        
+        Args:
+            **kwargs: Parámetros específicos del agente
+            
+        Returns:
+            Prompt listo para encadenar con el LLM
+        """
         # Obtener datos de prompt específicos del agente
         prompt_data = self._get_prompt_data()
         
-        # Crear el prompt
-        prompt = ChatPromptTemplate.from_messages([
+        return ChatPromptTemplate.from_messages([
             SystemMessage(content=prompt_data["system_message"]),
             HumanMessage(content=prompt_data["human_template"].format(**kwargs))
         ])
-        
-        # Ejecutar la cadena
-        chain = prompt | self.llm | self.output_parser
-        response = chain.invoke({})
-        
-        # Formatear y devolver la respuesta
-        return self._format_response(response)
     
     @abstractmethod
     def _format_response(self, raw_content: str) -> Dict[str, Any]:
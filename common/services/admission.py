@@ -0,0 +1,221 @@
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+import asyncio
+import logging
+import math
+import time
+from core.config import settings
+from core.deadline import check_deadline, remaining_time
+from core.tenancy import tenant_var
+
+logger = logging.getLogger(__name__)
+
+# Carriles de prioridad, de mayor a menor
+LANES = ("interactive", "batch")
+
+
+class AdmissionRejected(Exception):
+    """Petición rechazada por el control de admisión."""
+    
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Control de admisión delante del orquestador.
+    
+    Limita las generaciones en curso; las que no caben esperan en una cola acotada
+    por carril de prioridad, y los carriles interactivos adelantan a los de lote.
+    Dentro de cada carril, el siguiente hueco es para el tenant con menos
+    generaciones en curso, de modo que un lote grande de un tenant no retrasa
+    las peticiones de los demás.
+    Cuando la cola está llena, o la espera estimada a partir del rendimiento
+    observado supera el máximo, la petición se rechaza al momento (429) en lugar
+    de aceptarla y dejar que todas se ralenticen juntas; si agota la espera sin
+    conseguir hueco, se rechaza con 503. Ambos rechazos incluyen ``retry_after``.
+    
+    Se usa desde el bucle de eventos (no es seguro entre hilos).
+    """
+    
+    def __init__(self, max_in_flight: int = 8, max_queue: int = 32, max_wait_seconds: float = 30.0,
+                 interactive_reserved: int = 1, initial_service_seconds: float = 60.0):
+        """Inicializa el controlador.
+        
+        Args:
+            max_in_flight: Generaciones simultáneas como máximo
+            max_queue: Peticiones interactivas en espera como máximo
+            max_wait_seconds: Espera máxima de una petición interactiva
+            interactive_reserved: Huecos que los lotes no pueden ocupar, para que las
+                peticiones interactivas no esperen a que termine un lote
+            initial_service_seconds: Duración estimada de una generación hasta tener medidas
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.interactive_reserved = interactive_reserved
+        self.service_seconds = initial_service_seconds
+        self._in_flight = 0
+        self._tenant_in_flight: Dict[str, int] = {}
+        self._waiters: Dict[str, Deque[Tuple[asyncio.Future, str]]] = {lane: deque() for lane in LANES}
+        self._counters: Dict[str, int] = {"admitted": 0, "rejected_queue": 0, "rejected_timeout": 0}
+        self._wait_ewma = 0.0
+    
+    def _capacity(self, lane: str) -> int:
+        if lane == "interactive":
+            return self.max_in_flight
+        return max(1, self.max_in_flight - self.interactive_reserved)
+    
+    def _can_start(self, lane: str) -> bool:
+        if self._in_flight >= self._capacity(lane):
+            return False
+        # Un carril solo arranca si no hay nadie esperando en uno de mayor prioridad
+        for other in LANES[:LANES.index(lane)]:
+            if self._waiters[other]:
+                return False
+        return True
+    
+    def estimated_wait(self, position: int) -> float:
+        """Espera estimada (segundos) para la petición en la posición ``position`` de la cola."""
+        throughput = self.max_in_flight / max(self.service_seconds, 0.001)
+        return position / throughput
+    
+    def _retry_after(self, position: int) -> int:
+        return max(1, math.ceil(self.estimated_wait(position)))
+    
+    def _start(self, tenant: str) -> None:
+        self._in_flight += 1
+        self._tenant_in_flight[tenant] = self._tenant_in_flight.get(tenant, 0) + 1
+    
+    async def acquire(self, lane: str = "interactive", tenant: Optional[str] = None) -> None:
+        """Espera un hueco para una generación.
+        
+        Args:
+            lane: Carril de prioridad ('interactive' o 'batch'). Los lotes esperan sin
+                límite: su concurrencia ya está acotada por el generador de lotes, que es el
+                único que debe usar ese carril (nunca a petición del cliente)
+            tenant: Tenant de la petición (por defecto, el de la petición en curso)
+        
+        Raises:
+            AdmissionRejected: Si la petición interactiva no puede atenderse a tiempo
+            DeadlineExceeded: Si el plazo de la petición se agota antes de conseguir hueco
+        """
+        if lane not in LANES:
+            raise ValueError(f"Carril de prioridad no válido: {lane}. Opciones: {', '.join(LANES)}")
+        tenant = tenant or tenant_var.get()
+        
+        if not self._waiters[lane] and self._can_start(lane):
+            self._start(tenant)
+            self._counters["admitted"] += 1
+            self._record_wait(0.0)
+            return
+        
+        timeout = None
+        if lane == "interactive":
+            # La espera no puede superar el plazo de la petición
+            remaining = remaining_time()
+            max_wait = self.max_wait_seconds if remaining is None else min(self.max_wait_seconds, remaining)
+            position = len(self._waiters[lane]) + 1
+            if position > self.max_queue or self.estimated_wait(position) > max_wait:
+                self._counters["rejected_queue"] += 1
+                logger.warning(f"Petición rechazada: {position - 1} en cola, {self._in_flight} en curso")
+                raise AdmissionRejected(
+                    429, "Demasiadas peticiones en curso. Inténtalo de nuevo más tarde.",
+                    self._retry_after(position)
+                )
+            timeout = max_wait
+        
+        future = asyncio.get_running_loop().create_future()
+        waiter = (future, tenant)
+        self._waiters[lane].append(waiter)
+        queued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._counters["rejected_timeout"] += 1
+            check_deadline()
+            logger.warning(f"Petición rechazada tras esperar {timeout:.1f} s sin hueco")
+            raise AdmissionRejected(
+                503, "El servicio está saturado. Inténtalo de nuevo más tarde.",
+                self._retry_after(len(self._waiters[lane]) + 1)
+            )
+        except asyncio.CancelledError:
+            # Si el hueco se concedió justo antes de cancelar, devolverlo
+            if future.done() and not future.cancelled():
+                self.release(tenant=tenant)
+            raise
+        finally:
+            if waiter in self._waiters[lane]:
+                self._waiters[lane].remove(waiter)
+        self._counters["admitted"] += 1
+        self._record_wait(time.monotonic() - queued_at)
+    
+    def release(self, service_seconds: Optional[float] = None, tenant: Optional[str] = None) -> None:
+        """Libera un hueco y da paso a la siguiente petición en espera.
+        
+        Args:
+            service_seconds: Duración de la generación, para estimar el rendimiento
+            tenant: Tenant que ocupaba el hueco (por defecto, el de la petición en curso)
+        """
+        tenant = tenant or tenant_var.get()
+        self._in_flight -= 1
+        remaining = self._tenant_in_flight.get(tenant, 0) - 1
+        if remaining > 0:
+            self._tenant_in_flight[tenant] = remaining
+        else:
+            self._tenant_in_flight.pop(tenant, None)
+        if service_seconds is not None:
+            self.service_seconds = 0.8 * self.service_seconds + 0.2 * service_seconds
+        self._dispatch()
+    
+    def _dispatch(self) -> None:
+        for lane in LANES:
+            waiters = self._waiters[lane]
+            for waiter in [waiter for waiter in waiters if waiter[0].done()]:
+                # Esperas canceladas o agotadas
+                waiters.remove(waiter)
+            while waiters and self._can_start(lane):
+                # El tenant con menos generaciones en curso primero; a igualdad, el más antiguo
+                waiter = min(waiters, key=lambda item: self._tenant_in_flight.get(item[1], 0))
+                waiters.remove(waiter)
+                self._start(waiter[1])
+                waiter[0].set_result(None)
+    
+    def _record_wait(self, seconds: float) -> None:
+        self._wait_ewma = 0.9 * self._wait_ewma + 0.1 * seconds
+    
+    @asynccontextmanager
+    async def slot(self, lane: str = "interactive", tenant: Optional[str] = None) -> AsyncIterator[None]:
+        """Ocupa un hueco durante el bloque (ver ``acquire``)."""
+        tenant = tenant or tenant_var.get()
+        await self.acquire(lane, tenant)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start, tenant)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado actual del control de admisión."""
+        return {
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queued": {lane: len(waiters) for lane, waiters in self._waiters.items()},
+            "in_flight_by_tenant": dict(self._tenant_in_flight),
+            "service_seconds": round(self.service_seconds, 3),
+            "avg_wait_seconds": round(self._wait_ewma, 3),
+            **self._counters,
+        }
+
+
+# Instancia compartida del controlador
+admission_controller = AdmissionController(
+    max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    max_wait_seconds=settings.ADMISSION_MAX_WAIT_SECONDS,
+    interactive_reserved=settings.ADMISSION_INTERACTIVE_RESERVED,
+    initial_service_seconds=settings.ADMISSION_INITIAL_SERVICE_SECONDS
+)
@@ -0,0 +1,196 @@
+from typing import Any, Dict, List, Optional
+import json
+import os
+import sqlite3
+import time
+import zlib
+from common.services.sqlite_store import SQLiteStore
+from common.utils.text_processor import TextProcessor
+from core.config import settings
+
+
+class ArticleStore(SQLiteStore):
+    """Artículos generados, divididos en secciones, con su historial de versiones.
+    
+    Cada artículo guarda su versión actual completa. Las versiones anteriores no se
+    copian enteras: cada cambio guarda solo el texto previo de la sección modificada,
+    comprimido, y una versión anterior se reconstruye deshaciendo los cambios desde la
+    actual. Cada artículo guarda el tenant que lo generó y solo ese tenant puede leerlo
+    o modificarlo.
+    """
+    
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS articles (
+                id TEXT PRIMARY KEY,
+                tenant TEXT NOT NULL DEFAULT '',
+                tema TEXT NOT NULL,
+                longitud TEXT NOT NULL,
+                estilos TEXT NOT NULL,
+                research TEXT,
+                outline TEXT,
+                sections TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS article_changes (
+                article_id TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                section_index INTEGER NOT NULL,
+                previous BLOB NOT NULL,
+                instructions TEXT,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (article_id, version)
+            )
+        """)
+        # Almacenes creados antes de guardar el tenant: sus artículos quedan sin tenant
+        # y ya no se devuelven
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(articles)")}
+        if "tenant" not in columns:
+            conn.execute("ALTER TABLE articles ADD COLUMN tenant TEXT NOT NULL DEFAULT ''")
+    
+    def create(self, article_id: str, tema: str, longitud: str, estilos: List[str], research: Optional[str],
+               outline: Optional[Dict[str, Any]], content: str, tenant: str = "") -> None:
+        """Guarda un artículo recién generado como versión 1.
+        
+        Args:
+            article_id: ID del artículo
+            tema: Tema
+            longitud: Longitud pedida
+            estilos: Estilos utilizados
+            research: Investigación utilizada en la redacción
+            outline: Estructura del artículo
+            content: Contenido final en markdown
+            tenant: Tenant de la petición que lo generó
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO articles (id, tenant, tema, longitud, estilos, research, outline, sections, version, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?)",
+                (
+                    article_id, tenant, tema, longitud, json.dumps(estilos), research,
+                    json.dumps(outline, ensure_ascii=False) if outline else None,
+                    json.dumps(TextProcessor.split_sections(content), ensure_ascii=False), now, now
+                )
+            )
+    
+    def exists(self, article_id: str, tenant: str) -> bool:
+        """Indica si existe un artículo del tenant (sin leer ni reconstruir su contenido)."""
+        row = self._connect().execute(
+            "SELECT 1 FROM articles WHERE id = ? AND tenant = ?", (article_id, tenant)
+        ).fetchone()
+        return row is not None
+    
+    def get(self, article_id: str, tenant: str, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Obtiene un artículo en su versión actual o en una anterior.
+        
+        Args:
+            article_id: ID del artículo
+            tenant: Tenant que hace la petición
+            version: Versión a reconstruir (por defecto, la actual)
+        
+        Returns:
+            Artículo con sus secciones y contenido, o None si no existe o es de otro tenant
+        
+        Raises:
+            ValueError: Si la versión no existe
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT * FROM articles WHERE id = ? AND tenant = ?", (article_id, tenant)).fetchone()
+        if row is None:
+            return None
+        sections = json.loads(row["sections"])
+        current = row["version"]
+        if version is not None and version != current:
+            if not 1 <= version < current:
+                raise ValueError(f"Versión no válida: {version} (el artículo va por la {current})")
+            changes = conn.execute(
+                "SELECT section_index, previous FROM article_changes WHERE article_id = ? AND version >= ? "
+                "ORDER BY version DESC",
+                (article_id, version)
+            ).fetchall()
+            for change in changes:
+                sections[change["section_index"]] = zlib.decompress(change["previous"]).decode("utf-8")
+        return {
+            "id": row["id"],
+            "tema": row["tema"],
+            "longitud": row["longitud"],
+            "estilos": json.loads(row["estilos"]),
+            "research": row["research"] or "",
+            "outline": json.loads(row["outline"]) if row["outline"] else None,
+            "sections": sections,
+            "content": "".join(sections),
+            "version": version or current,
+            "latest_version": current,
+        }
+    
+    def history(self, article_id: str, tenant: str) -> List[Dict[str, Any]]:
+        """Lista los cambios de un artículo del tenant (la sección modificada en cada versión)."""
+        rows = self._connect().execute(
+            "SELECT c.version, c.section_index, c.instructions, c.created_at, length(c.previous) AS stored_bytes "
+            "FROM article_changes c JOIN articles a ON a.id = c.article_id "
+            "WHERE c.article_id = ? AND a.tenant = ? ORDER BY c.version",
+            (article_id, tenant)
+        ).fetchall()
+        return [
+            {
+                "version": row["version"] + 1,
+                "section": row["section_index"],
+                "instructions": row["instructions"],
+                "created_at": row["created_at"],
+                "stored_bytes": row["stored_bytes"],
+            }
+            for row in rows
+        ]
+    
+    def update_section(self, article_id: str, tenant: str, index: int, content: str,
+                       instructions: Optional[str] = None) -> int:
+        """Sustituye una sección y crea una nueva versión del artículo.
+        
+        Args:
+            article_id: ID del artículo
+            tenant: Tenant que hace la petición
+            index: Posición de la sección (0: título e introducción)
+            content: Nuevo texto de la sección en markdown
+            instructions: Indicaciones con las que se regeneró, para el historial
+        
+        Returns:
+            Número de la nueva versión
+        
+        Raises:
+            ValueError: Si el artículo (del tenant) o la sección no existen
+        """
+        conn = self._connect()
+        with conn:
+            # Bloqueo de escritura desde la lectura para no perder cambios simultáneos
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT sections, version FROM articles WHERE id = ? AND tenant = ?", (article_id, tenant)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Artículo no encontrado: {article_id}")
+            sections = json.loads(row["sections"])
+            if not 0 <= index < len(sections):
+                raise ValueError(f"Sección no válida: {index} (el artículo tiene {len(sections)})")
+            
+            previous = sections[index]
+            sections[index] = content.rstrip("\n") + "\n\n" if index < len(sections) - 1 else content
+            now = time.time()
+            conn.execute(
+                "INSERT INTO article_changes (article_id, version, section_index, previous, instructions, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (article_id, row["version"], index, zlib.compress(previous.encode("utf-8")), instructions, now)
+            )
+            conn.execute(
+                "UPDATE articles SET sections = ?, version = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(sections, ensure_ascii=False), row["version"] + 1, now, article_id)
+            )
+            return row["version"] + 1
+
+
+# Instancia compartida del almacén
+article_store = ArticleStore(os.path.join(settings.DATA_DIR, "articles.db"))
@@ -0,0 +1,313 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from types import SimpleNamespace
+import contextvars
+import json
+import logging
+import threading
+import time
+import uuid
+from common.models.config import ModelConfiguration
+
+logger = logging.getLogger(__name__)
+
+# Cola diferida de las llamadas de la ejecución en curso (None: llamadas síncronas)
+batch_queue_var: contextvars.ContextVar[Optional["DeferredBatchQueue"]] = contextvars.ContextVar(
+    "batch_queue", default=None
+)
+
+# Endpoint del proveedor al que van dirigidas las líneas de cada lote
+CHAT_ENDPOINT = "/v1/chat/completions"
+
+# Estados finales de un lote en la API del proveedor
+TERMINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+# Margen sobre el plazo del lote para que el proveedor lo cierre (estado 'finalizing')
+FINALIZE_GRACE_SECONDS = 3600
+
+# Unidades de ``completion_window`` ('24h')
+WINDOW_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def window_seconds(completion_window: str) -> float:
+    """Segundos de un plazo de lote como '24h', '30m' o '90s'."""
+    value, unit = completion_window[:-1], completion_window[-1]
+    if unit not in WINDOW_UNITS:
+        return float(completion_window)
+    return float(value) * WINDOW_UNITS[unit]
+
+
+class BatchRequestFailed(Exception):
+    """Una llamada enviada en un lote no obtuvo respuesta."""
+
+
+class _PendingCall:
+    """Llamada en espera de su lote."""
+    
+    def __init__(self, model_config: ModelConfiguration, body: Dict[str, Any]):
+        self.custom_id = uuid.uuid4().hex
+        self.model_config = model_config
+        self.body = body
+        self.done = threading.Event()
+        self.texts: Optional[List[str]] = None
+        self.error: Optional[str] = None
+    
+    def resolve(self, texts: Optional[List[str]] = None, error: Optional[str] = None) -> None:
+        self.texts = texts
+        self.error = error
+        self.done.set()
+
+
+class DeferredBatchQueue:
+    """Ejecución diferida de las llamadas a los LLM mediante la API de lotes del proveedor.
+    
+    Los hilos de los artículos encolan sus llamadas y esperan. Cuando deja de llegar
+    trabajo durante ``collect_seconds`` (todos los artículos en curso esperan ya a su
+    llamada) o se alcanza ``max_requests``, las llamadas acumuladas se agrupan por
+    modelo y endpoint y se envía un lote por grupo: subida del JSONL, consulta
+    periódica del estado y descarga de los resultados. Cada respuesta desbloquea a su
+    artículo, que avanza a la siguiente etapa y encola la llamada siguiente, de modo
+    que cada ronda de lotes hace avanzar una etapa a todos los artículos a la vez.
+    
+    Los lotes se facturan a precio reducido y tienen su propio límite de tasa, así que
+    no consumen el margen del tráfico interactivo a cambio de horas de latencia.
+    """
+    
+    def __init__(self, client_factory: Callable[[ModelConfiguration], Any], collect_seconds: float = 5.0,
+                 max_requests: int = 5000, poll_seconds: float = 30.0, completion_window: str = "24h",
+                 timeout: Optional[float] = None):
+        """Inicializa la cola y arranca el hilo que forma los lotes.
+        
+        Args:
+            client_factory: Devuelve el cliente (OpenAI o ``LocalBatchClient``) de un modelo
+            collect_seconds: Segundos sin llamadas nuevas tras los que se envía el lote
+            max_requests: Llamadas a partir de las que se envía el lote sin esperar
+            poll_seconds: Segundos entre consultas del estado de cada lote
+            completion_window: Plazo de ejecución pedido al proveedor
+            timeout: Segundos tras los que se abandona un lote sin terminar (por defecto, el
+                plazo del lote más un margen para que el proveedor lo cierre)
+        """
+        self.client_factory = client_factory
+        self.collect_seconds = collect_seconds
+        self.max_requests = max_requests
+        self.poll_seconds = poll_seconds
+        self.completion_window = completion_window
+        self.timeout = timeout if timeout is not None else window_seconds(completion_window) + FINALIZE_GRACE_SECONDS
+        self.batches = 0
+        self.requests = 0
+        self.failed = 0
+        self._queue: List[_PendingCall] = []
+        self._last_enqueue = 0.0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._collector = threading.Thread(target=self._collect_loop, name="batch-collector", daemon=True)
+        self._collector.start()
+    
+    def complete(self, model_config: ModelConfiguration, body: Dict[str, Any]) -> List[str]:
+        """Encola una llamada de chat y espera a que su lote termine.
+        
+        Args:
+            model_config: Modelo de la llamada (determina el lote y el cliente)
+            body: Cuerpo de la petición de chat (modelo, mensajes y parámetros)
+        
+        Returns:
+            Texto de cada alternativa de la respuesta (``n`` en el cuerpo)
+        
+        Raises:
+            BatchRequestFailed: Si el lote falló, no devolvió respuesta para la llamada o
+                no terminó a tiempo
+        """
+        call = _PendingCall(model_config, body)
+        with self._cond:
+            if self._closed:
+                raise BatchRequestFailed("La cola de lotes está cerrada")
+            self._queue.append(call)
+            self._last_enqueue = time.monotonic()
+            self._cond.notify()
+        # Tope de la espera: formar el lote, su plazo y una última consulta del estado
+        if not call.done.wait(self.collect_seconds + self.timeout + self.poll_seconds):
+            raise BatchRequestFailed(f"Sin respuesta del lote tras {self.timeout:.0f} s")
+        if call.error is not None:
+            raise BatchRequestFailed(call.error)
+        return call.texts
+    
+    def _collect_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._queue:
+                    return
+                # Esperar a que los artículos en curso encolen también su llamada
+                while len(self._queue) < self.max_requests and not self._closed:
+                    idle = time.monotonic() - self._last_enqueue
+                    if idle >= self.collect_seconds:
+                        break
+                    self._cond.wait(self.collect_seconds - idle)
+                calls, self._queue = self._queue[:self.max_requests], self._queue[self.max_requests:]
+            
+            groups: Dict[Tuple[str, Optional[str], Optional[str]], List[_PendingCall]] = {}
+            for call in calls:
+                key = (call.model_config.model_id, call.model_config.base_url, call.model_config.api_key)
+                groups.setdefault(key, []).append(call)
+            for group in groups.values():
+                threading.Thread(target=self._run_batch, args=(group,), name="batch-poll", daemon=True).start()
+    
+    def _run_batch(self, calls: List[_PendingCall]) -> None:
+        """Envía un lote, espera a que termine y reparte las respuestas."""
+        try:
+            client = self.client_factory(calls[0].model_config)
+            lines = "".join(
+                json.dumps({"custom_id": call.custom_id, "method": "POST", "url": CHAT_ENDPOINT, "body": call.body},
+                           ensure_ascii=False) + "\n"
+                for call in calls
+            )
+            input_file = client.files.create(file=("lote.jsonl", lines.encode("utf-8")), purpose="batch")
+            batch = client.batches.create(
+                input_file_id=input_file.id, endpoint=CHAT_ENDPOINT, completion_window=self.completion_window
+            )
+            with self._cond:
+                self.batches += 1
+                self.requests += len(calls)
+            logger.info(f"Lote {batch.id} enviado: {len(calls)} llamada(s) a {calls[0].model_config.model_id}")
+            
+            submitted = time.monotonic()
+            while batch.status not in TERMINAL_STATES:
+                if time.monotonic() - submitted > self.timeout:
+                    self._abandon(client, batch)
+                    raise BatchRequestFailed(f"Lote {batch.id} sin terminar tras {self.timeout:.0f} s ({batch.status})")
+                time.sleep(self.poll_seconds)
+                batch = client.batches.retrieve(batch.id)
+            logger.info(f"Lote {batch.id} terminado con estado {batch.status}")
+            
+            results: Dict[str, Tuple[Optional[List[str]], Optional[str]]] = {}
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    for line in client.files.content(file_id).text.splitlines():
+                        if line.strip():
+                            record = json.loads(line)
+                            results[record["custom_id"]] = _parse_result(record)
+        except Exception as e:
+            logger.error(f"Error en el lote de {len(calls)} llamada(s): {str(e)}")
+            for call in calls:
+                call.resolve(error=f"Error en el lote: {str(e)}")
+            with self._cond:
+                self.failed += len(calls)
+            return
+        
+        failed = 0
+        for call in calls:
+            texts, error = results.get(call.custom_id, (None, f"Sin respuesta (lote {batch.status})"))
+            failed += error is not None
+            call.resolve(texts, error)
+        with self._cond:
+            self.failed += failed
+    
+    @staticmethod
+    def _abandon(client: Any, batch: Any) -> None:
+        """Cancela en el proveedor un lote que se abandona (si la API lo permite)."""
+        try:
+            client.batches.cancel(batch.id)
+        except Exception as e:
+            logger.warning(f"No se pudo cancelar el lote {batch.id}: {str(e)}")
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return {"batches": self.batches, "requests": self.requests, "failed": self.failed,
+                    "queued": len(self._queue)}
+    
+    def close(self) -> None:
+        """Envía lo pendiente y detiene el hilo que forma los lotes."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._collector.join()
+
+
+def _parse_result(record: Dict[str, Any]) -> Tuple[Optional[List[str]], Optional[str]]:
+    """Textos o error de una línea de resultados de la API de lotes."""
+    response = record.get("response") or {}
+    if record.get("error") or response.get("status_code") != 200:
+        error = record.get("error") or (response.get("body") or {}).get("error") or response.get("status_code")
+        return None, f"Error del proveedor: {error}"
+    choices = response["body"]["choices"]
+    return [choice["message"]["content"] or "" for choice in choices], None
+
+
+class LocalBatchClient:
+    """Sustituto local de la API de lotes del proveedor.
+    
+    Implementa las llamadas que usa ``DeferredBatchQueue`` (subida y descarga de
+    ficheros y creación y consulta de lotes) y ejecuta cada lote en segundo plano con
+    el cliente de chat síncrono recibido. Sirve para desarrollar y probar el modo
+    diferido sin esperar las horas de un lote real.
+    """
+    
+    def __init__(self, chat_client: Any):
+        """Inicializa el sustituto.
+        
+        Args:
+            chat_client: Cliente con ``chat.completions.create`` (el de OpenAI o uno equivalente)
+        """
+        self.chat_client = chat_client
+        self._files: Dict[str, str] = {}
+        self._batches: Dict[str, SimpleNamespace] = {}
+        self._lock = threading.Lock()
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch,
+                                       cancel=self._cancel_batch)
+    
+    def _store(self, text: str) -> str:
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self._files[file_id] = text
+        return file_id
+    
+    def _create_file(self, file: Tuple[str, bytes], purpose: str) -> SimpleNamespace:
+        return SimpleNamespace(id=self._store(file[1].decode("utf-8")), purpose=purpose)
+    
+    def _file_content(self, file_id: str) -> SimpleNamespace:
+        with self._lock:
+            return SimpleNamespace(text=self._files[file_id])
+    
+    def _create_batch(self, input_file_id: str, endpoint: str, completion_window: str) -> SimpleNamespace:
+        batch = SimpleNamespace(id=f"batch-{uuid.uuid4().hex[:12]}", status="in_progress", endpoint=endpoint,
+                                output_file_id=None, error_file_id=None)
+        with self._lock:
+            self._batches[batch.id] = batch
+        threading.Thread(target=self._execute, args=(batch, input_file_id), daemon=True).start()
+        return SimpleNamespace(**vars(batch))
+    
+    def _retrieve_batch(self, batch_id: str) -> SimpleNamespace:
+        with self._lock:
+            return SimpleNamespace(**vars(self._batches[batch_id]))
+    
+    def _cancel_batch(self, batch_id: str) -> SimpleNamespace:
+        with self._lock:
+            batch = self._batches[batch_id]
+            if batch.status not in TERMINAL_STATES:
+                batch.status = "cancelled"
+            return SimpleNamespace(**vars(batch))
+    
+    def _execute(self, batch: SimpleNamespace, input_file_id: str) -> None:
+        with self._lock:
+            lines = self._files[input_file_id].splitlines()
+        outputs, errors = [], []
+        for line in lines:
+            request = json.loads(line)
+            try:
+                completion = self.chat_client.chat.completions.create(**request["body"])
+                outputs.append({"custom_id": request["custom_id"], "error": None,
+                                "response": {"status_code": 200, "body": completion.model_dump()}})
+            except Exception as e:
+                errors.append({"custom_id": request["custom_id"], "response": None,
+                               "error": {"code": type(e).__name__, "message": str(e)}})
+        
+        def jsonl(records: List[Dict[str, Any]]) -> Optional[str]:
+            return self._store("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)) if records else None
+        
+        output_file_id, error_file_id = jsonl(outputs), jsonl(errors)
+        with self._lock:
+            batch.output_file_id = output_file_id
+            batch.error_file_id = error_file_id
+            if batch.status != "cancelled":
+                batch.status = "completed"
@@ -0,0 +1,417 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from common.services.sqlite_store import SQLiteStore
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Cada cuántas escrituras se eliminan las entradas caducadas y sobrantes del nivel compartido
+EVICT_EVERY = 100
+
+# Antigüedad mínima del último acceso registrado antes de volver a actualizarlo
+# (evita una escritura por cada lectura en el nivel compartido)
+TOUCH_INTERVAL = 60.0
+
+
+def content_key(namespace: str, *parts: Any) -> str:
+    """Clave direccionada por contenido: el espacio de nombres y el hash de las partes.
+    
+    Args:
+        namespace: Espacio de nombres (por ejemplo, la etapa)
+        parts: Valores serializables en JSON que determinan el resultado
+    
+    Returns:
+        Clave estable entre procesos
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return f"{namespace}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+def encode_value(value: Any) -> Tuple[bytes, int]:
+    """Serializa (JSON) y comprime un valor para los niveles compartidos.
+    
+    Returns:
+        Tupla (datos comprimidos, tamaño sin comprimir)
+    """
+    raw = json.dumps(value, ensure_ascii=False).encode("utf-8")
+    return zlib.compress(raw), len(raw)
+
+
+def decode_value(data: bytes) -> Any:
+    """Descomprime y deserializa un valor de los niveles compartidos."""
+    return json.loads(zlib.decompress(data).decode("utf-8"))
+
+
+class CacheStats:
+    """Contadores de uso de un nivel de caché."""
+    
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+        self.errors = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self._lock = threading.Lock()
+    
+    def add(self, **counts: int) -> None:
+        with self._lock:
+            for name, count in counts.items():
+                setattr(self, name, getattr(self, name) + count)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "sets": self.sets,
+                "evictions": self.evictions,
+                "errors": self.errors,
+                "compression_ratio": round(self.stored_bytes / self.raw_bytes, 3) if self.raw_bytes else None,
+            }
+
+
+class CacheBackend:
+    """Nivel de caché: valores serializables en JSON por clave de texto, con caducidad."""
+    
+    name = "backend"
+    
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+    
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Obtiene un valor.
+        
+        Returns:
+            Tupla (encontrado, valor)
+        """
+        raise NotImplementedError
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Guarda un valor (``ttl`` en segundos; por defecto, el del nivel)."""
+        raise NotImplementedError
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Métricas del nivel."""
+        return {"tier": self.name, **self.stats.to_dict()}
+
+
+class MemoryCache(CacheBackend):
+    """Caché LRU en memoria del proceso, con caducidad.
+    
+    Los valores se guardan serializados en JSON y cada lectura devuelve una copia,
+    para que quien modifique un resultado obtenido de la caché no altere el de las
+    lecturas posteriores.
+    """
+    
+    name = "memory"
+    
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600.0):
+        """Inicializa la caché.
+        
+        Args:
+            max_entries: Entradas como máximo (se descartan las menos usadas)
+            ttl_seconds: Tiempo de vida por defecto de cada entrada
+        """
+        super().__init__(ttl_seconds)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.stats.add(misses=1)
+                return False, None
+            self._entries.move_to_end(key)
+        self.stats.add(hits=1)
+        return True, json.loads(entry[1])
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        encoded = json.dumps(value, ensure_ascii=False)
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (ttl or self.ttl_seconds), encoded)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        self.stats.add(sets=1, evictions=evicted)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = len(self._entries)
+        return {**super().snapshot(), "entries": entries, "max_entries": self.max_entries}
+
+
+class SQLiteCache(CacheBackend, SQLiteStore):
+    """Caché compartida por todos los workers del servidor en un fichero SQLite (WAL).
+    
+    Los valores se guardan comprimidos. SQLite se encarga del bloqueo entre procesos;
+    las entradas caducadas y las menos usadas por encima del máximo se eliminan
+    periódicamente.
+    """
+    
+    name = "shared"
+    timeout = 5
+    row_factory = None
+    
+    def __init__(self, db_path: str, max_entries: int = 5000, ttl_seconds: float = 3600.0):
+        """Inicializa la caché (la base de datos se prepara en el primer uso).
+        
+        Args:
+            db_path: Ruta del fichero SQLite
+            max_entries: Entradas como máximo (se descartan las de acceso más antiguo)
+            ttl_seconds: Tiempo de vida por defecto de cada entrada
+        """
+        CacheBackend.__init__(self, ttl_seconds)
+        SQLiteStore.__init__(self, db_path)
+        self.max_entries = max_entries
+        self._writes = 0
+    
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+    
+    def get(self, key: str) -> Tuple[bool, Any]:
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value, accessed_at FROM cache WHERE key = ? AND expires_at >= ?", (key, now)
+        ).fetchone()
+        if row is None:
+            self.stats.add(misses=1)
+            return False, None
+        if row[1] < now - TOUCH_INTERVAL:
+            with conn:
+                conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        self.stats.add(hits=1)
+        return True, decode_value(row[0])
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        data, raw_size = encode_value(value)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, data, now + (ttl or self.ttl_seconds), now)
+            )
+        self.stats.add(sets=1, raw_bytes=raw_size, stored_bytes=len(data))
+        self._writes += 1
+        if self._writes % EVICT_EVERY == 0:
+            self.evict()
+    
+    def evict(self) -> int:
+        """Elimina las entradas caducadas y, por encima del máximo, las de acceso más antiguo.
+        
+        Returns:
+            Número de entradas eliminadas
+        """
+        with self._connect() as conn:
+            removed = conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),)).rowcount
+            excess = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+            if excess > 0:
+                removed += conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)", (excess,)
+                ).rowcount
+        self.stats.add(evictions=removed)
+        return removed
+    
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot = {**super().snapshot(), "max_entries": self.max_entries}
+        try:
+            entries, stored = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM cache").fetchone()
+            snapshot.update(entries=entries, bytes=stored)
+        except sqlite3.Error as e:
+            snapshot["error"] = str(e)
+        return snapshot
+
+
+class RemoteClient(Protocol):
+    """Cliente de una caché de red (el subconjunto de la API de Redis que se usa)."""
+    
+    def get(self, key: str) -> Optional[bytes]: ...
+    
+    def set(self, key: str, value: bytes, ex: Optional[int] = None) -> Any: ...
+
+
+class LocalRemoteClient:
+    """Sustituto local de una caché de red, para pruebas y desarrollo."""
+    
+    def __init__(self):
+        self._values: Dict[str, Tuple[float, bytes]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None or entry[0] < time.time():
+                self._values.pop(key, None)
+                return None
+            return entry[1]
+    
+    def set(self, key: str, value: bytes, ex: Optional[int] = None) -> bool:
+        with self._lock:
+            self._values[key] = (time.time() + ex if ex else float("inf"), value)
+        return True
+
+
+class RemoteCache(CacheBackend):
+    """Caché de red compartida entre servidores (Redis o compatible), con valores comprimidos.
+    
+    La caducidad y el desalojo los gestiona el propio servicio de red. Si la primera
+    operación falla (servicio inaccesible o mal configurado), el nivel se desactiva y
+    se comporta como una caché vacía durante el resto de la vida del proceso.
+    """
+    
+    name = "remote"
+    
+    def __init__(self, client: RemoteClient, ttl_seconds: float = 3600.0, prefix: str = "content-agent:"):
+        """Inicializa la caché.
+        
+        Args:
+            client: Cliente de la caché de red
+            ttl_seconds: Tiempo de vida por defecto de cada entrada
+            prefix: Prefijo de las claves, para compartir el servicio con otras aplicaciones
+        """
+        super().__init__(ttl_seconds)
+        self.client = client
+        self.prefix = prefix
+        self.disabled = False
+        self._reachable = False
+    
+    def _call(self, operation: str, *args: Any, **kwargs: Any) -> Any:
+        """Llama al cliente; si la primera llamada falla, desactiva el nivel."""
+        if self.disabled:
+            return None
+        try:
+            result = getattr(self.client, operation)(*args, **kwargs)
+        except Exception as e:
+            if self._reachable:
+                raise
+            self.disabled = True
+            self.stats.add(errors=1)
+            logger.warning(f"Caché de red inaccesible ({str(e)}): nivel '{self.name}' desactivado")
+            return None
+        self._reachable = True
+        return result
+    
+    def get(self, key: str) -> Tuple[bool, Any]:
+        data = self._call("get", self.prefix + key)
+        if data is None:
+            self.stats.add(misses=1)
+            return False, None
+        self.stats.add(hits=1)
+        return True, decode_value(data)
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        data, raw_size = encode_value(value)
+        if self._call("set", self.prefix + key, data, ex=int(ttl or self.ttl_seconds)) is None:
+            return
+        self.stats.add(sets=1, raw_bytes=raw_size, stored_bytes=len(data))
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {**super().snapshot(), "disabled": self.disabled}
+
+
+class TieredCache:
+    """Caché por niveles: memoria del proceso, después los niveles compartidos.
+    
+    Las lecturas prueban los niveles en orden y, al encontrar un valor en uno
+    inferior, lo copian en los superiores. Las escrituras van a todos los niveles.
+    Un fallo de un nivel compartido solo se registra: la caché nunca interrumpe una
+    generación.
+    """
+    
+    def __init__(self, tiers: List[CacheBackend]):
+        self.tiers = tiers
+    
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Obtiene un valor del primer nivel que lo tenga.
+        
+        Returns:
+            Tupla (encontrado, valor)
+        """
+        for position, tier in enumerate(self.tiers):
+            try:
+                found, value = tier.get(key)
+            except Exception as e:
+                tier.stats.add(errors=1)
+                logger.warning(f"Error leyendo de la caché '{tier.name}': {str(e)}")
+                continue
+            if found:
+                for upper in self.tiers[:position]:
+                    self._set_tier(upper, key, value, None)
+                return True, value
+        return False, None
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Guarda un valor en todos los niveles."""
+        for tier in self.tiers:
+            self._set_tier(tier, key, value, ttl)
+    
+    @staticmethod
+    def _set_tier(tier: CacheBackend, key: str, value: Any, ttl: Optional[float]) -> None:
+        try:
+            tier.set(key, value, ttl)
+        except Exception as e:
+            tier.stats.add(errors=1)
+            logger.warning(f"Error escribiendo en la caché '{tier.name}': {str(e)}")
+    
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Métricas por nivel."""
+        return [tier.snapshot() for tier in self.tiers]
+
+
+def _remote_client(url: str) -> Optional[RemoteClient]:
+    """Crea el cliente de la caché de red configurada (CACHE_REMOTE_URL)."""
+    if not url:
+        return None
+    if url == "local":
+        return LocalRemoteClient()
+    try:
+        import redis
+    except ImportError:
+        logger.warning("CACHE_REMOTE_URL configurada pero el paquete 'redis' no está instalado: nivel de red desactivado")
+        return None
+    return redis.Redis.from_url(url, socket_timeout=1)
+
+
+def _build_shared_cache() -> TieredCache:
+    tiers: List[CacheBackend] = [MemoryCache(settings.CACHE_MEMORY_ENTRIES, settings.CACHE_TTL_SECONDS)]
+    if settings.CACHE_SHARED_ENABLED:
+        tiers.append(SQLiteCache(
+            os.path.join(settings.DATA_DIR, "cache.db"),
+            max_entries=settings.CACHE_SHARED_MAX_ENTRIES,
+            ttl_seconds=settings.CACHE_TTL_SECONDS
+        ))
+    client = _remote_client(settings.CACHE_REMOTE_URL)
+    if client is not None:
+        tiers.append(RemoteCache(client, ttl_seconds=settings.CACHE_TTL_SECONDS))
+    return TieredCache(tiers)
+
+
+# Caché compartida de resultados de generación e investigación
+shared_cache = _build_shared_cache()
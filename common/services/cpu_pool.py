@@ -0,0 +1,173 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import threading
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _preload(modules: Sequence[str]) -> None:
+    """Importa los módulos indicados al arrancar cada proceso del pool."""
+    for module in modules:
+        importlib.import_module(module)
+
+
+def _noop() -> None:
+    return None
+
+
+class CpuPool:
+    """Pool de procesos gestionado para los pasos de CPU del pipeline.
+    
+    Análisis de markdown, reparación de JSON y otros pasos que solo consumen CPU se
+    ejecutan en procesos aparte para no competir por el GIL con los hilos que esperan
+    al proveedor ni con el bucle de eventos. Las entradas pequeñas se procesan en el
+    propio hilo, donde enviarlas a otro proceso costaría más que el trabajo. Las
+    funciones enviadas deben estar definidas a nivel de módulo (se serializan con
+    pickle) y no reciben el contexto de la petición.
+    """
+    
+    def __init__(self, workers: int = 2, inline_below: int = 20000, preload: Sequence[str] = ()):
+        """Inicializa el pool (los procesos se crean en el primer uso o al precalentar).
+        
+        Args:
+            workers: Procesos del pool (0 ejecuta todo en el propio hilo)
+            inline_below: Tamaño de entrada (caracteres) por debajo del que no se usa el pool
+            preload: Módulos que cada proceso importa al arrancar
+        """
+        self.workers = workers
+        self.inline_below = inline_below
+        self.preload = tuple(preload)
+        self.inline = 0
+        self.offloaded = 0
+        self.failures = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # 'spawn' evita heredar hilos y conexiones del proceso del servidor
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_preload,
+                    initargs=(self.preload,)
+                )
+            return self._executor
+    
+    def _reset(self, executor: ProcessPoolExecutor) -> None:
+        """Descarta un pool roto (por ejemplo, si el sistema mató uno de sus procesos)."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _should_offload(self, size: int) -> bool:
+        offload = self.workers > 0 and size >= self.inline_below
+        with self._lock:
+            if offload:
+                self.offloaded += 1
+            else:
+                self.inline += 1
+        return offload
+    
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """Envía ``fn(*args)`` al pool sin esperar el resultado."""
+        return self._get_executor().submit(fn, *args)
+    
+    def run(self, fn: Callable[..., Any], *args: Any, size: int = 0) -> Any:
+        """Ejecuta ``fn(*args)`` en el pool, o en el propio hilo si la entrada es pequeña.
+        
+        Args:
+            fn: Función de nivel de módulo
+            *args: Argumentos (serializables con pickle)
+            size: Tamaño de la entrada, comparado con el umbral para ejecutar en el hilo
+        
+        Returns:
+            Resultado de la función
+        """
+        if not self._should_offload(size):
+            return fn(*args)
+        executor = self._get_executor()
+        try:
+            return executor.submit(fn, *args).result()
+        except BrokenProcessPool:
+            self._fail(executor)
+            return fn(*args)
+    
+    def map(self, fn: Callable[..., Any], *iterables: Iterable[Any], size: int = 0) -> List[Any]:
+        """Aplica ``fn`` a cada elemento en paralelo, o en el propio hilo si la entrada total es pequeña.
+        
+        Args:
+            fn: Función de nivel de módulo
+            *iterables: Argumentos de cada llamada, como en ``map``
+            size: Tamaño total de la entrada, comparado con el umbral
+        
+        Returns:
+            Resultados en el orden de la entrada
+        """
+        argument_lists = [list(iterable) for iterable in iterables]
+        if not self._should_offload(size):
+            return list(map(fn, *argument_lists))
+        executor = self._get_executor()
+        try:
+            return list(executor.map(fn, *argument_lists))
+        except BrokenProcessPool:
+            self._fail(executor)
+            return list(map(fn, *argument_lists))
+    
+    async def arun(self, fn: Callable[..., Any], *args: Any, size: int = 0) -> Any:
+        """Versión para corrutinas de ``run``: espera el resultado sin bloquear el bucle."""
+        if not self._should_offload(size):
+            return fn(*args)
+        executor = self._get_executor()
+        try:
+            return await asyncio.wrap_future(executor.submit(fn, *args))
+        except BrokenProcessPool:
+            self._fail(executor)
+            return fn(*args)
+    
+    def _fail(self, executor: ProcessPoolExecutor) -> None:
+        logger.error("El pool de procesos de CPU se ha roto; se recrea y el paso se ejecuta en el hilo")
+        with self._lock:
+            self.failures += 1
+        self._reset(executor)
+    
+    def warm_up(self) -> None:
+        """Arranca los procesos e importa los módulos precargados antes de la primera petición."""
+        if self.workers > 0:
+            executor = self._get_executor()
+            for future in [executor.submit(_noop) for _ in range(self.workers)]:
+                future.result()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado del pool para /metrics."""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "started": self._executor is not None,
+                "inline_below": self.inline_below,
+                "inline": self.inline,
+                "offloaded": self.offloaded,
+                "failures": self.failures,
+            }
+    
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Pool compartido del proceso
+cpu_pool = CpuPool(
+    workers=settings.CPU_POOL_WORKERS,
+    inline_below=settings.CPU_POOL_INLINE_BELOW_CHARS,
+    preload=settings.CPU_POOL_PRELOAD
+)
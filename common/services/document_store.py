@@ -0,0 +1,88 @@
+from typing import Any, Dict, List, Optional
+import os
+import sqlite3
+import time
+import uuid
+from common.services.sqlite_store import SQLiteStore
+from core.config import settings
+
+
+class DocumentStore(SQLiteStore):
+    """Almacén local (SQLite) de los documentos de referencia y su estado de procesamiento.
+    
+    Los fragmentos de texto de cada documento se guardan en el índice de recuperación
+    (common.services.retrieval_index). Usa el modo WAL para que los procesos de
+    extracción actualicen el estado mientras el proceso de la API lo consulta.
+    """
+    
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id TEXT PRIMARY KEY,
+                filename TEXT,
+                status TEXT NOT NULL,
+                pages INTEGER DEFAULT 0,
+                chunks INTEGER DEFAULT 0,
+                error TEXT,
+                created_at REAL NOT NULL
+            );
+        """)
+    
+    def create_document(self, filename: Optional[str]) -> str:
+        """Registra un documento nuevo en estado 'processing'.
+        
+        Args:
+            filename: Nombre original del fichero
+        
+        Returns:
+            ID del documento
+        """
+        document_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO documents (id, filename, status, created_at) VALUES (?, ?, 'processing', ?)",
+                (document_id, filename, time.time())
+            )
+        return document_id
+    
+    def mark_ready(self, document_id: str, pages: int, chunks: int) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE documents SET status = 'ready', pages = ?, chunks = ? WHERE id = ?",
+                (pages, chunks, document_id)
+            )
+    
+    def mark_failed(self, document_id: str, error: str) -> None:
+        with self._connect() as conn:
+            conn.execute("UPDATE documents SET status = 'error', error = ? WHERE id = ?", (error, document_id))
+    
+    def fail_stale(self, max_age: float, error: str) -> List[str]:
+        """Marca como fallidos los documentos que llevan demasiado tiempo en 'processing'.
+        
+        Args:
+            max_age: Antigüedad mínima en segundos
+            error: Mensaje de error que se guarda
+        
+        Returns:
+            IDs de los documentos marcados
+        """
+        with self._connect() as conn:
+            stale = [row["id"] for row in conn.execute(
+                "SELECT id FROM documents WHERE status = 'processing' AND created_at < ?",
+                (time.time() - max_age,)
+            )]
+            conn.executemany(
+                "UPDATE documents SET status = 'error', error = ? WHERE id = ? AND status = 'processing'",
+                [(error, document_id) for document_id in stale]
+            )
+        return stale
+    
+    def get_document(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Obtiene los datos de un documento, o None si no existe."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM documents WHERE id = ?", (document_id,)).fetchone()
+        return dict(row) if row else None
+
+
+# Instancia compartida del almacén
+document_store = DocumentStore(os.path.join(settings.DATA_DIR, "documents.db"))
@@ -0,0 +1,251 @@
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+import itertools
+import json
+import logging
+import threading
+import time
+from core.config import settings
+from core.deadline import DeadlineExceeded, deadline_var
+
+logger = logging.getLogger(__name__)
+
+# Tenant que comparten las llamadas de los tenants que no caben en el planificador
+OVERFLOW_TENANT = "otros"
+
+
+class TenantState:
+    """Límites, cuota y estadísticas de un tenant."""
+    
+    def __init__(self, weight: float, max_concurrency: int, tokens_per_minute: float):
+        self.weight = max(weight, 0.001)
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.tokens = tokens_per_minute
+        self.tokens_updated = time.monotonic()
+        self.finish_tag = 0.0
+        self.in_flight = 0
+        self.calls = 0
+        self.tokens_used = 0
+        self.waits: Deque[float] = deque(maxlen=200)
+        self.last_used = time.monotonic()
+    
+    def refill(self, now: float) -> None:
+        if self.tokens_per_minute > 0:
+            elapsed = now - self.tokens_updated
+            self.tokens = min(self.tokens_per_minute, self.tokens + elapsed * self.tokens_per_minute / 60)
+        self.tokens_updated = now
+    
+    def has_quota(self) -> bool:
+        # La cuota puede quedar en negativo tras una respuesta larga: se espera a recuperarla
+        return self.tokens_per_minute <= 0 or self.tokens > 0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        waits = sorted(self.waits)
+        return {
+            "weight": self.weight,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "tokens_used": self.tokens_used,
+            "tokens_available": round(self.tokens) if self.tokens_per_minute > 0 else None,
+            "wait_avg_seconds": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            "wait_p95_seconds": round(waits[int(len(waits) * 0.95)], 3) if waits else 0.0,
+        }
+
+
+class FairScheduler:
+    """Planificador de colas justas ponderadas (WFQ) de las llamadas a los LLM por tenant.
+    
+    Cada llamada recibe una etiqueta de tiempo virtual (inicio = max(tiempo virtual
+    global, fin de la anterior del tenant); fin = inicio + coste / peso) y se atienden
+    por orden de etiqueta de fin. Un tenant con un lote de 200 artículos encola muchas
+    llamadas, pero sus etiquetas crecen y las de un tenant pequeño lo adelantan, de modo
+    que su latencia no depende del volumen ajeno. Además, cada tenant tiene un límite
+    de llamadas simultáneas y una cuota de tokens por minuto.
+    
+    El estado por tenant está acotado a ``max_tenants``: al llegar al límite se
+    descarta el del tenant inactivo usado hace más tiempo y, si todos están activos,
+    las llamadas de tenants nuevos comparten el tenant OVERFLOW_TENANT.
+    """
+    
+    def __init__(self, max_concurrent: int = 16, limits: Optional[Dict[str, Dict[str, Any]]] = None,
+                 default_weight: float = 1.0, default_max_concurrency: int = 8,
+                 default_tokens_per_minute: float = 0, max_tenants: int = 1000):
+        """Inicializa el planificador.
+        
+        Args:
+            max_concurrent: Llamadas simultáneas como máximo entre todos los tenants
+            limits: Límites por tenant ({"tenant": {"weight", "max_concurrency", "tokens_per_minute"}})
+            default_weight: Peso de los tenants sin configuración propia
+            default_max_concurrency: Llamadas simultáneas por tenant por defecto
+            default_tokens_per_minute: Cuota de tokens por minuto por defecto (0 = sin cuota)
+            max_tenants: Tenants distintos cuyo estado se conserva como máximo
+        """
+        self.max_concurrent = max_concurrent
+        self.limits = limits or {}
+        self.default_weight = default_weight
+        self.default_max_concurrency = default_max_concurrency
+        self.default_tokens_per_minute = default_tokens_per_minute
+        self.max_tenants = max(max_tenants, 1)
+        self._tenants: Dict[str, TenantState] = {}
+        self._queue: List[Tuple[float, int, str]] = []
+        self._sequence = itertools.count()
+        self._virtual_time = 0.0
+        self._in_flight = 0
+        self._condition = threading.Condition()
+    
+    def _resolve(self, tenant: str) -> str:
+        """Tenant con el que se contabiliza una llamada, dejando sitio para él si hace falta."""
+        if tenant in self._tenants or len(self._tenants) < self.max_tenants:
+            return tenant
+        queued = {ticket[2] for ticket in self._queue}
+        idle = [
+            (state.last_used, name) for name, state in self._tenants.items()
+            if state.in_flight == 0 and name not in queued
+        ]
+        if idle:
+            del self._tenants[min(idle)[1]]
+            return tenant
+        return OVERFLOW_TENANT
+    
+    def _tenant(self, tenant: str) -> TenantState:
+        state = self._tenants.get(tenant)
+        if state is None:
+            limits = self.limits.get(tenant, {})
+            state = TenantState(
+                weight=limits.get("weight", self.default_weight),
+                max_concurrency=limits.get("max_concurrency", self.default_max_concurrency),
+                tokens_per_minute=limits.get("tokens_per_minute", self.default_tokens_per_minute),
+            )
+            self._tenants[tenant] = state
+        return state
+    
+    def _runnable(self, tenant: str, now: float) -> bool:
+        state = self._tenants[tenant]
+        state.refill(now)
+        return state.in_flight < state.max_concurrency and state.has_quota()
+    
+    def _next_ticket(self) -> Optional[Tuple[float, int, str]]:
+        """Primera llamada en espera (por etiqueta de fin) cuyo tenant puede ejecutar ahora."""
+        if self._in_flight >= self.max_concurrent:
+            return None
+        now = time.monotonic()
+        for ticket in sorted(self._queue):
+            if self._runnable(ticket[2], now):
+                return ticket
+        return None
+    
+    def acquire(self, tenant: str, cost: float = 1.0) -> str:
+        """Espera el turno de una llamada del tenant.
+        
+        Args:
+            tenant: Identificador del tenant
+            cost: Coste relativo de la llamada
+        
+        Returns:
+            Tenant con el que se ha contabilizado la llamada (el que hay que pasar a ``release``)
+        
+        Raises:
+            DeadlineExceeded: Si el plazo de la petición caduca o se cancela durante la espera
+        """
+        deadline = deadline_var.get()
+        queued_at = time.monotonic()
+        with self._condition:
+            tenant = self._resolve(tenant)
+            state = self._tenant(tenant)
+            start_tag = max(self._virtual_time, state.finish_tag)
+            state.finish_tag = start_tag + cost / state.weight
+            ticket = (state.finish_tag, next(self._sequence), tenant)
+            self._queue.append(ticket)
+            try:
+                while self._next_ticket() != ticket:
+                    if deadline is not None:
+                        deadline.check()
+                    # Con tiempo de espera para reevaluar las cuotas de tokens, que se recuperan solas
+                    self._condition.wait(timeout=0.25)
+            except DeadlineExceeded:
+                # Otra llamada puede pasar a ser la siguiente
+                self._condition.notify_all()
+                raise
+            finally:
+                self._queue.remove(ticket)
+            self._virtual_time = max(self._virtual_time, start_tag)
+            self._in_flight += 1
+            state.in_flight += 1
+            state.calls += 1
+            state.waits.append(time.monotonic() - queued_at)
+            # Puede haber otra llamada lista (otro hueco libre o otro tenant con cuota)
+            self._condition.notify_all()
+        return tenant
+    
+    def release(self, tenant: str, tokens: int = 0) -> None:
+        """Libera el turno de una llamada y descuenta los tokens consumidos.
+        
+        Args:
+            tenant: Tenant devuelto por ``acquire``
+            tokens: Tokens consumidos por la llamada (estimados)
+        """
+        with self._condition:
+            state = self._tenant(tenant)
+            self._in_flight -= 1
+            state.in_flight -= 1
+            state.last_used = time.monotonic()
+            state.tokens_used += tokens
+            if state.tokens_per_minute > 0:
+                state.refill(time.monotonic())
+                state.tokens -= tokens
+            self._condition.notify_all()
+    
+    @contextmanager
+    def slot(self, tenant: str, cost: float = 1.0) -> Iterator[Dict[str, int]]:
+        """Ocupa un turno durante el bloque.
+        
+        Returns:
+            Diccionario en el que el bloque puede anotar los tokens consumidos ('tokens')
+        """
+        tenant = self.acquire(tenant, cost)
+        usage = {"tokens": 0}
+        try:
+            yield usage
+        finally:
+            self.release(tenant, usage["tokens"])
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado actual del planificador y estadísticas por tenant."""
+        with self._condition:
+            return {
+                "in_flight": self._in_flight,
+                "max_concurrent": self.max_concurrent,
+                "queued": len(self._queue),
+                "tenants": {tenant: state.to_dict() for tenant, state in self._tenants.items()},
+            }
+
+
+def estimate_tokens(result: Any) -> int:
+    """Estimación aproximada de los tokens de una respuesta (unos 4 caracteres por token)."""
+    if isinstance(result, list):
+        return sum(estimate_tokens(item) for item in result)
+    return len(result if isinstance(result, str) else str(result)) // 4
+
+
+def _load_limits() -> Dict[str, Dict[str, Any]]:
+    """Carga los límites por tenant desde la configuración (JSON)."""
+    if not settings.TENANT_LIMITS:
+        return {}
+    try:
+        return json.loads(settings.TENANT_LIMITS)
+    except json.JSONDecodeError as e:
+        logger.error(f"TENANT_LIMITS no es un JSON válido, se usan los límites por defecto: {str(e)}")
+        return {}
+
+
+# Instancia compartida del planificador
+fair_scheduler = FairScheduler(
+    max_concurrent=settings.LLM_MAX_CONCURRENT_CALLS,
+    limits=_load_limits(),
+    default_weight=settings.TENANT_DEFAULT_WEIGHT,
+    default_max_concurrency=settings.TENANT_DEFAULT_MAX_CONCURRENCY,
+    default_tokens_per_minute=settings.TENANT_DEFAULT_TOKENS_PER_MINUTE,
+    max_tenants=settings.TENANT_MAX_TRACKED
+)
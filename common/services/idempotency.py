@@ -0,0 +1,165 @@
+from typing import Awaitable, Callable, Optional, Tuple
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from common.services.sqlite_store import SQLiteStore
+from core.config import settings
+from core.deadline import check_deadline
+
+logger = logging.getLogger(__name__)
+
+# Cada cuántas respuestas guardadas se eliminan las caducadas
+PRUNE_EVERY = 500
+
+# Intervalo de consulta mientras otra petición con la misma clave está en curso
+POLL_INTERVAL = 0.2
+
+
+class IdempotencyKeyReused(Exception):
+    """La clave de idempotencia ya se usó con una petición distinta."""
+
+
+class IdempotencyStore(SQLiteStore):
+    """Respuestas de las peticiones con cabecera Idempotency-Key.
+    
+    La primera petición con una clave se ejecuta y su respuesta se guarda durante la
+    ventana configurada; los reintentos reciben exactamente los mismos bytes. Las
+    peticiones duplicadas que llegan mientras la primera está en curso esperan su
+    resultado en lugar de generarlo otra vez. El estado está en SQLite, así que la
+    deduplicación funciona entre los workers de uvicorn del mismo servidor.
+    """
+    
+    def __init__(self, db_path: str, ttl: float = 24 * 3600, pending_timeout: float = 900):
+        """Inicializa el almacén (la base de datos se prepara en el primer uso).
+        
+        Args:
+            db_path: Ruta del fichero SQLite
+            ttl: Segundos durante los que se guarda cada respuesta
+            pending_timeout: Segundos tras los que una ejecución en curso se da por abandonada
+                (por ejemplo, si su worker se reinició) y otra petición puede repetirla
+        """
+        super().__init__(db_path)
+        self.ttl = ttl
+        self.pending_timeout = pending_timeout
+        self._saved = 0
+    
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS idempotency (
+                key TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                status_code INTEGER,
+                body BLOB,
+                created_at REAL NOT NULL,
+                completed_at REAL
+            )
+        """)
+    
+    def _claim(self, key: str, fingerprint: str) -> Tuple[str, Optional[int], Optional[bytes]]:
+        """Reserva la clave o devuelve la respuesta guardada.
+        
+        Returns:
+            (estado, status, body): estado es 'claimed' si esta petición ha reservado la
+            clave y debe ejecutarse, 'pending' si otra petición con la clave está en curso
+            y 'done' si hay respuesta guardada
+        
+        Raises:
+            IdempotencyKeyReused: Si la clave se usó con otra petición
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT * FROM idempotency WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                expired = row["completed_at"] is not None and row["completed_at"] < now - self.ttl
+                abandoned = row["completed_at"] is None and row["created_at"] < now - self.pending_timeout
+                if not expired and not abandoned:
+                    if row["fingerprint"] != fingerprint:
+                        raise IdempotencyKeyReused(
+                            "La clave de idempotencia ya se usó con una petición distinta"
+                        )
+                    if row["completed_at"] is None:
+                        return "pending", None, None
+                    return "done", row["status_code"], row["body"]
+                if abandoned:
+                    logger.warning(f"Ejecución abandonada con la clave de idempotencia {key}: se repite")
+            conn.execute(
+                "INSERT OR REPLACE INTO idempotency (key, fingerprint, created_at) VALUES (?, ?, ?)",
+                (key, fingerprint, now)
+            )
+            return "claimed", None, None
+    
+    def _complete(self, key: str, status_code: int, body: bytes) -> None:
+        """Guarda la respuesta de la ejecución que reservó la clave."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE idempotency SET status_code = ?, body = ?, completed_at = ? WHERE key = ?",
+                (status_code, body, time.time(), key)
+            )
+        self._saved += 1
+        if self._saved % PRUNE_EVERY == 0:
+            self.prune()
+    
+    def _release(self, key: str) -> None:
+        """Libera la clave de una ejecución fallida para que un reintento la repita."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM idempotency WHERE key = ? AND completed_at IS NULL", (key,))
+    
+    def prune(self) -> int:
+        """Elimina las respuestas caducadas y las ejecuciones abandonadas.
+        
+        Returns:
+            Número de claves eliminadas
+        """
+        now = time.time()
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM idempotency WHERE completed_at < ? OR (completed_at IS NULL AND created_at < ?)",
+                (now - self.ttl, now - self.pending_timeout)
+            ).rowcount
+    
+    async def run_once(self, key: str, fingerprint: str,
+                       produce: Callable[[], Awaitable[Tuple[int, bytes]]]) -> Tuple[int, bytes, bool]:
+        """Ejecuta ``produce`` una sola vez por clave y comparte su respuesta.
+        
+        Args:
+            key: Clave de idempotencia (ya acotada al tenant)
+            fingerprint: Huella del cuerpo de la petición, para detectar claves reutilizadas
+            produce: Corrutina que ejecuta la petición y devuelve (status, body)
+        
+        Returns:
+            (status, body, repetida): repetida es True si la respuesta es la guardada
+            de otra petición con la misma clave
+        
+        Raises:
+            IdempotencyKeyReused: Si la clave se usó con otra petición
+            DeadlineExceeded: Si se agota el plazo esperando a la ejecución en curso
+        """
+        # Las operaciones de SQLite pueden esperar al bloqueo de escritura de otro worker:
+        # se hacen en un hilo para no bloquear el bucle de eventos
+        state, status_code, body = await asyncio.to_thread(self._claim, key, fingerprint)
+        while state == "pending":
+            # Otra petición con la clave está en curso: esperar a su respuesta
+            check_deadline()
+            await asyncio.sleep(POLL_INTERVAL)
+            state, status_code, body = await asyncio.to_thread(self._claim, key, fingerprint)
+        if state == "done":
+            return status_code, body, True
+        
+        try:
+            status_code, body = await produce()
+        except BaseException:
+            await asyncio.shield(asyncio.to_thread(self._release, key))
+            raise
+        await asyncio.to_thread(self._complete, key, status_code, body)
+        return status_code, body, False
+
+
+# Instancia compartida del almacén
+idempotency_store = IdempotencyStore(
+    os.path.join(settings.DATA_DIR, "idempotency.db"),
+    ttl=settings.IDEMPOTENCY_TTL_HOURS * 3600,
+    pending_timeout=settings.IDEMPOTENCY_PENDING_TIMEOUT_SECONDS
+)
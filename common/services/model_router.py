@@ -0,0 +1,309 @@
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+import json
+import logging
+import threading
+import time
+from common.models.config import ModelConfiguration
+from common.services.fair_scheduler import FairScheduler, estimate_tokens, fair_scheduler
+from common.services.provider_pool import is_endpoint_failure, provider_pool
+from common.utils.rate_limiter import RateLimiter
+from core.config import settings
+from core.deadline import DeadlineExceeded, check_deadline, deadline_var
+from core.tenancy import tenant_for_key, tenant_var
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class InvalidModelResponse(Exception):
+    """El modelo devolvió una respuesta que no se puede interpretar (un fallo del proveedor, no de la petición)."""
+
+# Política por defecto: modelo principal y alternativas para cada etapa del pipeline
+DEFAULT_STAGE_POLICY: Dict[str, List[str]] = {
+    "outline": ["gpt-4o-mini", "gpt-4o"],
+    "research_synthesis": ["gpt-4o-mini", "gpt-4o"],
+    "web_search": ["gpt-4o", "gpt-4o-mini"],
+    "url_analysis": ["gpt-4o-search-preview", "gpt-4o-mini-search-preview"],
+    "writing": ["gpt-4o", "gpt-4o-mini"],
+    "editing": ["gpt-4o", "gpt-4o-mini"],
+    "social_post": ["gpt-4o-mini", "gpt-4o"],
+    "translation": ["gpt-4o-mini", "gpt-4o"],
+    "section_writing": ["gpt-4o", "gpt-4o-mini"],
+    "default": ["gpt-4o", "gpt-4o-mini"],
+}
+
+# Latencia media (segundos) a partir de la cual se prefiere una alternativa más rápida
+DEFAULT_LATENCY_BUDGETS: Dict[str, float] = {
+    "outline": 20.0,
+    "research_synthesis": 40.0,
+    "web_search": 60.0,
+    "url_analysis": 60.0,
+    "writing": 120.0,
+    "editing": 120.0,
+    "social_post": 30.0,
+    "translation": 60.0,
+    "section_writing": 45.0,
+    "default": 90.0,
+}
+
+SUPPORTED_PROVIDERS = ("openai", "openai_compatible")
+
+
+def model_key(model_config: ModelConfiguration) -> str:
+    """Clave que identifica un modelo en un endpoint concreto."""
+    return f"{model_config.provider}:{model_config.base_url or 'default'}:{model_config.model_id}"
+
+
+class ModelHealth:
+    """Registro vivo de latencia y tasa de errores de un modelo."""
+    
+    def __init__(self, alpha: float = 0.2):
+        """Inicializa las estadísticas.
+        
+        Args:
+            alpha: Peso de la última observación en las medias móviles exponenciales
+        """
+        self.alpha = alpha
+        self.calls = 0
+        self.errors = 0
+        self.latency_ewma: Optional[float] = None
+        self.error_rate_ewma = 0.0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.last_failure_at = 0.0
+    
+    def record(self, latency: float, success: bool, cooldown_seconds: float, max_failures: int) -> None:
+        """Registra el resultado de una llamada."""
+        self.calls += 1
+        self.error_rate_ewma = (1 - self.alpha) * self.error_rate_ewma + self.alpha * (0.0 if success else 1.0)
+        if success:
+            self.consecutive_failures = 0
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma = (1 - self.alpha) * self.latency_ewma + self.alpha * latency
+        else:
+            self.errors += 1
+            self.consecutive_failures += 1
+            self.last_failure_at = time.monotonic()
+            if self.consecutive_failures >= max_failures:
+                self.cooldown_until = time.monotonic() + cooldown_seconds
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Representación serializable de las estadísticas."""
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "error_rate_ewma": round(self.error_rate_ewma, 3),
+            "consecutive_failures": self.consecutive_failures,
+            "cooling_down": self.cooldown_until > time.monotonic(),
+        }
+
+
+class ModelRouter:
+    """Enrutador de modelos por etapa del pipeline.
+    
+    Cada etapa tiene una lista ordenada de modelos (principal y alternativas). El
+    enrutador mantiene estadísticas de latencia y errores por modelo y, cuando uno
+    se degrada, pasa automáticamente a la siguiente alternativa.
+    """
+    
+    def __init__(self,
+                 policy: Optional[Dict[str, List[Any]]] = None,
+                 latency_budgets: Optional[Dict[str, float]] = None,
+                 error_threshold: float = 0.5,
+                 cooldown_seconds: float = 30.0,
+                 max_consecutive_failures: int = 3,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 scheduler: Optional[FairScheduler] = None):
+        """Inicializa el enrutador.
+        
+        Args:
+            policy: Modelos por etapa; cada entrada puede ser un ID de modelo o un
+                diccionario compatible con ModelConfiguration
+            latency_budgets: Latencia media tolerada por etapa antes de preferir una alternativa
+            error_threshold: Tasa de errores (media móvil) a partir de la cual un modelo se considera degradado
+            cooldown_seconds: Tiempo durante el que se evita un modelo tras fallos consecutivos
+            max_consecutive_failures: Fallos consecutivos que activan el enfriamiento
+            rate_limiter: Presupuesto global de llamadas a los LLM (None para no limitar)
+            scheduler: Planificador justo entre tenants (None para no planificar)
+        """
+        raw_policy = {**DEFAULT_STAGE_POLICY, **(policy or {})}
+        self.policy = {
+            stage: [self._to_model_config(entry) for entry in entries]
+            for stage, entries in raw_policy.items()
+        }
+        self.latency_budgets = {**DEFAULT_LATENCY_BUDGETS, **(latency_budgets or {})}
+        self.error_threshold = error_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.max_consecutive_failures = max_consecutive_failures
+        self.rate_limiter = rate_limiter
+        self.scheduler = scheduler
+        self._health: Dict[str, ModelHealth] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _to_model_config(entry: Any) -> ModelConfiguration:
+        """Convierte una entrada de la política en ModelConfiguration."""
+        if isinstance(entry, ModelConfiguration):
+            return entry
+        if isinstance(entry, str):
+            return ModelConfiguration(model_id=entry)
+        return ModelConfiguration(**entry)
+    
+    def _get_health(self, model_config: ModelConfiguration) -> ModelHealth:
+        key = model_key(model_config)
+        with self._lock:
+            if key not in self._health:
+                self._health[key] = ModelHealth()
+            return self._health[key]
+    
+    def is_degraded(self, model_config: ModelConfiguration) -> bool:
+        """Indica si un modelo está degradado por errores recientes.
+        
+        La degradación por tasa de errores caduca tras ``cooldown_seconds`` sin fallos,
+        de modo que el modelo vuelve a probarse y puede recuperarse.
+        """
+        health = self._get_health(model_config)
+        now = time.monotonic()
+        return (health.cooldown_until > now
+                or (health.error_rate_ewma >= self.error_threshold
+                    and now - health.last_failure_at < self.cooldown_seconds))
+    
+    def candidates(self, stage: str, pinned: Optional[ModelConfiguration] = None) -> List[ModelConfiguration]:
+        """Obtiene los modelos a probar para una etapa, en orden de preferencia.
+        
+        Args:
+            stage: Nombre de la etapa ('outline', 'writing', ...)
+            pinned: Modelo fijado explícitamente por la petición
+        
+        Returns:
+            Lista de configuraciones: primero las sanas, después las degradadas
+        """
+        policy = list(self.policy.get(stage) or self.policy["default"])
+        if pinned is not None:
+            policy = [pinned] + [m for m in policy if model_key(m) != model_key(pinned)]
+        
+        healthy = [m for m in policy if not self.is_degraded(m)]
+        degraded = [m for m in policy if self.is_degraded(m)]
+        
+        # Si el modelo preferido supera el presupuesto de latencia, adelantar una alternativa más rápida
+        budget = self.latency_budgets.get(stage, self.latency_budgets["default"])
+        if pinned is None and len(healthy) > 1:
+            primary_latency = self._get_health(healthy[0]).latency_ewma
+            if primary_latency is not None and primary_latency > budget:
+                faster = [
+                    m for m in healthy[1:]
+                    if (self._get_health(m).latency_ewma or 0.0) < primary_latency
+                ]
+                if faster:
+                    healthy.remove(faster[0])
+                    healthy.insert(0, faster[0])
+        
+        return healthy + degraded
+    
+    def record(self, model_config: ModelConfiguration, latency: float, success: bool) -> None:
+        """Registra el resultado de una llamada a un modelo."""
+        health = self._get_health(model_config)
+        with self._lock:
+            health.record(latency, success, self.cooldown_seconds, self.max_consecutive_failures)
+    
+    def execute(self, stage: str, call: Callable[[ModelConfiguration], T],
+                pinned: Optional[ModelConfiguration] = None) -> T:
+        """Ejecuta una llamada probando los modelos de la etapa hasta que uno responda.
+        
+        Cada modelo se resuelve a un endpoint concreto a través del pool de proveedores.
+        Las llamadas esperan su turno en el planificador justo según el tenant de la
+        petición en curso (o el de la clave de API del modelo fijado). Solo los fallos
+        del proveedor (conexión, tiempo de espera, 429 o 5xx) cuentan contra el modelo y
+        hacen probar la siguiente alternativa; un error de la petición (400, 401, 422,
+        contexto demasiado largo...) se repetiría con cualquier modelo y se propaga. Si
+        la petición agota su plazo o se cancela, no se prueban más alternativas.
+        
+        Args:
+            stage: Nombre de la etapa
+            call: Función que realiza la llamada con la configuración de modelo recibida
+            pinned: Modelo fijado explícitamente por la petición
+        
+        Returns:
+            Resultado de la primera llamada que tenga éxito
+        
+        Raises:
+            Exception: El error de la llamada si no se debe al proveedor, o el del último
+                modelo probado
+        """
+        tenant = tenant_var.get()
+        if tenant == "default" and pinned is not None and pinned.api_key:
+            tenant = tenant_for_key(pinned.api_key)
+        
+        last_error: Optional[Exception] = None
+        for model_config in self.candidates(stage, pinned):
+            if model_config.provider not in SUPPORTED_PROVIDERS:
+                raise ValueError(f"Proveedor de modelo no soportado: {model_config.provider}")
+            check_deadline()
+            with self._turn(tenant) as usage:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire()
+                start = time.perf_counter()
+                try:
+                    result = provider_pool.execute(model_config, call)
+                except DeadlineExceeded:
+                    raise
+                except Exception as e:
+                    deadline = deadline_var.get()
+                    if deadline is not None and deadline.remaining() <= 0:
+                        # El error se debe al plazo (tiempo de espera agotado), no al modelo
+                        logger.warning(f"Etapa '{stage}' interrumpida por el plazo de la petición: {str(e)}")
+                        deadline.check()
+                    if not is_endpoint_failure(e):
+                        raise
+                    self.record(model_config, time.perf_counter() - start, success=False)
+                    logger.warning(f"Fallo en la etapa '{stage}' con el modelo {model_config.model_id}: {str(e)}")
+                    last_error = e
+                    continue
+                self.record(model_config, time.perf_counter() - start, success=True)
+                # Las respuestas no exponen el uso real de forma uniforme: se estima por longitud
+                usage["tokens"] = estimate_tokens(result)
+            return result
+        
+        raise last_error or RuntimeError(f"No hay modelos configurados para la etapa '{stage}'")
+    
+    @contextmanager
+    def _turn(self, tenant: str) -> Iterator[Dict[str, int]]:
+        if self.scheduler is None:
+            yield {"tokens": 0}
+            return
+        with self.scheduler.slot(tenant) as usage:
+            yield usage
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Estadísticas actuales por modelo."""
+        with self._lock:
+            return {key: health.to_dict() for key, health in self._health.items()}
+
+
+def _load_policy() -> Optional[Dict[str, List[Any]]]:
+    """Carga la política de enrutado desde la configuración (JSON)."""
+    if not settings.MODEL_ROUTING:
+        return None
+    try:
+        return json.loads(settings.MODEL_ROUTING)
+    except json.JSONDecodeError as e:
+        logger.error(f"MODEL_ROUTING no es un JSON válido, se usa la política por defecto: {str(e)}")
+        return None
+
+
+# Instancia compartida del enrutador
+model_router = ModelRouter(
+    policy=_load_policy(),
+    error_threshold=settings.MODEL_ERROR_THRESHOLD,
+    cooldown_seconds=settings.MODEL_COOLDOWN_SECONDS,
+    rate_limiter=(
+        RateLimiter(settings.LLM_CALLS_PER_MINUTE, burst=settings.LLM_CALLS_BURST)
+        if settings.LLM_CALLS_PER_MINUTE > 0 else None
+    ),
+    scheduler=fair_scheduler,
+)
@@ -1,7 +1,12 @@
-from typing import Dict, Any, List, Optional
-from openai import OpenAI
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
+from common.models.config import ModelConfiguration
+from core.deadline import remaining_time
 import os
 import logging
+import threading
+
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 logger = logging.getLogger(__name__)
 
@@ -14,13 +19,69 @@ class OpenAIService:
         Args:
             api_key: Clave de API de OpenAI (opcional, por defecto usa la variable de entorno)
         """
-        self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self._client: Optional["OpenAI"] = None
+        self._clients: Dict[Tuple[Optional[str], Optional[str]], "OpenAI"] = {}
+        self._clients_lock = threading.Lock()
+    
+    @property
+    def client(self) -> "OpenAI":
+        """Cliente por defecto, creado en el primer uso (importar openai es costoso)."""
+        if self._client is None:
+            with self._clients_lock:
+                if self._client is None:
+                    from openai import OpenAI
+                    self._client = OpenAI(api_key=self.api_key)
+        return self._client
+    
+    def warm_up(self) -> None:
+        """Abre la conexión con el proveedor por adelantado con una petición ligera."""
+        self.client.with_options(max_retries=0, timeout=10).models.list()
+    
+    def _resolve(self, model: str, model_config: Optional[ModelConfiguration]) -> Tuple["OpenAI", str]:
+        """Obtiene el cliente y el modelo a usar para una llamada.
+        
+        Args:
+            model: Modelo por defecto de la llamada
+            model_config: Configuración de modelo enrutada (puede apuntar a otro endpoint)
+            
+        Returns:
+            Tupla (cliente, ID de modelo)
+        """
+        client, model = self._resolve_client(model, model_config)
+        # Con plazo, la llamada no puede esperar al proveedor más allá del tiempo restante
+        remaining = remaining_time()
+        if remaining is not None:
+            client = client.with_options(timeout=max(remaining, 1.0))
+        return client, model
+    
+    def _resolve_client(self, model: str, model_config: Optional[ModelConfiguration]) -> Tuple["OpenAI", str]:
+        if model_config is None:
+            return self.client, model
+        if not model_config.base_url and not model_config.api_key:
+            return self.client, model_config.model_id
+        
+        key = (model_config.base_url, model_config.api_key)
+        default_client = self.client
+        with self._clients_lock:
+            if key not in self._clients:
+                from openai import OpenAI
+                self._clients[key] = OpenAI(
+                    api_key=model_config.api_key or default_client.api_key,
+                    base_url=model_config.base_url
+                )
+            return self._clients[key], model_config.model_id
+    
+    def client_for(self, model_config: ModelConfiguration) -> "OpenAI":
+        """Cliente del endpoint de una configuración de modelo (por ejemplo, para la API de lotes)."""
+        return self._resolve_client(model_config.model_id, model_config)[0]
     
     def chat_completion(self, 
                         system_message: str, 
                         user_message: str, 
                         model: str = "gpt-4o", 
-                        temperature: float = 0.7) -> str:
+                        temperature: float = 0.7,
+                        model_config: Optional[ModelConfiguration] = None) -> str:
         """Genera una respuesta usando el modelo de chat de OpenAI.
         
         Args:
@@ -28,12 +89,14 @@ class OpenAIService:
             user_message: Mensaje del usuario
             model: Modelo a utilizar
             temperature: Temperatura para la generación
+            model_config: Configuración de modelo que sustituye a ``model`` (endpoint incluido)
             
         Returns:
             Texto generado
         """
+        client, model = self._resolve(model, model_config)
         try:
-            response = self.client.chat.completions.create(
+            response = client.chat.completions.create(
                 model=model,
                 messages=[
                     {"role": "system", "content": system_message},
@@ -46,18 +109,21 @@ class OpenAIService:
             logger.error(f"Error en chat_completion: {str(e)}")
             raise
     
-    def web_search(self, query: str, model: str = "gpt-4o") -> str:
+    def web_search(self, query: str, model: str = "gpt-4o",
+                   model_config: Optional[ModelConfiguration] = None) -> str:
         """Realiza una búsqueda web sobre un tema.
         
         Args:
             query: Consulta de búsqueda
             model: Modelo a utilizar
+            model_config: Configuración de modelo que sustituye a ``model`` (endpoint incluido)
             
         Returns:
             Resultados de la búsqueda
         """
+        client, model = self._resolve(model, model_config)
         try:
-            response = self.client.chat.completions.create(
+            response = client.chat.completions.create(
                 model=model,
                 tools=[{
                     "type": "web_search",
@@ -73,19 +139,22 @@ class OpenAIService:
             logger.error(f"Error en web_search: {str(e)}")
             raise
     
-    def analyze_url(self, url: str, query: str, model: str = "gpt-4o-search-preview") -> str:
+    def analyze_url(self, url: str, query: str, model: str = "gpt-4o-search-preview",
+                    model_config: Optional[ModelConfiguration] = None) -> str:
         """Analiza una URL para extraer información relevante.
         
         Args:
             url: URL a analizar
             query: Consulta sobre qué información extraer
             model: Modelo a utilizar
+            model_config: Configuración de modelo que sustituye a ``model`` (endpoint incluido)
             
         Returns:
             Información extraída
         """
+        client, model = self._resolve(model, model_config)
         try:
-            response = self.client.chat.completions.create(
+            response = client.chat.completions.create(
                 model=model,
                 web_search_options={},
                 messages=[
@@ -0,0 +1,287 @@
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, TypeVar
+import json
+import logging
+import threading
+import time
+from common.models.config import ModelConfiguration
+from core.config import settings
+from core.deadline import DeadlineExceeded, deadline_var
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Errores de transporte (por nombre, para no importar openai ni httpx al cargar el módulo)
+TRANSPORT_ERRORS = ("APIConnectionError", "APITimeoutError", "TransportError", "TimeoutException")
+
+
+def is_endpoint_failure(error: Exception) -> bool:
+    """Indica si un error se debe al endpoint: conexión, tiempo de espera, 429 o 5xx.
+    
+    El resto (peticiones inválidas, 4xx, errores al procesar la respuesta) fallaría
+    igual en cualquier otro endpoint.
+    """
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return any(cls.__name__ in TRANSPORT_ERRORS for cls in type(error).__mro__)
+
+
+class CircuitBreaker:
+    """Cortacircuitos por endpoint.
+
+    Se abre cuando se acumulan ``failure_threshold`` errores dentro de
+    ``window_seconds``. Tras ``open_seconds`` pasa a semiabierto y deja pasar una
+    única petición de prueba: si tiene éxito se cierra, si falla vuelve a abrirse.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, window_seconds: float = 30.0, open_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self._failures: Deque[float] = deque()
+
+    def allows(self) -> bool:
+        """Indica si el endpoint puede recibir una petición ahora."""
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+            self.state = self.HALF_OPEN
+            self.probe_in_flight = False
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN:
+            return not self.probe_in_flight
+        return False
+
+    def on_dispatch(self) -> None:
+        """Marca el envío de una petición (la sonda en estado semiabierto)."""
+        if self.state == self.HALF_OPEN:
+            self.probe_in_flight = True
+
+    def on_success(self, started_at: float) -> None:
+        """Registra una llamada correcta iniciada en ``started_at`` (reloj monotónico).
+        
+        Una llamada lenta que empezó antes de que se abriera el cortacircuitos no
+        demuestra que el endpoint se haya recuperado: no lo cierra.
+        """
+        if self.state != self.CLOSED and started_at < self.opened_at:
+            return
+        if self.state == self.HALF_OPEN:
+            logger.info("Cortacircuitos cerrado tras una sonda correcta")
+        self.state = self.CLOSED
+        self.probe_in_flight = False
+        self._failures.clear()
+
+    def on_abandon(self) -> None:
+        """Libera la sonda de una llamada cuyo resultado no dice nada del endpoint."""
+        self.probe_in_flight = False
+    
+    def on_failure(self) -> None:
+        now = time.monotonic()
+        self._failures.append(now)
+        while self._failures and now - self._failures[0] > self.window_seconds:
+            self._failures.popleft()
+        if self.state == self.HALF_OPEN or len(self._failures) >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = now
+            self.probe_in_flight = False
+
+
+class Endpoint:
+    """Endpoint compatible con OpenAI (URL base y/o API key) del pool."""
+
+    def __init__(self, name: str, base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 weight: float = 1.0, models: Optional[List[str]] = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        """Inicializa el endpoint.
+
+        Args:
+            name: Nombre identificativo
+            base_url: URL base de la API (None para la de OpenAI)
+            api_key: API key a utilizar en este endpoint
+            weight: Peso relativo en el reparto de carga
+            models: Modelos servidos (None para todos)
+            breaker: Cortacircuitos del endpoint
+        """
+        self.name = name
+        self.base_url = base_url
+        self.api_key = api_key
+        self.weight = max(weight, 0.01)
+        self.models = set(models) if models else None
+        self.breaker = breaker or CircuitBreaker()
+        self.outstanding = 0
+        self.latency_ewma: Optional[float] = None
+        self.calls = 0
+        self.errors = 0
+
+    def serves(self, model_id: str) -> bool:
+        return self.models is None or model_id in self.models
+
+    def score(self) -> float:
+        """Coste estimado de enviar una petición más: menor es mejor."""
+        latency = self.latency_ewma if self.latency_ewma is not None else 1.0
+        return (self.outstanding + 1) * latency / self.weight
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "weight": self.weight,
+            "outstanding": self.outstanding,
+            "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "calls": self.calls,
+            "errors": self.errors,
+            "breaker": self.breaker.state,
+        }
+
+
+class ProviderPool:
+    """Pool de endpoints entre los que se reparten las llamadas a los LLM.
+
+    Elige el endpoint con menos peticiones en curso ponderadas por su latencia
+    observada, y descarta temporalmente los que tienen el cortacircuitos abierto.
+    Sin endpoints configurados, las llamadas van directamente al endpoint del modelo.
+    """
+
+    def __init__(self, endpoints: Optional[List[Endpoint]] = None, alpha: float = 0.2):
+        self.endpoints = endpoints or []
+        self.alpha = alpha
+        self._lock = threading.Lock()
+
+    def _acquire(self, model_id: str, exclude: List[str]) -> Optional[Endpoint]:
+        """Reserva el mejor endpoint disponible para un modelo."""
+        with self._lock:
+            available = [
+                e for e in self.endpoints
+                if e.name not in exclude and e.serves(model_id) and e.breaker.allows()
+            ]
+            if not available:
+                return None
+            endpoint = min(available, key=lambda e: e.score())
+            endpoint.breaker.on_dispatch()
+            endpoint.outstanding += 1
+            return endpoint
+
+    def _release(self, endpoint: Endpoint, started_at: float, success: Optional[bool]) -> None:
+        """Libera el endpoint con el resultado de la llamada (None si no es atribuible al endpoint)."""
+        latency = time.monotonic() - started_at
+        with self._lock:
+            endpoint.outstanding -= 1
+            endpoint.calls += 1
+            if success is None:
+                endpoint.breaker.on_abandon()
+            elif success:
+                endpoint.breaker.on_success(started_at)
+                if endpoint.latency_ewma is None:
+                    endpoint.latency_ewma = latency
+                else:
+                    endpoint.latency_ewma = (1 - self.alpha) * endpoint.latency_ewma + self.alpha * latency
+            else:
+                endpoint.errors += 1
+                endpoint.breaker.on_failure()
+
+    def execute(self, model_config: ModelConfiguration, call: Callable[[ModelConfiguration], T]) -> T:
+        """Ejecuta una llamada en el mejor endpoint, probando otro si falla.
+
+        Args:
+            model_config: Modelo solicitado
+            call: Función que realiza la llamada con la configuración resuelta al endpoint
+
+        Returns:
+            Resultado de la llamada
+        
+        Raises:
+            DeadlineExceeded: Si la petición agota su plazo o se cancela (sin probar otros endpoints)
+            Exception: El error de la llamada si no se debe al endpoint (por ejemplo, un 4xx),
+                o el del último endpoint probado
+        """
+        # Un endpoint explícito en la configuración del modelo no pasa por el pool
+        if model_config.base_url or model_config.api_key or not self.endpoints:
+            return call(model_config)
+
+        tried: List[str] = []
+        last_error: Optional[Exception] = None
+        while True:
+            endpoint = self._acquire(model_config.model_id, tried)
+            if endpoint is None:
+                break
+            tried.append(endpoint.name)
+            resolved = model_config.model_copy(update={
+                "base_url": endpoint.base_url,
+                "api_key": endpoint.api_key,
+            })
+            start = time.monotonic()
+            try:
+                result = call(resolved)
+            except DeadlineExceeded:
+                self._release(endpoint, start, success=None)
+                raise
+            except Exception as e:
+                deadline = deadline_var.get()
+                if deadline is not None and deadline.remaining() <= 0:
+                    # Tiempo de espera agotado por el plazo de la petición, no por el endpoint
+                    self._release(endpoint, start, success=None)
+                    deadline.check()
+                if not is_endpoint_failure(e):
+                    # Un error de la petición se repetiría en cualquier otro endpoint
+                    self._release(endpoint, start, success=None)
+                    raise
+                self._release(endpoint, start, success=False)
+                logger.warning(f"Fallo en el endpoint '{endpoint.name}' con el modelo {model_config.model_id}: {str(e)}")
+                last_error = e
+                continue
+            except BaseException:
+                # Cancelación (asyncio.CancelledError) o interrupción: sin reintentos
+                self._release(endpoint, start, success=None)
+                raise
+            self._release(endpoint, start, success=True)
+            return result
+
+        # Sin endpoints disponibles (circuitos abiertos) el enrutador puede probar otro modelo
+        raise last_error or ConnectionError(f"No hay endpoints disponibles para el modelo {model_config.model_id}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado actual de cada endpoint."""
+        with self._lock:
+            return {e.name: e.to_dict() for e in self.endpoints}
+
+
+def _load_endpoints() -> List[Endpoint]:
+    """Carga los endpoints del pool desde la configuración (JSON)."""
+    if not settings.PROVIDER_ENDPOINTS:
+        return []
+    try:
+        entries = json.loads(settings.PROVIDER_ENDPOINTS)
+    except json.JSONDecodeError as e:
+        logger.error(f"PROVIDER_ENDPOINTS no es un JSON válido, se usa el endpoint por defecto: {str(e)}")
+        return []
+
+    return [
+        Endpoint(
+            name=entry.get("name") or f"endpoint-{i}",
+            base_url=entry.get("base_url"),
+            api_key=entry.get("api_key"),
+            weight=float(entry.get("weight", 1.0)),
+            models=entry.get("models"),
+            breaker=CircuitBreaker(
+                failure_threshold=settings.PROVIDER_BREAKER_FAILURES,
+                window_seconds=settings.PROVIDER_BREAKER_WINDOW_SECONDS,
+                open_seconds=settings.PROVIDER_BREAKER_OPEN_SECONDS,
+            ),
+        )
+        for i, entry in enumerate(entries)
+    ]
+
+
+# Instancia compartida del pool
+provider_pool = ProviderPool(_load_endpoints())
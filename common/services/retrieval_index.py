@@ -0,0 +1,212 @@
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from common.services.sqlite_store import SQLiteStore
+from core.config import settings
+
+# Tipos de pasaje indexados
+KIND_WEB_SEARCH = "web_search"
+KIND_URL = "url"
+KIND_SYNTHESIS = "synthesis"
+KIND_DOCUMENT = "document"
+
+# Palabras vacías que no aportan a la relevancia de una consulta
+STOPWORDS = {
+    "para", "como", "sobre", "entre", "desde", "hasta", "pero", "porque", "cuando", "donde",
+    "esta", "este", "estos", "estas", "esos", "esas", "tiene", "tienen", "puede", "pueden",
+    "with", "from", "that", "this", "what", "your", "their", "about", "into",
+}
+
+
+def query_terms(text: str) -> Set[str]:
+    """Obtiene los términos significativos de un texto (sin tildes ni palabras vacías)."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return {term for term in re.findall(r'\w+', text) if len(term) > 3 and term not in STOPWORDS}
+
+
+class RetrievalIndex(SQLiteStore):
+    """Índice léxico local (SQLite FTS5, ranking BM25) sobre el material de investigación.
+    
+    Guarda los resúmenes de búsquedas web y de URLs, las síntesis de investigación
+    y los fragmentos de los documentos subidos, para que los temas recurrentes se
+    consulten localmente antes de volver a llamar a los modelos. Cada pasaje se
+    indexa al producirse (actualización incremental) y las consultas se resuelven
+    en unos pocos milisegundos. Los pasajes de investigación guardan el tenant que
+    los produjo y solo se devuelven a peticiones del mismo tenant.
+    """
+    
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS passages (
+                id INTEGER PRIMARY KEY,
+                kind TEXT NOT NULL,
+                source TEXT NOT NULL,
+                tema TEXT NOT NULL DEFAULT '',
+                tenant TEXT NOT NULL DEFAULT '',
+                document_id TEXT,
+                page INTEGER,
+                created_at REAL NOT NULL,
+                text TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS passages_document ON passages (document_id);
+            CREATE VIRTUAL TABLE IF NOT EXISTS passages_fts USING fts5(
+                text, tema,
+                content='passages', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+        """)
+        # Índices creados antes de guardar el tenant: sus pasajes quedan sin tenant
+        # y ya no se reutilizan
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(passages)")}
+        if "tenant" not in columns:
+            conn.execute("ALTER TABLE passages ADD COLUMN tenant TEXT NOT NULL DEFAULT ''")
+        conn.execute("DROP INDEX IF EXISTS passages_source")
+        conn.execute("CREATE INDEX IF NOT EXISTS passages_tenant_source ON passages (tenant, kind, source, created_at)")
+    
+    def add(self, kind: str, source: str, text: str, tema: str = "", tenant: str = "",
+            document_id: Optional[str] = None, page: Optional[int] = None) -> None:
+        """Indexa un pasaje.
+        
+        Args:
+            kind: Tipo de pasaje (KIND_*)
+            source: Origen (URL, nombre de documento...)
+            text: Texto del pasaje
+            tema: Tema para el que se generó, si aplica
+            tenant: Tenant de la petición que lo produjo
+            document_id: Documento al que pertenece, si aplica
+            page: Página del documento, si aplica
+        """
+        with self._connect() as conn:
+            self._insert(conn, [(kind, source, tema, tenant, document_id, page, time.time(), text)])
+    
+    def add_document_chunks(self, document_id: str, source: str,
+                            chunks: Iterable[Tuple[int, str]], batch_size: int = 64) -> int:
+        """Indexa los fragmentos de un documento a medida que se generan.
+        
+        Args:
+            document_id: ID del documento
+            source: Nombre del documento
+            chunks: Tuplas (página, texto)
+            batch_size: Fragmentos por transacción
+        
+        Returns:
+            Número de fragmentos indexados
+        """
+        count = 0
+        batch = []
+        now = time.time()
+        with self._connect() as conn:
+            for page, text in chunks:
+                batch.append((KIND_DOCUMENT, source, "", "", document_id, page, now, text))
+                count += 1
+                if len(batch) >= batch_size:
+                    self._insert(conn, batch)
+                    conn.commit()
+                    batch = []
+            if batch:
+                self._insert(conn, batch)
+        return count
+    
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, rows: List[Tuple]) -> None:
+        for row in rows:
+            cursor = conn.execute(
+                "INSERT INTO passages (kind, source, tema, tenant, document_id, page, created_at, text) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                row
+            )
+            conn.execute(
+                "INSERT INTO passages_fts (rowid, text, tema) VALUES (?, ?, ?)",
+                (cursor.lastrowid, row[7], row[2])
+            )
+    
+    def remove_document(self, document_id: str) -> None:
+        """Elimina del índice los fragmentos de un documento."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO passages_fts (passages_fts, rowid, text, tema) "
+                "SELECT 'delete', id, text, tema FROM passages WHERE document_id = ?",
+                (document_id,)
+            )
+            conn.execute("DELETE FROM passages WHERE document_id = ?", (document_id,))
+    
+    def latest(self, kind: str, source: str, tenant: str, max_age: Optional[float] = None) -> Optional[str]:
+        """Obtiene el pasaje más reciente de un tipo y origen (por ejemplo, el resumen de una URL).
+        
+        Args:
+            kind: Tipo de pasaje
+            source: Origen exacto
+            tenant: Tenant al que pertenece el pasaje
+            max_age: Antigüedad máxima en segundos (None = sin límite)
+        
+        Returns:
+            Texto del pasaje, o None si no hay ninguno suficientemente reciente
+        """
+        min_created = time.time() - max_age if max_age else 0
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT text FROM passages WHERE tenant = ? AND kind = ? AND source = ? AND created_at >= ? "
+                "ORDER BY created_at DESC LIMIT 1",
+                (tenant, kind, source, min_created)
+            ).fetchone()
+        return row["text"] if row else None
+    
+    def search(self, query: str, limit: int = 5, kinds: Optional[List[str]] = None,
+               document_ids: Optional[List[str]] = None, max_age: Optional[float] = None,
+               tenant: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Busca los pasajes más relevantes para una consulta (BM25).
+        
+        Args:
+            query: Texto de la consulta
+            limit: Número máximo de pasajes
+            kinds: Tipos de pasaje admitidos (None = todos)
+            document_ids: Restringir a los fragmentos de estos documentos
+            max_age: Antigüedad máxima en segundos (None = sin límite)
+            tenant: Restringir a los pasajes de este tenant
+        
+        Returns:
+            Pasajes ordenados por relevancia, con su puntuación BM25 (mayor es mejor) y la
+            fracción de términos de la consulta que contienen ('coverage')
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+        
+        match = " OR ".join(f'"{term}"' for term in sorted(terms))
+        # El texto va en la última columna de 'passages' para que filtrar por tipo,
+        # documento o antigüedad no obligue a leerlo en cada coincidencia
+        sql = (
+            "SELECT p.id, p.kind, p.source, p.tema, p.document_id, p.page, p.created_at, p.text, "
+            "-bm25(passages_fts, 1.0, 2.0) AS score "
+            "FROM passages_fts CROSS JOIN passages p ON p.id = passages_fts.rowid "
+            "WHERE passages_fts MATCH ?"
+        )
+        params: List[Any] = [match]
+        if kinds:
+            sql += f" AND p.kind IN ({','.join('?' for _ in kinds)})"
+            params += kinds
+        if document_ids:
+            sql += f" AND p.document_id IN ({','.join('?' for _ in document_ids)})"
+            params += document_ids
+        if tenant is not None:
+            sql += " AND p.tenant = ?"
+            params.append(tenant)
+        if max_age:
+            sql += " AND p.created_at >= ?"
+            params.append(time.time() - max_age)
+        sql += " ORDER BY score DESC LIMIT ?"
+        params.append(limit)
+        
+        with self._connect() as conn:
+            rows = [dict(row) for row in conn.execute(sql, params)]
+        for row in rows:
+            row["coverage"] = len(terms & query_terms(f"{row['text']} {row['tema']}")) / len(terms)
+        return rows
+
+
+# Instancia compartida del índice
+retrieval_index = RetrievalIndex(os.path.join(settings.DATA_DIR, "retrieval.db"))
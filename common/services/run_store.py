@@ -0,0 +1,124 @@
+from typing import Any, Dict, List, Optional
+import json
+import os
+import sqlite3
+import time
+from common.services.sqlite_store import SQLiteStore
+from core.config import settings
+
+# Cada cuántas ejecuciones guardadas se eliminan las caducadas
+PRUNE_EVERY = 200
+
+
+class RunStore(SQLiteStore):
+    """Artefactos de las generaciones completadas (investigación, outline y contenido final).
+    
+    Permiten derivar otros formatos de una generación (por ejemplo, publicaciones de
+    LinkedIn a partir de un artículo) sin repetir la investigación ni la estructura.
+    Cada ejecución guarda el tenant que la produjo y solo se devuelve a ese tenant.
+    """
+    
+    def __init__(self, db_path: str, max_age: float = 72 * 3600):
+        """Inicializa el almacén (la base de datos se prepara en el primer uso).
+        
+        Args:
+            db_path: Ruta del fichero SQLite
+            max_age: Antigüedad máxima en segundos de las ejecuciones guardadas
+        """
+        super().__init__(db_path)
+        self.max_age = max_age
+        self._saved = 0
+    
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                tenant TEXT NOT NULL DEFAULT '',
+                tema TEXT NOT NULL,
+                estilos TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                research TEXT,
+                outline TEXT,
+                content TEXT NOT NULL,
+                summary TEXT
+            )
+        """)
+        # Almacenes creados antes de guardar el tenant: sus ejecuciones quedan sin tenant
+        # y ya no se devuelven
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(runs)")}
+        if "tenant" not in columns:
+            conn.execute("ALTER TABLE runs ADD COLUMN tenant TEXT NOT NULL DEFAULT ''")
+        conn.execute("CREATE INDEX IF NOT EXISTS runs_created ON runs (created_at)")
+    
+    def save(self, run_id: str, kind: str, tema: str, estilos: List[str], research: Optional[str],
+             outline: Optional[Dict[str, Any]], content: str, summary: Optional[str] = None,
+             tenant: str = "") -> None:
+        """Guarda los artefactos de una ejecución.
+        
+        Args:
+            run_id: ID de la ejecución
+            kind: Tipo de contenido generado ('blog', ...)
+            tema: Tema
+            estilos: Estilos utilizados
+            research: Investigación sintetizada
+            outline: Estructura del contenido
+            content: Contenido final
+            summary: Resumen del contenido
+            tenant: Tenant de la petición que la produjo
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO runs (id, kind, tenant, tema, estilos, created_at, research, outline, content, summary) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id, kind, tenant, tema, json.dumps(estilos), time.time(), research,
+                    json.dumps(outline, ensure_ascii=False) if outline else None, content, summary
+                )
+            )
+        self._saved += 1
+        if self._saved % PRUNE_EVERY == 0:
+            self.prune()
+    
+    def get(self, run_id: str, tenant: str) -> Optional[Dict[str, Any]]:
+        """Obtiene los artefactos de una ejecución del tenant.
+        
+        Args:
+            run_id: ID de la ejecución
+            tenant: Tenant que hace la petición
+        
+        Returns:
+            Artefactos de la ejecución, o None si no existe, es de otro tenant o ha caducado
+        """
+        row = self._connect().execute(
+            "SELECT * FROM runs WHERE id = ? AND tenant = ? AND created_at >= ?",
+            (run_id, tenant, time.time() - self.max_age)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "tema": row["tema"],
+            "estilos": json.loads(row["estilos"]),
+            "research": row["research"] or "",
+            "outline": json.loads(row["outline"]) if row["outline"] else None,
+            "content": row["content"],
+            "summary": row["summary"] or "",
+        }
+    
+    def prune(self) -> int:
+        """Elimina las ejecuciones caducadas.
+        
+        Returns:
+            Número de ejecuciones eliminadas
+        """
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM runs WHERE created_at < ?", (time.time() - self.max_age,)).rowcount
+
+
+# Instancia compartida del almacén
+run_store = RunStore(
+    os.path.join(settings.DATA_DIR, "runs.db"),
+    max_age=settings.RUN_STORE_MAX_AGE_HOURS * 3600
+)
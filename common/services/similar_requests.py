@@ -0,0 +1,185 @@
+from typing import Any, Dict, List, Optional
+from array import array
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from common.services.sqlite_store import SQLiteStore
+from common.utils.minhash import MinHasher, normalize_tokens
+from core.config import settings
+
+# Cada cuántas peticiones guardadas se eliminan las caducadas
+PRUNE_EVERY = 1000
+
+
+class SimilarRequestStore(SQLiteStore):
+    """Memoria de peticiones recientes para reutilizar su trabajo en temas casi idénticos.
+    
+    Cada petición se guarda con la firma MinHash de su tema e instrucciones
+    normalizados, junto con la investigación sintetizada y el outline que produjo.
+    Las bandas LSH de la firma se indexan en SQLite, de modo que buscar peticiones
+    similares son unas pocas consultas por índice independientemente de cuántas
+    peticiones haya guardadas. Las claves de banda incluyen el tenant, de modo que
+    solo se reutiliza el trabajo de peticiones del mismo tenant.
+    """
+    
+    def __init__(self, db_path: str, threshold: float = 0.75, max_age: float = 24 * 3600,
+                 hasher: Optional[MinHasher] = None):
+        """Inicializa el almacén (la base de datos se prepara en el primer uso).
+        
+        Args:
+            db_path: Ruta del fichero SQLite
+            threshold: Similitud de Jaccard estimada mínima para considerar dos peticiones equivalentes
+            max_age: Antigüedad máxima en segundos de las peticiones reutilizables
+            hasher: Generador de firmas MinHash
+        """
+        super().__init__(db_path)
+        self.threshold = threshold
+        self.max_age = max_age
+        self.hasher = hasher or MinHasher()
+    
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS requests (
+                id INTEGER PRIMARY KEY,
+                tenant TEXT NOT NULL DEFAULT '',
+                tema TEXT NOT NULL,
+                prompt TEXT,
+                longitud TEXT NOT NULL,
+                estilos TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                research TEXT,
+                outline TEXT
+            );
+            CREATE TABLE IF NOT EXISTS bands (
+                band_key INTEGER NOT NULL,
+                request_id INTEGER NOT NULL,
+                PRIMARY KEY (band_key, request_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS bands_request ON bands (request_id);
+        """)
+        # Almacenes creados antes de guardar el tenant: sus peticiones ya no coinciden
+        # con ninguna clave de banda y caducan sin reutilizarse
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(requests)")}
+        if "tenant" not in columns:
+            conn.execute("ALTER TABLE requests ADD COLUMN tenant TEXT NOT NULL DEFAULT ''")
+    
+    def _signature(self, tema: str, prompt_personalizado: Optional[str]) -> tuple:
+        return self.hasher.signature(normalize_tokens(f"{tema} {prompt_personalizado or ''}"))
+    
+    @staticmethod
+    def _band_key(tenant: str, band: int, band_hash: int) -> int:
+        digest = hashlib.blake2b(f"{tenant}:{band}:{band_hash}".encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big", signed=True)
+    
+    def _band_keys(self, tenant: str, signature: tuple) -> List[int]:
+        return [self._band_key(tenant, band, band_hash) for band, band_hash in self.hasher.band_keys(signature)]
+    
+    def find(self, tenant: str, tema: str, prompt_personalizado: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Busca la petición reciente del tenant más parecida por encima del umbral.
+        
+        Args:
+            tenant: Tenant de la petición
+            tema: Tema del artículo
+            prompt_personalizado: Instrucciones adicionales
+        
+        Returns:
+            Datos de la petición (tema, longitud, estilos, research, outline) con su
+            similitud estimada ('similarity'), o None si no hay ninguna suficientemente parecida
+        """
+        signature = self._signature(tema, prompt_personalizado)
+        if not signature:
+            return None
+        
+        keys = self._band_keys(tenant, signature)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT DISTINCT r.id, r.signature FROM bands b JOIN requests r ON r.id = b.request_id "
+                f"WHERE b.band_key IN ({','.join('?' for _ in keys)}) AND r.tenant = ? AND r.created_at >= ? "
+                f"ORDER BY r.created_at DESC LIMIT 64",
+                keys + [tenant, time.time() - self.max_age]
+            ).fetchall()
+            
+            best_id, best_similarity = None, 0.0
+            for row in rows:
+                similarity = self.hasher.similarity(signature, array("Q", row["signature"]))
+                if similarity > best_similarity:
+                    best_id, best_similarity = row["id"], similarity
+            if best_id is None or best_similarity < self.threshold:
+                return None
+            
+            row = conn.execute(
+                "SELECT tema, prompt, longitud, estilos, research, outline FROM requests WHERE id = ?",
+                (best_id,)
+            ).fetchone()
+        
+        return {
+            "tema": row["tema"],
+            "prompt_personalizado": row["prompt"],
+            "longitud": row["longitud"],
+            "estilos": json.loads(row["estilos"]),
+            "research": row["research"] or "",
+            "outline": json.loads(row["outline"]) if row["outline"] else None,
+            "similarity": round(best_similarity, 3),
+        }
+    
+    def add(self, tenant: str, tema: str, prompt_personalizado: Optional[str], longitud: str, estilos: List[str],
+            research: Optional[str], outline: Optional[Dict[str, Any]]) -> None:
+        """Guarda una petición completada y lo que produjo.
+        
+        Args:
+            tenant: Tenant de la petición
+            tema: Tema del artículo
+            prompt_personalizado: Instrucciones adicionales originales (sin la investigación añadida)
+            longitud: Longitud del artículo
+            estilos: Estilos del artículo
+            research: Investigación sintetizada utilizada
+            outline: Outline generado
+        """
+        signature = self._signature(tema, prompt_personalizado)
+        if not signature:
+            return
+        
+        keys = self._band_keys(tenant, signature)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO requests (tenant, tema, prompt, longitud, estilos, signature, created_at, research, outline) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    tenant, tema, prompt_personalizado, longitud, json.dumps(estilos),
+                    array("Q", signature).tobytes(), time.time(),
+                    research, json.dumps(outline, ensure_ascii=False) if outline else None
+                )
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO bands (band_key, request_id) VALUES (?, ?)",
+                [(key, cursor.lastrowid) for key in keys]
+            )
+        if cursor.lastrowid % PRUNE_EVERY == 0:
+            self.prune()
+    
+    def prune(self) -> int:
+        """Elimina las peticiones que ya superan la antigüedad máxima.
+        
+        Returns:
+            Número de peticiones eliminadas
+        """
+        with self._connect() as conn:
+            # Los IDs crecen con la fecha de creación: basta con borrar hasta el último caducado
+            last_expired = conn.execute(
+                "SELECT MAX(id) FROM requests WHERE created_at < ?", (time.time() - self.max_age,)
+            ).fetchone()[0]
+            if last_expired is None:
+                return 0
+            conn.execute("DELETE FROM bands WHERE request_id <= ?", (last_expired,))
+            return conn.execute("DELETE FROM requests WHERE id <= ?", (last_expired,)).rowcount
+
+
+# Instancia compartida del almacén
+similar_requests = SimilarRequestStore(
+    os.path.join(settings.DATA_DIR, "similar_requests.db"),
+    threshold=settings.SIMILAR_REQUESTS_THRESHOLD,
+    max_age=settings.SIMILAR_REQUESTS_MAX_AGE_HOURS * 3600
+)
@@ -0,0 +1,62 @@
+from typing import Optional
+import os
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """Base de los almacenes locales en SQLite: una conexión por hilo y esquema en el primer uso.
+    
+    Crear la instancia no toca el disco: el fichero, el modo WAL y las tablas se crean
+    la primera vez que se abre una conexión. Así las instancias compartidas pueden
+    vivir a nivel de módulo sin que importar la aplicación cree ficheros ni ejecute
+    DDL.
+    """
+    
+    # Segundos de espera cuando otro proceso tiene bloqueada la base de datos
+    timeout: float = 30
+    # Filas como diccionarios (None: tuplas)
+    row_factory: Optional[type] = sqlite3.Row
+    
+    def __init__(self, db_path: str):
+        """Inicializa el almacén (la base de datos se prepara en el primer uso).
+        
+        Args:
+            db_path: Ruta del fichero SQLite
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+    
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        """Crea las tablas e índices si no existen (se ejecuta una vez por proceso)."""
+        raise NotImplementedError
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self._ensure_schema()
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout)
+            if self.row_factory is not None:
+                conn.row_factory = self.row_factory
+            self._local.conn = conn
+        return conn
+    
+    def _ensure_schema(self) -> None:
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout)
+            if self.row_factory is not None:
+                conn.row_factory = self.row_factory
+            try:
+                with conn:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    self._create_schema(conn)
+            finally:
+                conn.close()
+            self._schema_ready = True
@@ -0,0 +1,230 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple, Type
+import logging
+import time
+from common.services.cache import TieredCache, content_key
+from core.deadline import DeadlineExceeded, check_deadline
+from core.logger import bind_log_context, log_stage
+
+logger = logging.getLogger(__name__)
+
+
+class Stage:
+    """Etapa de un pipeline: una función con entradas y salidas con nombre."""
+    
+    def __init__(self, name: str, func: Callable[..., Any], inputs: Sequence[str] = (),
+                 outputs: Optional[Sequence[str]] = None, when: Optional[Callable[..., bool]] = None,
+                 default: Any = None, retries: int = 0, retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+                 cache: Optional[TieredCache] = None, cache_key: Optional[Callable[..., Optional[Hashable]]] = None):
+        """Define la etapa.
+        
+        Args:
+            name: Nombre de la etapa (también se usa en los logs y los tiempos)
+            func: Función que recibe las entradas como argumentos con nombre. Con una
+                sola salida devuelve su valor; con varias, un diccionario por salida
+            inputs: Valores que necesita la etapa
+            outputs: Valores que produce (por defecto, uno con el nombre de la etapa)
+            when: Condición sobre las entradas; si es falsa, la etapa no se ejecuta y
+                sus salidas toman el valor ``default``
+            default: Valor de las salidas cuando la etapa no se ejecuta
+            retries: Reintentos si la función falla con una de las excepciones de ``retry_on``
+            retry_on: Excepciones que se reintentan (nunca se reintenta un plazo agotado)
+            cache: Caché de resultados de la etapa (los resultados deben ser serializables en JSON)
+            cache_key: Clave de caché a partir de las entradas (None para no cachear esa ejecución);
+                se combina con el nombre de la etapa en una clave direccionada por contenido
+        """
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs) if outputs else (name,)
+        self.when = when
+        self.default = default
+        self.retries = retries
+        self.retry_on = retry_on
+        self.cache = cache
+        self.cache_key = cache_key
+    
+    def _split(self, result: Any) -> Dict[str, Any]:
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+        missing = [output for output in self.outputs if output not in result]
+        if missing:
+            raise ValueError(f"La etapa '{self.name}' no produjo las salidas {missing}")
+        return {output: result[output] for output in self.outputs}
+    
+    def run(self, kwargs: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+        """Ejecuta la etapa con sus entradas.
+        
+        Returns:
+            Tupla (salidas, estado), con estado 'ok', 'cached' u 'skipped'
+        """
+        if self.when is not None and not self.when(**kwargs):
+            return {output: self.default for output in self.outputs}, "skipped"
+        
+        key = self.cache_key(**kwargs) if self.cache is not None and self.cache_key is not None else None
+        if key is not None:
+            key = content_key(f"etapa:{self.name}", key)
+            found, result = self.cache.get(key)
+            if found:
+                return self._split(result), "cached"
+        
+        attempt = 0
+        while True:
+            check_deadline()
+            try:
+                result = self.func(**kwargs)
+                break
+            except DeadlineExceeded:
+                raise
+            except self.retry_on as e:
+                if attempt >= self.retries:
+                    raise
+                attempt += 1
+                logger.warning(f"Etapa '{self.name}' fallida, reintento {attempt}/{self.retries}: {str(e)}")
+        
+        outputs = self._split(result)
+        if key is not None:
+            self.cache.set(key, result)
+        return outputs, "ok"
+
+
+class GraphRun:
+    """Resultado de la ejecución de un grafo de etapas."""
+    
+    def __init__(self, values: Dict[str, Any]):
+        self.values = values
+        self.timings: Dict[str, float] = {}
+        self.statuses: Dict[str, str] = {}
+    
+    def __getitem__(self, name: str) -> Any:
+        return self.values[name]
+
+
+StageHook = Callable[[str, str, float], None]
+
+
+class StageGraph:
+    """Motor de ejecución de pipelines como grafo acíclico de etapas.
+    
+    Cada etapa declara qué valores necesita y cuáles produce; el motor ejecuta en
+    paralelo todas las etapas cuyas entradas están disponibles, de modo que el
+    trabajo independiente (por ejemplo, analizar URLs y consultar documentos) se
+    solapa en lugar de esperar en secuencia.
+    """
+    
+    def __init__(self, name: str, max_workers: int = 4):
+        """Inicializa un grafo vacío.
+        
+        Args:
+            name: Nombre del pipeline (para los logs)
+            max_workers: Etapas ejecutándose a la vez como máximo
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self.stages: Dict[str, Stage] = {}
+        self._producers: Dict[str, str] = {}
+    
+    def add(self, stage: Stage) -> Stage:
+        """Añade una etapa al grafo.
+        
+        Raises:
+            ValueError: Si el nombre de la etapa o alguna de sus salidas ya existen
+        """
+        if stage.name in self.stages:
+            raise ValueError(f"La etapa '{stage.name}' ya existe en el pipeline '{self.name}'")
+        for output in stage.outputs:
+            if output in self._producers:
+                raise ValueError(f"El valor '{output}' ya lo produce la etapa '{self._producers[output]}'")
+        self.stages[stage.name] = stage
+        for output in stage.outputs:
+            self._producers[output] = stage.name
+        return stage
+    
+    def stage(self, name: Optional[str] = None, **options) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """Decorador para añadir una función como etapa (mismas opciones que ``Stage``)."""
+        def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+            self.add(Stage(name or func.__name__, func, **options))
+            return func
+        return decorator
+    
+    def validate(self, provided: Iterable[str] = ()) -> List[str]:
+        """Comprueba que el grafo es ejecutable con los valores iniciales indicados.
+        
+        Args:
+            provided: Nombres de los valores iniciales
+        
+        Returns:
+            Nombres de las etapas en un orden topológico
+        
+        Raises:
+            ValueError: Si falta algún valor o hay ciclos
+        """
+        available: Set[str] = set(provided)
+        for stage in self.stages.values():
+            for name in stage.inputs:
+                if name not in available and name not in self._producers:
+                    raise ValueError(f"Nadie produce el valor '{name}' que necesita la etapa '{stage.name}'")
+        
+        order: List[str] = []
+        pending = dict(self.stages)
+        while pending:
+            ready = [name for name, stage in pending.items() if all(
+                value in available or self._producers.get(value) in order for value in stage.inputs
+            )]
+            if not ready:
+                raise ValueError(f"El pipeline '{self.name}' tiene dependencias circulares entre {sorted(pending)}")
+            for name in ready:
+                order.append(name)
+                del pending[name]
+        return order
+    
+    def run(self, values: Dict[str, Any], hooks: Sequence[StageHook] = ()) -> GraphRun:
+        """Ejecuta el grafo.
+        
+        Args:
+            values: Valores iniciales (las entradas que no produce ninguna etapa)
+            hooks: Funciones llamadas al terminar cada etapa con (etapa, estado, segundos)
+        
+        Returns:
+            Ejecución con todos los valores, los tiempos y el estado de cada etapa
+        
+        Raises:
+            Exception: El error de la primera etapa que falle (las pendientes no se inician)
+        """
+        self.validate(values)
+        graph_run = GraphRun(dict(values))
+        pending = dict(self.stages)
+        running: Dict[Future, Stage] = {}
+        
+        def execute(stage: Stage, kwargs: Dict[str, Any]) -> Tuple[Dict[str, Any], str, float]:
+            start = time.perf_counter()
+            with log_stage(stage.name):
+                outputs, status = stage.run(kwargs)
+            return outputs, status, time.perf_counter() - start
+        
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"{self.name}-stage")
+        try:
+            while pending or running:
+                ready = [
+                    stage for stage in pending.values()
+                    if all(name in graph_run.values for name in stage.inputs)
+                ]
+                for stage in ready:
+                    del pending[stage.name]
+                    kwargs = {name: graph_run.values[name] for name in stage.inputs}
+                    running[executor.submit(bind_log_context(execute), stage, kwargs)] = stage
+                
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    outputs, status, seconds = future.result()
+                    graph_run.values.update(outputs)
+                    graph_run.statuses[stage.name] = status
+                    if status != "skipped":
+                        graph_run.timings[stage.name] = seconds
+                    for hook in hooks:
+                        hook(stage.name, status, seconds)
+        finally:
+            # Tras un error no se inician más etapas ni se espera a las que están en curso
+            executor.shutdown(wait=not running, cancel_futures=True)
+        return graph_run
@@ -0,0 +1,77 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+
+def repair_json(raw_content: str) -> Optional[Any]:
+    """Intenta recuperar un objeto JSON de una respuesta truncada o con ruido.
+
+    Elimina texto alrededor del objeto (por ejemplo bloques de código markdown),
+    cierra cadenas y contenedores abiertos y, si aún así no es válido, recorta
+    hasta el último valor completo.
+
+    Args:
+        raw_content: Texto bruto del LLM
+
+    Returns:
+        Objeto JSON recuperado o None si no se encuentra ninguno
+    """
+    start = raw_content.find("{")
+    if start < 0:
+        return None
+    text = raw_content[start:]
+
+    stack: List[str] = []
+    cut_points: List[Tuple[int, str]] = []
+    in_string = False
+    escape = False
+    end = len(text)
+
+    for i, char in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                end = i + 1
+                break
+            cut_points.append((i + 1, "".join(reversed(stack))))
+        elif char == ",":
+            cut_points.append((i, "".join(reversed(stack))))
+
+    text = text[:end]
+    if not stack:
+        return _loads_or_none(text)
+
+    # Cerrar la cadena abierta y los contenedores pendientes
+    candidate = text + ('"' if in_string else "")
+    candidate = candidate.rstrip().rstrip(",")
+    repaired = _loads_or_none(candidate + "".join(reversed(stack)))
+    if repaired is not None:
+        return repaired
+
+    # Recortar hasta el último valor completo
+    for position, closers in reversed(cut_points):
+        repaired = _loads_or_none(text[:position] + closers)
+        if repaired is not None:
+            return repaired
+
+    return None
+
+
+def _loads_or_none(text: str) -> Optional[Any]:
+    """Parsea JSON devolviendo None si el texto no es válido."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return None
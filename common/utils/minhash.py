@@ -0,0 +1,104 @@
+from typing import List, Sequence, Set, Tuple
+import hashlib
+import random
+import re
+import unicodedata
+
+# Primo de Mersenne usado en las permutaciones universales (a*x + b) mod P
+_PRIME = (1 << 61) - 1
+
+# Abreviaturas frecuentes que se expanden para que las variantes de un mismo tema coincidan
+ABBREVIATIONS = {
+    "ia": "inteligencia artificial",
+    "ai": "inteligencia artificial",
+    "ml": "aprendizaje automatico",
+    "rrhh": "recursos humanos",
+    "rrss": "redes sociales",
+    "seo": "posicionamiento buscadores",
+}
+
+# Palabras sin contenido temático
+STOPWORDS = {
+    "a", "al", "con", "de", "del", "el", "en", "la", "las", "lo", "los", "o", "para", "por",
+    "que", "se", "su", "sus", "un", "una", "unos", "unas", "y", "e", "u", "como", "sobre",
+    "mas", "muy", "sin", "entre", "the", "of", "and", "in", "for", "to", "on", "with",
+}
+
+
+def normalize_tokens(text: str) -> Set[str]:
+    """Normaliza un texto a su conjunto de términos temáticos.
+    
+    Pasa a minúsculas, elimina tildes, expande abreviaturas comunes, descarta
+    palabras vacías y reduce los plurales simples.
+    
+    Args:
+        text: Texto a normalizar
+    
+    Returns:
+        Conjunto de términos
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    tokens: Set[str] = set()
+    for word in re.findall(r'\w+', text):
+        for token in ABBREVIATIONS.get(word, word).split():
+            if token in STOPWORDS:
+                continue
+            if len(token) > 4 and token.endswith("s"):
+                token = token[:-1]
+            tokens.add(token)
+    return tokens
+
+
+class MinHasher:
+    """Firmas MinHash y bandas LSH para estimar la similitud de Jaccard entre textos.
+    
+    Dos conjuntos con similitud de Jaccard J coinciden en cada posición de la firma
+    con probabilidad J, y comparten al menos una banda con probabilidad
+    1 - (1 - J^rows)^bands, lo que permite buscar candidatos sin comparar con todos.
+    """
+    
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        """Inicializa las permutaciones.
+        
+        Args:
+            num_perm: Longitud de la firma
+            bands: Número de bandas LSH (debe dividir a num_perm)
+            seed: Semilla de las permutaciones (fija para que las firmas sean estables)
+        """
+        if num_perm % bands:
+            raise ValueError("El número de bandas debe dividir la longitud de la firma")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = random.Random(seed)
+        self._perms: List[Tuple[int, int]] = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)
+        ]
+    
+    def signature(self, tokens: Set[str]) -> Tuple[int, ...]:
+        """Calcula la firma MinHash de un conjunto de términos (vacía si no hay términos)."""
+        if not tokens:
+            return ()
+        hashes = [
+            int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+            for token in tokens
+        ]
+        return tuple(
+            min((a * value + b) % _PRIME for value in hashes)
+            for a, b in self._perms
+        )
+    
+    def band_keys(self, signature: Sequence[int]) -> List[Tuple[int, int]]:
+        """Obtiene las claves de cubeta LSH de una firma, una por banda."""
+        return [
+            (band, hash(tuple(signature[band * self.rows:(band + 1) * self.rows])))
+            for band in range(self.bands)
+        ]
+    
+    @staticmethod
+    def similarity(first: Sequence[int], second: Sequence[int]) -> float:
+        """Estima la similitud de Jaccard a partir de dos firmas."""
+        if not first or len(first) != len(second):
+            return 0.0
+        return sum(1 for a, b in zip(first, second) if a == b) / len(first)
@@ -0,0 +1,84 @@
+from typing import Iterable, Iterator, List, Tuple
+import re
+
+
+def extract_pages(path: str) -> Iterator[Tuple[int, str]]:
+    """Extrae el texto de un PDF página a página.
+    
+    Las páginas se procesan de una en una para que la memoria no dependa del
+    tamaño del documento.
+    
+    Args:
+        path: Ruta del fichero PDF
+    
+    Returns:
+        Iterador de tuplas (número de página empezando en 1, texto)
+    """
+    from pypdf import PdfReader
+    
+    reader = PdfReader(path)
+    for page_number, page in enumerate(reader.pages, start=1):
+        try:
+            text = page.extract_text() or ""
+        except Exception:
+            # Una página dañada no debe impedir procesar el resto del documento
+            text = ""
+        yield page_number, normalize_text(text)
+
+
+def normalize_text(text: str) -> str:
+    """Limpia el texto extraído: une palabras cortadas y compacta espacios."""
+    text = re.sub(r'(\w)-\n(\w)', r'\1\2', text)
+    text = re.sub(r'[ \t]+', ' ', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text.strip()
+
+
+def chunk_pages(pages: Iterable[Tuple[int, str]], chunk_chars: int = 1500, overlap: int = 200) -> Iterator[Tuple[int, str]]:
+    """Divide el texto de las páginas en fragmentos de tamaño acotado.
+    
+    Los fragmentos pueden abarcar varias páginas y se cortan preferentemente en
+    un final de párrafo o de frase. Consecutivos comparten ``overlap`` caracteres
+    para no perder contexto en los cortes.
+    
+    Args:
+        pages: Tuplas (número de página, texto)
+        chunk_chars: Tamaño máximo de cada fragmento en caracteres
+        overlap: Caracteres compartidos entre fragmentos consecutivos
+    
+    Returns:
+        Iterador de tuplas (página donde empieza el fragmento, texto)
+    """
+    buffer = ""
+    # Posición en el buffer donde empieza cada página: [(offset, página)]
+    page_starts: List[Tuple[int, int]] = []
+    for page_number, text in pages:
+        if not text:
+            continue
+        if buffer:
+            buffer += "\n\n"
+        page_starts.append((len(buffer), page_number))
+        buffer += text
+        
+        while len(buffer) >= chunk_chars:
+            cut = _find_cut(buffer, chunk_chars)
+            yield page_starts[0][1], buffer[:cut].strip()
+            start = cut - overlap if cut > overlap else cut
+            buffer = buffer[start:]
+            page_starts = [(offset - start, page) for offset, page in page_starts]
+            # Conservar la página en la que empieza el nuevo buffer y las siguientes
+            while len(page_starts) > 1 and page_starts[1][0] <= 0:
+                page_starts.pop(0)
+    
+    if buffer.strip():
+        yield page_starts[0][1], buffer.strip()
+
+
+def _find_cut(text: str, limit: int) -> int:
+    """Busca la mejor posición de corte antes de ``limit``."""
+    window = text[:limit]
+    for separator in ("\n\n", ". ", "\n", " "):
+        position = window.rfind(separator)
+        if position > limit // 2:
+            return position + len(separator)
+    return limit
@@ -0,0 +1,51 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """Limitador de tasa de tipo token bucket, seguro entre hilos.
+    
+    Permite ráfagas de hasta ``burst`` operaciones y repone ``rate_per_minute``
+    operaciones por minuto.
+    """
+    
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        """Inicializa el limitador.
+        
+        Args:
+            rate_per_minute: Operaciones permitidas por minuto
+            burst: Operaciones que pueden realizarse de golpe
+        """
+        if rate_per_minute <= 0:
+            raise ValueError("La tasa debe ser mayor que cero")
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate_per_second)
+        self._updated_at = now
+    
+    def try_acquire(self) -> float:
+        """Intenta consumir un token sin bloquear.
+        
+        Returns:
+            0 si se ha consumido el token; en otro caso, segundos a esperar
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate_per_second
+    
+    def acquire(self) -> None:
+        """Consume un token, esperando si es necesario."""
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            time.sleep(wait)
@@ -0,0 +1,52 @@
+from typing import Any, Callable, Dict, Hashable
+import threading
+
+
+class SingleFlightCache:
+    """Memoización segura entre hilos que ejecuta cada clave una sola vez.
+    
+    Si varios hilos piden la misma clave a la vez, solo uno calcula el valor y el
+    resto espera y reutiliza el resultado. Los errores no se memorizan: si el
+    cálculo falla, el siguiente que espere lo intentará de nuevo.
+    """
+    
+    def __init__(self):
+        self._values: Dict[Hashable, Any] = {}
+        self._in_flight: Dict[Hashable, threading.Event] = {}
+        self._lock = threading.Lock()
+    
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Obtiene el valor de una clave, calculándolo si es necesario.
+        
+        Args:
+            key: Clave del valor
+            compute: Función que calcula el valor
+        
+        Returns:
+            Valor memorizado o recién calculado
+        """
+        while True:
+            with self._lock:
+                if key in self._values:
+                    return self._values[key]
+                event = self._in_flight.get(key)
+                if event is None:
+                    event = threading.Event()
+                    self._in_flight[key] = event
+                    break
+            # Otro hilo está calculando la clave: esperar y volver a comprobar
+            event.wait()
+        
+        try:
+            value = compute()
+            with self._lock:
+                self._values[key] = value
+            return value
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            event.set()
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._values)
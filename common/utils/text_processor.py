@@ -33,6 +33,16 @@ class TextProcessor:
             "content": content
         }
     
+    @staticmethod
+    def split_sections(content: str) -> List[str]:
+        """Divide un artículo en markdown en fragmentos por sección de segundo nivel.
+        
+        El primer fragmento contiene el título y la introducción; concatenar los
+        fragmentos reproduce el contenido original.
+        """
+        parts = re.split(r'(?=^## )', content, flags=re.MULTILINE)
+        return [part for part in parts if part]
+    
     @staticmethod
     def extract_summary(content: str, max_length: int = 250) -> str:
         """Extrae un resumen breve del artículo."""
@@ -63,4 +73,32 @@ class TextProcessor:
                 intro_section = intro_section[:max_length].rsplit(' ', 1)[0] + "..."
             return intro_section.strip()
         
-        return "Resumen no disponible."
\ No newline at end of file
+        return "Resumen no disponible."
+    
+    @staticmethod
+    def score_article(content: str, headings: List[str], target_words: int) -> float:
+        """Puntúa un artículo (0-1) para ordenar variantes alternativas.
+        
+        Combina la cobertura de los encabezados planificados, la cercanía a la longitud
+        objetivo y una penalización por meta-referencias al propio artículo.
+        """
+        sections = TextProcessor.extract_sections(content)["sections"]
+        section_words = [set(re.findall(r'\w+', title)) for title in sections]
+        
+        # Cobertura: encabezados del outline presentes (al menos la mitad de sus palabras)
+        covered = 0
+        for heading in headings:
+            words = set(re.findall(r'\w+', heading.lower()))
+            if words and any(len(words & found) >= len(words) / 2 for found in section_words):
+                covered += 1
+        coverage = covered / len(headings) if headings else 1.0
+        
+        # Longitud: penalizar la desviación relativa respecto al objetivo
+        word_count = len(re.findall(r'\w+', content))
+        length_score = max(0.0, 1.0 - abs(word_count - target_words) / target_words) if target_words else 1.0
+        
+        # Meta-referencias que delatan generación automatizada
+        meta_references = len(re.findall(r'en este art[íi]culo|en esta secci[óo]n', content, re.IGNORECASE))
+        penalty = min(0.3, 0.1 * meta_references)
+        
+        return round(max(0.0, 0.5 * coverage + 0.5 * length_score - penalty), 3)
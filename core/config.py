@@ -27,8 +27,127 @@ class Settings(BaseSettings):
     # OpenAI
     OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
     
+    # Enrutado de modelos por etapa (JSON: {"outline": ["gpt-4o-mini", {"model_id": "...", "base_url": "..."}]})
+    MODEL_ROUTING: Optional[str] = os.getenv("MODEL_ROUTING")
+    MODEL_ERROR_THRESHOLD: float = float(os.getenv("MODEL_ERROR_THRESHOLD", "0.5"))
+    MODEL_COOLDOWN_SECONDS: float = float(os.getenv("MODEL_COOLDOWN_SECONDS", "30"))
+    
+    # Presupuesto global de llamadas a los LLM (0 = sin límite)
+    LLM_CALLS_PER_MINUTE: float = float(os.getenv("LLM_CALLS_PER_MINUTE", "0"))
+    LLM_CALLS_BURST: int = int(os.getenv("LLM_CALLS_BURST", "10"))
+    
+    # Pool de endpoints compatibles con OpenAI (JSON: [{"name": "...", "base_url": "...", "api_key": "...", "weight": 1, "models": [...]}])
+    PROVIDER_ENDPOINTS: Optional[str] = os.getenv("PROVIDER_ENDPOINTS")
+    PROVIDER_BREAKER_FAILURES: int = int(os.getenv("PROVIDER_BREAKER_FAILURES", "5"))
+    PROVIDER_BREAKER_WINDOW_SECONDS: float = float(os.getenv("PROVIDER_BREAKER_WINDOW_SECONDS", "30"))
+    PROVIDER_BREAKER_OPEN_SECONDS: float = float(os.getenv("PROVIDER_BREAKER_OPEN_SECONDS", "30"))
+    
+    # Datos locales (documentos, índices, almacenes)
+    DATA_DIR: str = os.getenv("DATA_DIR", "data")
+    
+    # Documentos PDF de referencia
+    PDF_MAX_MB: int = int(os.getenv("PDF_MAX_MB", "200"))
+    PDF_WORKERS: int = int(os.getenv("PDF_WORKERS", "2"))
+    PDF_CHUNK_CHARS: int = int(os.getenv("PDF_CHUNK_CHARS", "1500"))
+    PDF_CHUNK_OVERLAP: int = int(os.getenv("PDF_CHUNK_OVERLAP", "200"))
+    PDF_STALE_MINUTES: int = int(os.getenv("PDF_STALE_MINUTES", "30"))
+    DOCUMENT_CHUNKS_PER_REQUEST: int = int(os.getenv("DOCUMENT_CHUNKS_PER_REQUEST", "8"))
+    
+    # Pool de procesos para los pasos de CPU del pipeline (análisis de markdown,
+    # reparación de JSON); las entradas más cortas que el umbral se procesan en el hilo
+    CPU_POOL_WORKERS: int = int(os.getenv("CPU_POOL_WORKERS", "2"))
+    CPU_POOL_INLINE_BELOW_CHARS: int = int(os.getenv("CPU_POOL_INLINE_BELOW_CHARS", "20000"))
+    CPU_POOL_PRELOAD: List[str] = os.getenv(
+        "CPU_POOL_PRELOAD", "common.utils.text_processor,common.utils.json_stream,blog.services.analysis"
+    ).split(",")
+    
+    # Índice local de investigación (reutilización de material reciente sobre temas recurrentes)
+    RESEARCH_INDEX_REUSE: bool = os.getenv("RESEARCH_INDEX_REUSE", "True").lower() in ("true", "1", "t")
+    RESEARCH_INDEX_MAX_AGE_HOURS: float = float(os.getenv("RESEARCH_INDEX_MAX_AGE_HOURS", "168"))
+    RESEARCH_INDEX_MIN_COVERAGE: float = float(os.getenv("RESEARCH_INDEX_MIN_COVERAGE", "0.75"))
+    RESEARCH_INDEX_PASSAGES: int = int(os.getenv("RESEARCH_INDEX_PASSAGES", "3"))
+    
+    # Reutilización del trabajo de peticiones recientes casi idénticas (similitud MinHash)
+    SIMILAR_REQUESTS_REUSE: bool = os.getenv("SIMILAR_REQUESTS_REUSE", "True").lower() in ("true", "1", "t")
+    SIMILAR_REQUESTS_THRESHOLD: float = float(os.getenv("SIMILAR_REQUESTS_THRESHOLD", "0.75"))
+    SIMILAR_REQUESTS_MAX_AGE_HOURS: float = float(os.getenv("SIMILAR_REQUESTS_MAX_AGE_HOURS", "24"))
+    
+    # Arranque: precalentar agentes y conexiones en segundo plano al iniciar la API
+    WARMUP_ON_STARTUP: bool = os.getenv("WARMUP_ON_STARTUP", "True").lower() in ("true", "1", "t")
+    
+    # Control de admisión de generaciones
+    ADMISSION_MAX_IN_FLIGHT: int = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "8"))
+    ADMISSION_MAX_QUEUE: int = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+    ADMISSION_MAX_WAIT_SECONDS: float = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "30"))
+    ADMISSION_INTERACTIVE_RESERVED: int = int(os.getenv("ADMISSION_INTERACTIVE_RESERVED", "1"))
+    ADMISSION_INITIAL_SERVICE_SECONDS: float = float(os.getenv("ADMISSION_INITIAL_SERVICE_SECONDS", "60"))
+    
+    # Motor de etapas de los pipelines
+    PIPELINE_MAX_WORKERS: int = int(os.getenv("PIPELINE_MAX_WORKERS", "4"))
+    
+    # Caché de resultados por niveles: memoria del proceso, SQLite compartido por los
+    # workers del servidor y, opcionalmente, una caché de red (redis://... o 'local')
+    CACHE_MEMORY_ENTRIES: int = int(os.getenv("CACHE_MEMORY_ENTRIES", "256"))
+    CACHE_TTL_SECONDS: float = float(os.getenv("CACHE_TTL_SECONDS", "3600"))
+    CACHE_SHARED_ENABLED: bool = os.getenv("CACHE_SHARED_ENABLED", "True").lower() in ("true", "1", "t")
+    CACHE_SHARED_MAX_ENTRIES: int = int(os.getenv("CACHE_SHARED_MAX_ENTRIES", "5000"))
+    CACHE_REMOTE_URL: str = os.getenv("CACHE_REMOTE_URL", "")
+    
+    # Artefactos de las generaciones completadas (para derivar otros formatos)
+    RUN_STORE_MAX_AGE_HOURS: float = float(os.getenv("RUN_STORE_MAX_AGE_HOURS", "72"))
+    
+    # Traducciones simultáneas (fragmentos de sección) al publicar en varios idiomas
+    TRANSLATION_MAX_WORKERS: int = int(os.getenv("TRANSLATION_MAX_WORKERS", "8"))
+    
+    # Respuestas guardadas de las peticiones con cabecera Idempotency-Key
+    IDEMPOTENCY_TTL_HOURS: float = float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+    IDEMPOTENCY_PENDING_TIMEOUT_SECONDS: float = float(os.getenv("IDEMPOTENCY_PENDING_TIMEOUT_SECONDS", "900"))
+    
+    # Administración: clave de los endpoints /admin y del perfilado bajo demanda
+    # (sin clave, el perfilado queda desactivado)
+    ADMIN_API_KEY: str = os.getenv("ADMIN_API_KEY", "")
+    PROFILE_SAMPLE_INTERVAL_MS: float = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+    PROFILE_MAX_STORED: int = int(os.getenv("PROFILE_MAX_STORED", "20"))
+    
+    # Salud del bucle de eventos: sonda de retraso y umbral a partir del que se
+    # considera bloqueado (se registra la pila del callback que lo bloquea)
+    LOOP_MONITOR_ENABLED: bool = os.getenv("LOOP_MONITOR_ENABLED", "True").lower() in ("true", "1", "t")
+    LOOP_MONITOR_INTERVAL_MS: float = float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "100"))
+    LOOP_STALL_THRESHOLD_MS: float = float(os.getenv("LOOP_STALL_THRESHOLD_MS", "250"))
+    LOOP_STALLS_KEPT: int = int(os.getenv("LOOP_STALLS_KEPT", "20"))
+    
+    # Plazos por petición y degradación de etapas cuando el tiempo restante no alcanza
+    REQUEST_DEADLINE_SECONDS: float = float(os.getenv("REQUEST_DEADLINE_SECONDS", "0"))  # 0 = sin plazo
+    DEADLINE_DEGRADATIONS: List[str] = os.getenv("DEADLINE_DEGRADATIONS", "edicion,urls").split(",")
+    DEADLINE_EDIT_MIN_SECONDS: float = float(os.getenv("DEADLINE_EDIT_MIN_SECONDS", "45"))
+    DEADLINE_RESEARCH_MIN_SECONDS: float = float(os.getenv("DEADLINE_RESEARCH_MIN_SECONDS", "120"))
+    DEADLINE_MAX_URLS: int = int(os.getenv("DEADLINE_MAX_URLS", "3"))
+    
+    # Planificación justa de llamadas a los LLM por tenant
+    LLM_MAX_CONCURRENT_CALLS: int = int(os.getenv("LLM_MAX_CONCURRENT_CALLS", "16"))
+    TENANT_LIMITS: Optional[str] = os.getenv("TENANT_LIMITS")  # JSON: {"tenant": {"weight": 2, "max_concurrency": 8, "tokens_per_minute": 200000}}
+    TENANT_DEFAULT_WEIGHT: float = float(os.getenv("TENANT_DEFAULT_WEIGHT", "1"))
+    TENANT_DEFAULT_MAX_CONCURRENCY: int = int(os.getenv("TENANT_DEFAULT_MAX_CONCURRENCY", "4"))
+    TENANT_DEFAULT_TOKENS_PER_MINUTE: float = float(os.getenv("TENANT_DEFAULT_TOKENS_PER_MINUTE", "0"))
+    TENANT_MAX_TRACKED: int = int(os.getenv("TENANT_MAX_TRACKED", "1000"))
+    
+    # Generación por lotes
+    BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "8"))
+    
+    # Modo diferido del generador masivo (python -m blog.batch --deferred): las llamadas
+    # de los artículos se agrupan en lotes de la API de lotes del proveedor
+    BATCH_COLLECT_SECONDS: float = float(os.getenv("BATCH_COLLECT_SECONDS", "5"))
+    BATCH_MAX_REQUESTS: int = int(os.getenv("BATCH_MAX_REQUESTS", "5000"))
+    BATCH_POLL_SECONDS: float = float(os.getenv("BATCH_POLL_SECONDS", "30"))
+    BATCH_DEFERRED_CONCURRENCY: int = int(os.getenv("BATCH_DEFERRED_CONCURRENCY", "200"))
+    
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_MAX_MESSAGE_CHARS: int = int(os.getenv("LOG_MAX_MESSAGE_CHARS", "2000"))
+    LOG_SAMPLE_BURST: int = int(os.getenv("LOG_SAMPLE_BURST", "20"))
+    LOG_SAMPLE_WINDOW_SECONDS: float = float(os.getenv("LOG_SAMPLE_WINDOW_SECONDS", "10"))
     
     model_config = {
         "case_sensitive": True,
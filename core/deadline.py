@@ -0,0 +1,116 @@
+from contextlib import contextmanager
+from typing import Iterator, Optional, TypeVar
+import contextvars
+import math
+import threading
+import time
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """La petición agotó su plazo o fue cancelada (por ejemplo, porque el cliente se desconectó)."""
+
+
+class Deadline:
+    """Plazo de una petición, compartido por todas sus etapas y llamadas a los LLM.
+    
+    Además de caducar, puede cancelarse desde otro hilo (al desconectarse el
+    cliente). Un plazo anidado (por ejemplo, el de un artículo dentro de un lote)
+    caduca o se cancela también con el de su padre.
+    """
+    
+    def __init__(self, seconds: Optional[float] = None, parent: Optional["Deadline"] = None):
+        """Inicializa el plazo.
+        
+        Args:
+            seconds: Segundos disponibles desde ahora (None para no limitar el tiempo)
+            parent: Plazo que engloba a este
+        """
+        self.expires_at = time.monotonic() + seconds if seconds else math.inf
+        self.parent = parent
+        self.reason: Optional[str] = None
+        self._cancelled = threading.Event()
+    
+    def cancel(self, reason: str = "petición cancelada") -> None:
+        """Cancela el plazo: las etapas y llamadas pendientes dejan de ejecutarse."""
+        self.reason = reason
+        self._cancelled.set()
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set() or (self.parent is not None and self.parent.cancelled)
+    
+    def remaining(self) -> float:
+        """Segundos restantes (0 si ha caducado o se ha cancelado, infinito si no hay límite)."""
+        if self.cancelled:
+            return 0.0
+        remaining = max(0.0, self.expires_at - time.monotonic())
+        if self.parent is not None:
+            remaining = min(remaining, self.parent.remaining())
+        return remaining
+    
+    def check(self) -> None:
+        """Comprueba que queda tiempo.
+        
+        Raises:
+            DeadlineExceeded: Si el plazo ha caducado o se ha cancelado
+        """
+        if self.cancelled:
+            deadline: Optional[Deadline] = self
+            while deadline is not None and deadline.reason is None:
+                deadline = deadline.parent
+            raise DeadlineExceeded(deadline.reason if deadline else "petición cancelada")
+        if self.remaining() <= 0:
+            raise DeadlineExceeded("plazo de la petición agotado")
+
+
+# Plazo de la petición en curso (se propaga igual que el contexto de log)
+deadline_var: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("deadline", default=None)
+
+
+def remaining_time() -> Optional[float]:
+    """Segundos restantes del plazo en curso (None si no hay plazo con límite de tiempo)."""
+    deadline = deadline_var.get()
+    if deadline is None:
+        return None
+    remaining = deadline.remaining()
+    return None if math.isinf(remaining) else remaining
+
+
+def check_deadline() -> None:
+    """Comprueba el plazo en curso, si lo hay (ver ``Deadline.check``)."""
+    deadline = deadline_var.get()
+    if deadline is not None:
+        deadline.check()
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float] = None) -> Iterator[Deadline]:
+    """Aplica un plazo al bloque, anidado en el plazo en curso si lo hay.
+    
+    Args:
+        seconds: Segundos disponibles (None para heredar solo el límite del plazo en curso)
+    """
+    deadline = Deadline(seconds, parent=deadline_var.get())
+    token = deadline_var.set(deadline)
+    try:
+        yield deadline
+    finally:
+        deadline_var.reset(token)
+
+
+def until_deadline(chunks: Iterator[T]) -> Iterator[T]:
+    """Recorre una respuesta en streaming y la corta en cuanto el plazo caduca o se cancela.
+    
+    Al cerrar el stream se cierra la conexión con el proveedor, que deja de generar
+    (y de facturar) la salida restante.
+    """
+    try:
+        for chunk in chunks:
+            check_deadline()
+            yield chunk
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
@@ -1,22 +1,204 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+import atexit
+import contextvars
+import copy
+import json
 import logging
+import queue
 import sys
+import threading
+import time
 from core.config import settings
+from core.profiling import profile_var
+from core.tenancy import tenant_var
 
-# Configurar formato de logging
-log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+# Contexto de log de la petición en curso (se propaga a las tareas asyncio y, con
+# bind_log_context, a los hilos de los pools)
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+stage_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("stage", default=None)
+
+# Formato de texto plano (LOG_FORMAT=text)
+log_format = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s/%(stage)s] %(message)s"
 date_format = "%Y-%m-%d %H:%M:%S"
 
 # Configurar nivel de logging
 log_level = getattr(logging, settings.LOG_LEVEL.upper())
 
-# Configurar handler para consola
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setFormatter(logging.Formatter(log_format, date_format))
+_listener: Optional[QueueListener] = None
+_configure_lock = threading.Lock()
+
+
+@contextmanager
+def log_stage(stage: str) -> Iterator[None]:
+    """Marca los mensajes emitidos dentro del bloque con la etapa indicada.
+    
+    Si la petición se está perfilando, mide además el tiempo de la etapa.
+    """
+    token = stage_var.set(stage)
+    profile = profile_var.get()
+    try:
+        if profile is None:
+            yield
+        else:
+            with profile.stage(stage):
+                yield
+    finally:
+        stage_var.reset(token)
+
+
+def bind_log_context(func: Callable) -> Callable:
+    """Envuelve una función para que se ejecute con el contexto de log actual.
+    
+    Los pools de hilos no heredan las variables de contexto; cada llamada a la
+    función envuelta usa su propia copia del contexto capturado. Si la petición se
+    está perfilando, el hilo se muestrea mientras ejecuta la función.
+    """
+    context = contextvars.copy_context()
+    profile = context.get(profile_var)
+    
+    def wrapper(*args, **kwargs):
+        if profile is None:
+            return context.copy().run(func, *args, **kwargs)
+        with profile.tracked(context.get(stage_var) or getattr(func, "__name__", "hilo")):
+            return context.copy().run(func, *args, **kwargs)
+    
+    return wrapper
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatea cada registro como una línea JSON."""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "tenant": getattr(record, "tenant", None),
+            "stage": getattr(record, "stage", None),
+        }
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Limita los mensajes repetitivos por punto de emisión.
+    
+    Cada línea de código puede emitir como máximo ``burst`` mensajes por ventana;
+    el resto se descarta y el número de descartados se adjunta al siguiente mensaje
+    que pase ('suppressed').
+    """
+    
+    def __init__(self, burst: int = 20, window_seconds: float = 10.0):
+        super().__init__()
+        self.burst = burst
+        self.window_seconds = window_seconds
+        self._windows: Dict[Tuple[str, int], list] = {}
+        self._lock = threading.Lock()
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.burst <= 0:
+            return True
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.window_seconds:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+            elif window[1] < self.burst:
+                window[1] += 1
+                suppressed = 0
+            else:
+                window[2] += 1
+                return False
+        record.suppressed = suppressed
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Envía los registros a una cola acotada sin bloquear nunca al emisor.
+    
+    En el hilo que emite solo se resuelve el mensaje (truncado a ``max_chars``) y
+    se captura el contexto; el formateo y la escritura los hace el hilo del
+    QueueListener. Si la cola está llena, el registro se descarta y se cuenta.
+    """
+    
+    def __init__(self, log_queue: queue.Queue, max_chars: int = 2000):
+        super().__init__(log_queue)
+        self.max_chars = max_chars
+        self.dropped = 0
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = self._truncate(record.getMessage())
+        record.args = None
+        record.request_id = request_id_var.get()
+        record.stage = stage_var.get()
+        record.tenant = tenant_var.get()
+        if record.exc_info:
+            record.exc_text = self._truncate(logging.Formatter().formatException(record.exc_info))
+            record.exc_info = None
+        return record
+    
+    def _truncate(self, text: str) -> str:
+        if self.max_chars and len(text) > self.max_chars:
+            return f"{text[:self.max_chars]}… [+{len(text) - self.max_chars} caracteres]"
+        return text
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(level: Optional[str] = None) -> None:
+    """Configura el logging de la aplicación (una sola vez por proceso).
+    
+    Sustituye los handlers del logger raíz por un NonBlockingQueueHandler; un hilo
+    en segundo plano escribe en stdout las líneas JSON (o texto, con LOG_FORMAT=text).
+    
+    Args:
+        level: Nivel de log (por defecto, LOG_LEVEL)
+    """
+    global _listener
+    root_logger = logging.getLogger()
+    if level:
+        root_logger.setLevel(getattr(logging, level.upper()))
+    else:
+        root_logger.setLevel(log_level)
+    
+    with _configure_lock:
+        if _listener is not None:
+            return
+        
+        console_handler = logging.StreamHandler(sys.stdout)
+        if settings.LOG_FORMAT == "text":
+            console_handler.setFormatter(logging.Formatter(log_format, date_format))
+        else:
+            console_handler.setFormatter(JsonFormatter())
+        
+        log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        queue_handler = NonBlockingQueueHandler(log_queue, max_chars=settings.LOG_MAX_MESSAGE_CHARS)
+        queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_BURST, settings.LOG_SAMPLE_WINDOW_SECONDS))
+        
+        for handler in list(root_logger.handlers):
+            root_logger.removeHandler(handler)
+        root_logger.addHandler(queue_handler)
+        
+        _listener = QueueListener(log_queue, console_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
 
-# Configurar logger raíz
-root_logger = logging.getLogger()
-root_logger.setLevel(log_level)
-root_logger.addHandler(console_handler)
 
 # Función para obtener logger configurado
 def get_logger(name: str) -> logging.Logger:
@@ -24,10 +206,10 @@ def get_logger(name: str) -> logging.Logger:
     
     Args:
         name: Nombre del logger
-        
+    
     Returns:
         Logger configurado
     """
     logger = logging.getLogger(name)
     logger.setLevel(log_level)
-    return logger
\ No newline at end of file
+    return logger
@@ -0,0 +1,168 @@
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores (ms) de los intervalos del histograma de retraso del bucle
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LoopMonitor:
+    """Salud del bucle de eventos: retraso de planificación y detección de bloqueos.
+    
+    Una tarea del bucle se programa cada ``interval`` segundos y mide cuánto tarda en
+    ejecutarse de más (el retraso que sufre cualquier callback en ese momento). Un hilo
+    vigilante comprueba el último latido de esa tarea: si el bucle lleva más de
+    ``stall_threshold`` segundos sin ejecutarla, hay un callback bloqueándolo, y se
+    captura la pila del hilo del bucle en ese instante para señalar al culpable.
+    """
+    
+    def __init__(self, interval: float = 0.1, stall_threshold: float = 0.25, max_stalls: int = 20):
+        """Inicializa el monitor (no mide nada hasta llamar a ``start``).
+        
+        Args:
+            interval: Segundos entre sondas de retraso
+            stall_threshold: Segundos sin latido a partir de los que se considera bloqueado el bucle
+            max_stalls: Bloqueos recientes que se conservan con su pila
+        """
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.buckets = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.probes = 0
+        self.lag_sum = 0.0
+        self.lag_max = 0.0
+        self.last_lag = 0.0
+        self.stall_count = 0
+        self.stalls: Deque[Dict[str, Any]] = deque(maxlen=max_stalls)
+        self._last_beat = time.monotonic()
+        self._stall: Optional[Dict[str, Any]] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+    
+    def start(self) -> None:
+        """Empieza a vigilar el bucle en curso (llamar desde el propio bucle)."""
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._probe_loop())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+    
+    async def stop(self) -> None:
+        """Detiene la sonda y el hilo vigilante."""
+        if self._task is None:
+            return
+        self._stop.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._watchdog.join()
+    
+    async def _probe_loop(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._record(max(0.0, now - expected), now)
+    
+    def _record(self, lag: float, now: float) -> None:
+        lag_ms = lag * 1000
+        index = next((i for i, bound in enumerate(LAG_BUCKETS_MS) if lag_ms <= bound), len(LAG_BUCKETS_MS))
+        with self._lock:
+            self._last_beat = now
+            self.buckets[index] += 1
+            self.probes += 1
+            self.lag_sum += lag
+            self.last_lag = lag
+            self.lag_max = max(self.lag_max, lag)
+            stall, self._stall = self._stall, None
+            if stall is None and lag >= self.stall_threshold:
+                # Bloqueo más corto que el periodo del vigilante: se cuenta sin pila
+                stall = {"detected_at": time.time(), "blocked_ms": round(lag_ms), "duration_ms": None,
+                         "callback": "desconocido (no capturado)", "stack": ""}
+                self.stall_count += 1
+                self.stalls.append(stall)
+        if stall is not None:
+            # El bucle ha vuelto: cerrar el bloqueo con su duración total
+            stall["duration_ms"] = round(lag_ms)
+            logger.warning(f"Bucle de eventos bloqueado {stall['duration_ms']} ms en {stall['callback']}")
+    
+    def _watch(self) -> None:
+        while not self._stop.wait(self.stall_threshold / 2):
+            with self._lock:
+                blocked = time.monotonic() - self._last_beat - self.interval
+                if blocked < self.stall_threshold or self._stall is not None:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread)
+                stack = traceback.format_stack(frame) if frame is not None else []
+                self._stall = {
+                    "detected_at": time.time(),
+                    "blocked_ms": round(blocked * 1000),
+                    "duration_ms": None,
+                    "callback": _callback_frame(stack),
+                    "stack": "".join(stack),
+                }
+                self.stall_count += 1
+                self.stalls.append(self._stall)
+                stall = self._stall
+            logger.warning(
+                f"Bucle de eventos bloqueado desde hace {stall['blocked_ms']} ms en {stall['callback']}:\n{stall['stack']}"
+            )
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Métricas del bucle: histograma acumulado del retraso (ms) y contadores de bloqueos."""
+        with self._lock:
+            cumulative, buckets = 0, {}
+            for bound, count in zip([*map(str, LAG_BUCKETS_MS), "+Inf"], self.buckets):
+                cumulative += count
+                buckets[bound] = cumulative
+            return {
+                "running": self._task is not None,
+                "probes": self.probes,
+                "lag_ms": {
+                    "last": round(self.last_lag * 1000, 1),
+                    "mean": round(self.lag_sum / self.probes * 1000, 1) if self.probes else None,
+                    "max": round(self.lag_max * 1000, 1),
+                    "buckets": buckets,
+                },
+                "stalls": self.stall_count,
+                "stalled_now": self._stall is not None,
+                "stall_threshold_ms": self.stall_threshold * 1000,
+            }
+    
+    def recent_stalls(self) -> List[Dict[str, Any]]:
+        """Bloqueos recientes, del más reciente al más antiguo, con la pila capturada."""
+        with self._lock:
+            return [dict(stall) for stall in reversed(self.stalls)]
+
+
+def _callback_frame(stack: List[str]) -> str:
+    """Marco más interno del código de la aplicación (fuera de librerías) en la pila."""
+    for entry in reversed(stack):
+        location = entry.strip().splitlines()[0]
+        if "site-packages" not in location and "/lib/python" not in location:
+            return location
+    return stack[-1].strip().splitlines()[0] if stack else "desconocido"
+
+
+# Monitor del bucle de eventos del proceso
+loop_monitor = LoopMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL_MS / 1000,
+    stall_threshold=settings.LOOP_STALL_THRESHOLD_MS / 1000,
+    max_stalls=settings.LOOP_STALLS_KEPT
+)
@@ -0,0 +1,221 @@
+from collections import Counter, OrderedDict, defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import contextvars
+import sys
+import threading
+import time
+from core.config import settings
+
+# Perfil de la petición en curso (None si no se está perfilando: coste nulo fuera del perfilado)
+profile_var: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar("profile", default=None)
+
+# Categorías de tiempo según el módulo de los marcos de la pila (del más interno hacia fuera)
+CATEGORIES = (
+    ("espera_proveedor", ("httpcore", "httpx", "ssl", "socket", "openai._base_client", "h11")),
+    ("construccion_prompt", ("langchain_core.prompts", "langchain_core.messages", "common.prompt_templates")),
+    ("json", ("json",)),
+    ("regex", ("re", "common.utils.text_processor")),
+    ("pydantic", ("pydantic", "pydantic_core", "fastapi.encoders")),
+    ("sqlite", ("sqlite3",)),
+)
+
+# Categorías que solo se asignan por el marco más interno (todos los hilos pasan por
+# threading, y el bucle de eventos por selectors, aunque estén trabajando)
+LEAF_CATEGORIES = (
+    ("inactivo", ("selectors",)),
+    ("espera_hilos", ("threading", "concurrent.futures", "queue")),
+)
+
+
+class RequestProfile:
+    """Perfil de una petición: tiempos por etapa y pilas muestreadas de sus hilos.
+    
+    Solo se muestrean los hilos que trabajan para la petición (los de sus etapas y
+    los de los pools que propagan su contexto), que se registran con ``tracked``.
+    El resultado se exporta como resumen JSON o como pilas colapsadas (formato de
+    flamegraph.pl y speedscope).
+    """
+    
+    def __init__(self, profile_id: str, path: str, interval: float = 0.005):
+        """Inicializa el perfil.
+        
+        Args:
+            profile_id: ID del perfil (el de la petición)
+            path: Ruta de la petición perfilada
+            interval: Segundos entre muestras de las pilas
+        """
+        self.profile_id = profile_id
+        self.path = path
+        self.interval = interval
+        self.started_at = time.time()
+        self.wall: Optional[float] = None
+        self.status_code: Optional[int] = None
+        self.samples: Counter = Counter()
+        self.stages: Dict[str, Dict[str, float]] = defaultdict(lambda: {"count": 0, "wall": 0.0, "cpu": 0.0})
+        self._threads: Dict[int, List[str]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._start = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample_loop, name=f"profiler-{profile_id}", daemon=True)
+        self._sampler.start()
+    
+    @contextmanager
+    def tracked(self, label: str) -> Iterator[None]:
+        """Muestrea el hilo actual, con la etiqueta indicada, mientras dura el bloque."""
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._threads.setdefault(thread_id, []).append(label)
+        try:
+            yield
+        finally:
+            with self._lock:
+                labels = self._threads.get(thread_id)
+                if labels:
+                    labels.pop()
+                    if not labels:
+                        del self._threads[thread_id]
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Mide el tiempo real y de CPU de una etapa y muestrea su hilo."""
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            with self.tracked(name):
+                yield
+        finally:
+            with self._lock:
+                stats = self.stages[name]
+                stats["count"] += 1
+                stats["wall"] += time.perf_counter() - wall_start
+                stats["cpu"] += time.thread_time() - cpu_start
+    
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                threads = {thread_id: labels[-1] for thread_id, labels in self._threads.items()}
+            frames = sys._current_frames()
+            for thread_id, label in threads.items():
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+                stack.append(label)
+                stack.reverse()
+                self.samples[";".join(stack)] += 1
+    
+    def stop(self, status_code: Optional[int] = None) -> None:
+        """Detiene el muestreo y fija la duración de la petición."""
+        self.wall = time.perf_counter() - self._start
+        self.status_code = status_code
+        self._stop.set()
+        self._sampler.join()
+    
+    def collapsed(self) -> str:
+        """Pilas colapsadas: una línea 'marco;marco;... muestras' por pila distinta."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+    
+    def summary(self) -> Dict[str, Any]:
+        """Resumen del perfil: tiempos por etapa y reparto de las muestras por categoría."""
+        categories: Counter = Counter()
+        leaves: Counter = Counter()
+        for stack, count in self.samples.items():
+            frames = stack.split(";")
+            categories[_categorize(frames)] += count
+            leaves[frames[-1]] += count
+        total = sum(categories.values()) - categories["inactivo"]
+        return {
+            "id": self.profile_id,
+            "path": self.path,
+            "started_at": self.started_at,
+            "status_code": self.status_code,
+            "wall": round(self.wall, 3) if self.wall is not None else None,
+            "interval_ms": self.interval * 1000,
+            "stages": {
+                name: {"count": stats["count"], "wall": round(stats["wall"], 3), "cpu": round(stats["cpu"], 3)}
+                for name, stats in self.stages.items()
+            },
+            "samples": sum(self.samples.values()),
+            "categories": {
+                name: {"samples": count, "share": round(count / total, 3) if total else None}
+                for name, count in categories.most_common() if name != "inactivo"
+            },
+            "top_frames": [{"frame": frame, "samples": count} for frame, count in leaves.most_common(15)],
+        }
+
+
+def _categorize(frames: List[str]) -> str:
+    """Categoría de una pila según el marco más interno de un módulo conocido."""
+    leaf = frames[-1].split(":", 1)[0]
+    for category, prefixes in LEAF_CATEGORIES:
+        if _in_modules(leaf, prefixes):
+            return category
+    for frame in reversed(frames[1:]):
+        module = frame.split(":", 1)[0]
+        for category, prefixes in CATEGORIES:
+            if _in_modules(module, prefixes):
+                return category
+    return "otros"
+
+
+def _in_modules(module: str, prefixes: Iterable[str]) -> bool:
+    return any(module == prefix or module.startswith(prefix + ".") for prefix in prefixes)
+
+
+class ProfileStore:
+    """Últimos perfiles capturados en este proceso, y peticiones pendientes de perfilar."""
+    
+    def __init__(self, max_profiles: int = 20):
+        self.max_profiles = max_profiles
+        self._profiles: "OrderedDict[str, RequestProfile]" = OrderedDict()
+        self._armed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles[profile.profile_id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+    
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+    
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            profiles = list(self._profiles.values())
+        return [
+            {"id": profile.profile_id, "path": profile.path, "started_at": profile.started_at, "wall": profile.wall}
+            for profile in reversed(profiles)
+        ]
+    
+    def arm(self, path: str, count: int) -> None:
+        """Perfila las próximas ``count`` peticiones a la ruta indicada."""
+        with self._lock:
+            self._armed[path] = count
+    
+    def take_armed(self, path: str) -> bool:
+        """Consume una petición pendiente de perfilar para la ruta, si la hay."""
+        if not self._armed:
+            return False
+        with self._lock:
+            remaining = self._armed.get(path, 0)
+            if remaining <= 0:
+                return False
+            if remaining == 1:
+                del self._armed[path]
+            else:
+                self._armed[path] = remaining - 1
+            return True
+    
+    def armed(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._armed)
+
+
+# Perfiles del proceso
+profile_store = ProfileStore(settings.PROFILE_MAX_STORED)
@@ -0,0 +1,42 @@
+from typing import Mapping
+import contextvars
+import hashlib
+import re
+
+# Tenant de la petición en curso (se propaga igual que el contexto de log)
+tenant_var: contextvars.ContextVar[str] = contextvars.ContextVar("tenant", default="default")
+
+# Formato admitido en la cabecera X-Tenant-ID
+TENANT_ID_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9._:-]{0,63}")
+
+
+def tenant_for_key(api_key: str) -> str:
+    """Identificador de tenant derivado de una clave de API (sin guardar la clave en claro)."""
+    return f"key-{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]}"
+
+
+def tenant_from_headers(headers: Mapping[str, str]) -> str:
+    """Identifica el tenant de una petición.
+    
+    Si la petición trae una clave de API (X-API-Key o Authorization: Bearer), el
+    tenant es un hash de la clave y la cabecera X-Tenant-ID se ignora: con una misma
+    clave no se puede cambiar de tenant para obtener otra cuota. Sin clave se usa
+    X-Tenant-ID si tiene un formato válido (hasta 64 letras, dígitos o '._:-').
+    
+    Args:
+        headers: Cabeceras de la petición
+    
+    Returns:
+        Identificador del tenant ('default' si la petición no lo indica o no es válido)
+    """
+    api_key = headers.get("x-api-key") or ""
+    authorization = headers.get("authorization") or ""
+    if not api_key and authorization.lower().startswith("bearer "):
+        api_key = authorization[7:].strip()
+    if api_key:
+        return tenant_for_key(api_key)
+    
+    tenant = (headers.get("x-tenant-id") or "").strip()
+    if TENANT_ID_PATTERN.fullmatch(tenant):
+        return tenant
+    return "default"
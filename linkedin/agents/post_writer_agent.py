@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+import re
+from common.base_agent import BaseAgent
+from common.prompt_templates.base_templates import ContentPromptTemplate, PromptBuilder
+from core.logger import bind_log_context
+
+# Enfoques por defecto, en orden, cuando la petición no indica los suyos
+DEFAULT_ANGLES = [
+    "la idea principal del artículo y por qué importa ahora",
+    "un dato o hallazgo concreto de la investigación",
+    "un error habitual y cómo evitarlo",
+    "una lección práctica en primera persona profesional",
+    "una pregunta abierta para generar conversación",
+    "una lista breve de claves accionables",
+    "una tendencia y su impacto en el sector",
+    "un mito frente a la realidad",
+    "un caso o ejemplo ilustrativo",
+    "una reflexión sobre el futuro del tema",
+]
+
+POST_TEMPLATE = ContentPromptTemplate(
+    role_description="comunicación profesional en LinkedIn y en adaptar artículos largos a publicaciones breves",
+    content_objective="escribir publicaciones de LinkedIn que aporten valor por sí mismas a partir de un artículo ya escrito, sin repetir su investigación",
+    style_guidance="""Tono profesional, cercano y directo. Frases cortas y párrafos de una o dos líneas.
+Usa solo datos que aparezcan en el contenido de referencia; no inventes cifras ni fuentes.
+Entre 120 y 220 palabras. Termina con 3 a 5 hashtags relevantes en una última línea.""",
+    structure_description="""1. Gancho en la primera línea que invite a seguir leyendo
+2. Desarrollo del enfoque indicado con una sola idea central
+3. Cierre con una pregunta o llamada a la acción
+4. Hashtags""",
+    additional_instructions="Devuelve únicamente el texto de la publicación, sin títulos ni comentarios."
+)
+
+class LinkedInPostAgent(BaseAgent):
+    """
+    Agente Redactor de LinkedIn (LinkedIn Post Writer) - Especialidad: publicaciones breves derivadas de un artículo
+    Reutiliza la investigación, la estructura y el contenido de un artículo ya generado, de modo que
+    cada publicación es solo una generación corta adicional.
+    """
+    
+    stage = "social_post"
+    
+    def _get_prompt_data(self) -> Dict[str, str]:
+        """Obtiene los datos de prompt específicos para este agente.
+        
+        El contexto del artículo va al principio y el enfoque al final: todas las
+        publicaciones comparten el mismo prefijo, que el proveedor puede reutilizar
+        de su caché de prompts entre llamadas.
+        """
+        return (
+            PromptBuilder()
+            .add_system_component(POST_TEMPLATE.get_system_message())
+            .add_human_component("CONTENIDO DE REFERENCIA (artículo ya publicado):\n{contexto}")
+            .add_human_component(POST_TEMPLATE.get_human_template())
+            .add_human_component("ENFOQUE DE ESTA PUBLICACIÓN: {enfoque}")
+            .build()
+        )
+    
+    def write_posts(self, tema: str, contexto: str, enfoques: List[str],
+                    comentarios_adicionales: str = "Sin instrucciones adicionales.") -> List[Dict[str, Any]]:
+        """Escribe una publicación por enfoque, todas a la vez.
+        
+        Args:
+            tema: Tema del artículo
+            contexto: Contenido de referencia del artículo (investigación, estructura y texto)
+            enfoques: Enfoque de cada publicación
+            comentarios_adicionales: Instrucciones adicionales
+        
+        Returns:
+            Lista con el contenido y los hashtags de cada publicación, en el orden de los enfoques
+        """
+        def write(enfoque: str) -> Dict[str, Any]:
+            post = self.generate_content(
+                tema=tema, contexto=contexto, enfoque=enfoque, comentarios_adicionales=comentarios_adicionales
+            )
+            return {**post, "angle": enfoque}
+        
+        with ThreadPoolExecutor(max_workers=len(enfoques), thread_name_prefix="linkedin-post") as executor:
+            return list(executor.map(bind_log_context(write), enfoques))
+    
+    def _format_response(self, raw_content: str) -> Dict[str, Any]:
+        """Formatea la respuesta."""
+        content = raw_content.strip()
+        hashtags = list(dict.fromkeys(re.findall(r'#(\w+)', content)))
+        return {"content": content, "hashtags": hashtags}
@@ -0,0 +1,75 @@
+from fastapi import APIRouter, HTTPException, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from typing import TYPE_CHECKING, Optional
+import asyncio
+import logging
+import threading
+from blog.api.routes import cancel_on_disconnect
+from common.services.admission import AdmissionRejected, admission_controller
+from common.services.model_router import InvalidModelResponse
+from core.config import settings
+from core.deadline import DeadlineExceeded, deadline_scope
+from core.logger import bind_log_context
+from linkedin.models.requests import LinkedInRequest
+from linkedin.models.responses import LinkedInResponse
+
+if TYPE_CHECKING:
+    from linkedin.services.orchestrator import LinkedInOrchestrator
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+# Crear router - asegurarse de que se llame 'router' para que pueda ser importado
+router = APIRouter(prefix="/linkedin", tags=["linkedin"])
+
+# El orquestador se crea en el primer uso, igual que el del blog
+_orchestrator: Optional["LinkedInOrchestrator"] = None
+_init_lock = threading.Lock()
+
+def get_orchestrator() -> "LinkedInOrchestrator":
+    """Obtiene el orquestador compartido, creándolo en el primer uso."""
+    global _orchestrator
+    if _orchestrator is None:
+        with _init_lock:
+            if _orchestrator is None:
+                from linkedin.services.orchestrator import LinkedInOrchestrator
+                _orchestrator = LinkedInOrchestrator()
+    return _orchestrator
+
+@router.get("/")
+async def linkedin_root():
+    """Endpoint raíz del generador de publicaciones de LinkedIn."""
+    return {"message": "LinkedIn Content Generator API"}
+
+@router.post("/generar", response_model=LinkedInResponse)
+async def generate_posts(request: LinkedInRequest, http_request: Request,
+                         x_deadline_seconds: Optional[float] = Header(None)):
+    """Genera publicaciones de LinkedIn a partir de un artículo ya generado.
+    
+    Con ``ejecucion_id`` (metadata.ejecucion_id de /blog/generar) reutiliza la
+    investigación, la estructura y el contenido de esa generación; si no, usa el
+    artículo indicado en ``articulo``. Admisión, plazo y cancelación funcionan
+    igual que en /blog/generar.
+    """
+    try:
+        with deadline_scope(x_deadline_seconds or settings.REQUEST_DEADLINE_SECONDS or None) as deadline:
+            watcher = asyncio.create_task(cancel_on_disconnect(http_request, deadline))
+            try:
+                async with admission_controller.slot():
+                    return await run_in_threadpool(bind_log_context(get_orchestrator().generate), request)
+            finally:
+                watcher.cancel()
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+    except DeadlineExceeded as e:
+        logger.warning(f"Generación interrumpida: {str(e)}")
+        raise HTTPException(status_code=504, detail=f"Generación interrumpida: {str(e)}")
+    except InvalidModelResponse as e:
+        logger.error(f"Respuesta inválida del proveedor: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"{str(e)}. Por favor, inténtalo de nuevo.")
+    except ValueError as e:
+        logger.error(f"Error de validación: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error generando publicaciones: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error generando publicaciones. Por favor, inténtalo de nuevo.")
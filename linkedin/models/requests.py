@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Any
+from blog.models.requests import GenerationParameters
+
+class ArticleSource(BaseModel):
+    """Artículo del que derivar las publicaciones cuando no se indica una ejecución guardada."""
+    tema: str = Field(..., description="Tema del artículo")
+    contenido: str = Field(..., description="Contenido final del artículo en markdown")
+    investigacion: Optional[str] = Field(None, description="Investigación sintetizada utilizada en el artículo")
+    outline: Optional[Dict[str, Any]] = Field(None, description="Estructura del artículo (title, introduction, sections, conclusion)")
+
+class LinkedInRequest(BaseModel):
+    """Modelo para solicitudes de publicaciones de LinkedIn derivadas de un artículo."""
+    ejecucion_id: Optional[str] = Field(None, description="ID de ejecución de un artículo generado (metadata.ejecucion_id de /blog/generar)")
+    articulo: Optional[ArticleSource] = Field(None, description="Artículo de origen, si no se indica ejecucion_id")
+    num_publicaciones: int = Field(5, ge=1, le=10, description="Número de publicaciones a generar")
+    enfoques: Optional[List[str]] = Field(None, description="Enfoque de cada publicación (por defecto, enfoques variados)")
+    prompt_personalizado: Optional[str] = Field(None, description="Indicaciones personalizadas para las publicaciones")
+    parametros: Optional[GenerationParameters] = Field(None, description="Parámetros avanzados de generación")
+    plazo_segundos: Optional[float] = Field(None, gt=0, description="Plazo máximo de la generación")
@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Any
+
+class LinkedInPost(BaseModel):
+    """Publicación de LinkedIn generada."""
+    content: str = Field(..., description="Texto de la publicación")
+    angle: str = Field(..., description="Enfoque de la publicación")
+    hashtags: List[str] = Field(default_factory=list, description="Hashtags incluidos en la publicación")
+
+class LinkedInResponse(BaseModel):
+    """Modelo para respuestas de generación de publicaciones de LinkedIn."""
+    posts: List[LinkedInPost] = Field(..., description="Publicaciones generadas")
+    title: str = Field(..., description="Título del artículo de origen")
+    metadata: Optional[Dict[str, Any]] = Field({}, description="Metadatos adicionales")
@@ -0,0 +1,158 @@
+from typing import Dict, Any, List, Optional
+from contextlib import nullcontext
+from common.services.run_store import run_store
+from common.stage_graph import Stage, StageGraph
+from core.config import settings
+from core.deadline import deadline_scope
+from core.tenancy import tenant_var
+from linkedin.agents.post_writer_agent import DEFAULT_ANGLES, LinkedInPostAgent
+from linkedin.models.requests import LinkedInRequest
+from linkedin.models.responses import LinkedInPost, LinkedInResponse
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Límites del contexto de referencia que se envía en cada publicación
+MAX_RESEARCH_CHARS = 4000
+MAX_CONTENT_CHARS = 8000
+
+# Valores iniciales del grafo de etapas del pipeline de LinkedIn
+GRAPH_INPUTS = ("agent", "ejecucion_id", "articulo", "num_publicaciones", "enfoques", "prompt_personalizado")
+
+class LinkedInOrchestrator:
+    """Orquestador para derivar publicaciones de LinkedIn de un artículo ya generado.
+    
+    No repite la investigación ni la estructura: parte de los artefactos guardados
+    de la generación del artículo, de modo que cada publicación solo cuesta una
+    generación corta.
+    """
+    
+    def __init__(self, model_name: Optional[str] = None):
+        """Inicializa el orquestador.
+        
+        Args:
+            model_name: Nombre del modelo a utilizar (por defecto, el de la política de enrutado)
+        """
+        self.post_writer = LinkedInPostAgent(model_name)
+        self.graph = self._build_graph()
+    
+    def warm_up(self) -> None:
+        """Prepara el cliente del agente y abre su conexión con el proveedor."""
+        try:
+            self.post_writer.warm_up()
+        except Exception as e:
+            logger.warning(f"No se pudo precalentar {type(self.post_writer).__name__}: {str(e)}")
+    
+    def generate(self, request: LinkedInRequest) -> LinkedInResponse:
+        """Genera las publicaciones de una petición validada.
+        
+        Args:
+            request: Petición de publicaciones de LinkedIn
+        
+        Returns:
+            Respuesta con las publicaciones generadas
+        
+        Raises:
+            ValueError: Si no se indica el artículo de origen o la ejecución no existe
+            DeadlineExceeded: Si se agota el plazo de la petición o se cancela
+        """
+        if not request.ejecucion_id and request.articulo is None:
+            raise ValueError("Indica ejecucion_id (de un artículo generado) o el artículo de origen")
+        
+        agent = self.post_writer
+        if request.parametros:
+            model_params = request.parametros.model_dump(exclude_none=True)
+            model_name = model_params.pop("model", None)
+            agent = LinkedInPostAgent(model_name=model_name, **model_params)
+        
+        start = time.perf_counter()
+        with deadline_scope(request.plazo_segundos) if request.plazo_segundos else nullcontext():
+            graph_run = self.graph.run({
+                "agent": agent,
+                "ejecucion_id": request.ejecucion_id,
+                "articulo": request.articulo.model_dump() if request.articulo else None,
+                "num_publicaciones": request.num_publicaciones,
+                "enfoques": request.enfoques,
+                "prompt_personalizado": request.prompt_personalizado,
+            })
+        timings = dict(graph_run.timings)
+        timings["total"] = time.perf_counter() - start
+        
+        source = graph_run["origen"]
+        return LinkedInResponse(
+            posts=[LinkedInPost(**post) for post in graph_run["publicaciones"]],
+            title=source["title"],
+            metadata={
+                "ejecucion_id": request.ejecucion_id,
+                "origen": "ejecucion" if request.ejecucion_id else "articulo",
+                "publicaciones": len(graph_run["publicaciones"]),
+                "tiempos": {stage: round(seconds, 3) for stage, seconds in timings.items()}
+            }
+        )
+    
+    def _build_graph(self) -> StageGraph:
+        """Define el pipeline de LinkedIn como grafo de etapas."""
+        graph = StageGraph("linkedin", max_workers=settings.PIPELINE_MAX_WORKERS)
+        graph.add(Stage("origen", self._load_source, inputs=("ejecucion_id", "articulo")))
+        graph.add(Stage("contexto", self._build_context, inputs=("origen",)))
+        graph.add(Stage(
+            "publicaciones",
+            lambda agent, origen, contexto, num_publicaciones, enfoques, prompt_personalizado: agent.write_posts(
+                tema=origen["tema"],
+                contexto=contexto,
+                enfoques=self._angles(num_publicaciones, enfoques),
+                comentarios_adicionales=prompt_personalizado or "Sin instrucciones adicionales."
+            ),
+            inputs=("agent", "origen", "contexto", "num_publicaciones", "enfoques", "prompt_personalizado")
+        ))
+        graph.validate(GRAPH_INPUTS)
+        return graph
+    
+    @staticmethod
+    def _load_source(ejecucion_id: Optional[str], articulo: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Obtiene el artículo de origen de la ejecución guardada o de la propia petición."""
+        if ejecucion_id:
+            run = run_store.get(ejecucion_id, tenant_var.get())
+            if run is None:
+                raise ValueError(f"Ejecución no encontrada o caducada: {ejecucion_id}")
+            logger.info(f"Reutilizando los artefactos de la ejecución {ejecucion_id} para el tema: {run['tema']}")
+            source = {"tema": run["tema"], "research": run["research"], "outline": run["outline"], "content": run["content"]}
+        else:
+            source = {
+                "tema": articulo["tema"],
+                "research": articulo["investigacion"] or "",
+                "outline": articulo["outline"],
+                "content": articulo["contenido"],
+            }
+        source["title"] = (source["outline"] or {}).get("title") or source["tema"]
+        return source
+    
+    @staticmethod
+    def _build_context(origen: Dict[str, Any]) -> str:
+        """Condensa el artículo de origen en el contexto compartido por todas las publicaciones."""
+        parts = [f"Título: {origen['title']}"]
+        outline = origen["outline"] or {}
+        sections = outline.get("sections") or []
+        if sections:
+            lines = []
+            for section in sections:
+                lines.append(f"- {section.get('heading', '')}")
+                for point in section.get("key_points") or []:
+                    lines.append(f"  • {point}")
+            parts.append("Estructura y puntos clave:\n" + "\n".join(lines))
+        if origen["research"]:
+            parts.append(f"Investigación:\n{origen['research'][:MAX_RESEARCH_CHARS]}")
+        parts.append(f"Artículo:\n{origen['content'][:MAX_CONTENT_CHARS]}")
+        return "\n\n".join(parts)
+    
+    @staticmethod
+    def _angles(num_publicaciones: int, enfoques: Optional[List[str]]) -> List[str]:
+        """Enfoque de cada publicación: los de la petición, completados con los predeterminados."""
+        angles = list(enfoques or [])[:num_publicaciones]
+        for angle in DEFAULT_ANGLES:
+            if len(angles) >= num_publicaciones:
+                break
+            if angle not in angles:
+                angles.append(angle)
+        return angles
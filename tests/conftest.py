@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# Los almacenes locales y los clientes se configuran al importar los módulos: aislar
+# los datos de cada ejecución de las pruebas y no depender de credenciales reales
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="content-agent-tests-"))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
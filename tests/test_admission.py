@@ -0,0 +1,154 @@
+import asyncio
+
+import pytest
+
+from common.services.admission import AdmissionController, AdmissionRejected
+
+
+def test_admits_immediately_below_capacity():
+    controller = AdmissionController(max_in_flight=2)
+
+    async def main():
+        async with controller.slot(tenant="a"):
+            assert controller.snapshot()["in_flight"] == 1
+
+    asyncio.run(main())
+    snapshot = controller.snapshot()
+    assert snapshot["in_flight"] == 0
+    assert snapshot["admitted"] == 1
+    assert snapshot["in_flight_by_tenant"] == {}
+
+
+def test_batch_cannot_take_the_reserved_interactive_slot():
+    controller = AdmissionController(max_in_flight=2, interactive_reserved=1)
+
+    async def main():
+        await controller.acquire("interactive", "a")
+        batch = asyncio.create_task(controller.acquire("batch", "b"))
+        await asyncio.sleep(0.01)
+        assert not batch.done()
+
+        # El hueco reservado sigue libre para una petición interactiva
+        await controller.acquire("interactive", "c")
+        assert controller.snapshot()["in_flight"] == 2
+        batch.cancel()
+
+    asyncio.run(main())
+
+
+def test_interactive_waiters_overtake_batch_waiters():
+    controller = AdmissionController(max_in_flight=1, interactive_reserved=0, initial_service_seconds=0.01)
+    order = []
+
+    async def request(lane, tenant):
+        await controller.acquire(lane, tenant)
+        order.append(lane)
+
+    async def main():
+        await controller.acquire("interactive", "a")
+        batch = asyncio.create_task(request("batch", "b"))
+        await asyncio.sleep(0.01)
+        interactive = asyncio.create_task(request("interactive", "c"))
+        await asyncio.sleep(0.01)
+
+        controller.release(tenant="a")
+        await asyncio.sleep(0.01)
+        assert order == ["interactive"]
+        controller.release(tenant="c")
+        await asyncio.gather(batch, interactive)
+
+    asyncio.run(main())
+    assert order == ["interactive", "batch"]
+
+
+def test_least_busy_tenant_gets_the_next_slot():
+    controller = AdmissionController(max_in_flight=2, initial_service_seconds=0.01)
+    order = []
+
+    async def request(tenant):
+        await controller.acquire("interactive", tenant)
+        order.append(tenant)
+
+    async def main():
+        await controller.acquire("interactive", "grande")
+        await controller.acquire("interactive", "grande")
+        tasks = [asyncio.create_task(request(tenant)) for tenant in ("grande", "grande", "pequeño")]
+        await asyncio.sleep(0.01)
+
+        controller.release(tenant="grande")
+        await asyncio.sleep(0.01)
+        assert order == ["pequeño"]
+        for task in tasks:
+            task.cancel()
+
+    asyncio.run(main())
+
+
+def test_rejects_with_429_when_the_queue_is_full():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, initial_service_seconds=0.01)
+
+    async def main():
+        await controller.acquire("interactive", "a")
+        waiting = asyncio.create_task(controller.acquire("interactive", "b"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("interactive", "c")
+        waiting.cancel()
+        return rejected.value
+
+    rejected = asyncio.run(main())
+    assert rejected.status_code == 429
+    assert rejected.retry_after >= 1
+    assert controller.snapshot()["rejected_queue"] == 1
+
+
+def test_rejects_when_the_estimated_wait_is_too_long():
+    controller = AdmissionController(max_in_flight=1, max_wait_seconds=5, initial_service_seconds=60)
+
+    async def main():
+        await controller.acquire("interactive", "a")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("interactive", "b")
+        return rejected.value
+
+    rejected = asyncio.run(main())
+    assert rejected.status_code == 429
+    assert rejected.retry_after == 60
+
+
+def test_rejects_with_503_after_waiting_without_a_slot():
+    controller = AdmissionController(max_in_flight=1, max_wait_seconds=0.05, initial_service_seconds=0.01)
+
+    async def main():
+        await controller.acquire("interactive", "a")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("interactive", "b")
+        return rejected.value
+
+    rejected = asyncio.run(main())
+    assert rejected.status_code == 503
+    snapshot = controller.snapshot()
+    assert snapshot["rejected_timeout"] == 1
+    assert snapshot["queued"]["interactive"] == 0
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    controller = AdmissionController(max_in_flight=1, initial_service_seconds=0.01)
+
+    async def main():
+        await controller.acquire("interactive", "a")
+        waiting = asyncio.create_task(controller.acquire("interactive", "b"))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        await asyncio.sleep(0.01)
+        controller.release(tenant="a")
+
+    asyncio.run(main())
+    snapshot = controller.snapshot()
+    assert snapshot["in_flight"] == 0
+    assert snapshot["queued"]["interactive"] == 0
+
+
+def test_rejects_unknown_lanes():
+    with pytest.raises(ValueError):
+        asyncio.run(AdmissionController().acquire("urgente"))
@@ -0,0 +1,86 @@
+import sqlite3
+
+import pytest
+
+from common.services.article_store import ArticleStore
+
+CONTENT = "# Título\n\nIntroducción.\n\n## Uno\n\nTexto uno.\n\n## Dos\n\nTexto dos."
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ArticleStore(str(tmp_path / "articles.db"))
+    store.create("a1", "tema", "short", ["informativo"], "investigación", {"title": "Título"}, CONTENT, tenant="t")
+    return store
+
+
+def test_new_article_is_version_one(store):
+    article = store.get("a1", "t")
+
+    assert article["version"] == article["latest_version"] == 1
+    assert article["content"] == CONTENT
+    assert len(article["sections"]) == 3
+    assert store.exists("a1", "t")
+    assert not store.exists("otro", "t")
+    assert store.get("otro", "t") is None
+
+
+def test_previous_versions_are_reconstructed_from_changes(store):
+    original = store.get("a1", "t")["sections"]
+    assert store.update_section("a1", "t", 1, "## Uno\n\nTexto uno reescrito.", "más claro") == 2
+    assert store.update_section("a1", "t", 2, "## Dos\n\nTexto dos reescrito.") == 3
+    assert store.update_section("a1", "t", 1, "## Uno\n\nTercera versión.") == 4
+
+    assert store.get("a1", "t", 1)["sections"] == original
+    assert store.get("a1", "t", 1)["content"] == CONTENT
+    second = store.get("a1", "t", 2)["sections"]
+    assert second[1] == "## Uno\n\nTexto uno reescrito.\n\n"
+    assert second[2] == original[2]
+    latest = store.get("a1", "t")
+    assert latest["version"] == 4
+    assert latest["sections"][1] == "## Uno\n\nTercera versión.\n\n"
+    assert latest["sections"][2] == "## Dos\n\nTexto dos reescrito."
+    assert [(change["version"], change["section"]) for change in store.history("a1", "t")] == [(2, 1), (3, 2), (4, 1)]
+
+
+@pytest.mark.parametrize("version", [0, 2])
+def test_unknown_version_is_rejected(store, version):
+    with pytest.raises(ValueError):
+        store.get("a1", "t", version)
+
+
+def test_invalid_section_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.update_section("a1", "t", 3, "x")
+    with pytest.raises(ValueError):
+        store.update_section("otro", "t", 0, "x")
+
+
+def test_articles_are_only_visible_to_their_tenant(store):
+    store.update_section("a1", "t", 1, "## Uno\n\nTexto uno reescrito.")
+
+    assert store.get("a1", "otro") is None
+    assert not store.exists("a1", "otro")
+    assert store.history("a1", "otro") == []
+    with pytest.raises(ValueError):
+        store.update_section("a1", "otro", 1, "## Uno\n\nAjeno.")
+    assert store.get("a1", "t")["version"] == 2
+
+
+def test_stores_without_tenant_are_migrated(tmp_path):
+    path = str(tmp_path / "articles.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE articles (id TEXT PRIMARY KEY, tema TEXT NOT NULL, longitud TEXT NOT NULL, "
+            "estilos TEXT NOT NULL, research TEXT, outline TEXT, sections TEXT NOT NULL, version INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute("INSERT INTO articles VALUES ('viejo', 'tema', 'short', '[]', NULL, NULL, '[\"x\"]', 1, 0, 0)")
+    conn.close()
+    store = ArticleStore(path)
+
+    store.create("a1", "tema", "short", [], None, None, CONTENT, tenant="t")
+
+    assert store.exists("a1", "t")
+    # Los artículos anteriores no tienen dueño conocido: no se devuelven a nadie
+    assert store.get("viejo", "default") is None
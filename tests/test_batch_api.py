@@ -0,0 +1,135 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from common.base_agent import BaseAgent
+from common.models.config import ModelConfiguration
+from common.services.batch_api import (
+    BatchRequestFailed, DeferredBatchQueue, LocalBatchClient, batch_queue_var, window_seconds,
+)
+
+
+class StubCompletions:
+    """Cliente de chat síncrono de prueba: responde con el modelo y el último mensaje."""
+
+    def __init__(self):
+        self.bodies = []
+
+    def create(self, **body):
+        self.bodies.append(body)
+        if body["model"] == "roto":
+            raise RuntimeError("modelo no disponible")
+        text = f"{body['model']}: {body['messages'][-1]['content']}"
+        return SimpleNamespace(model_dump=lambda: {"choices": [{"message": {"content": text}}] * body.get("n", 1)})
+
+
+class StuckBatchClient(LocalBatchClient):
+    """Sustituto cuyos lotes nunca terminan (por ejemplo, atascados en 'finalizing')."""
+
+    def _execute(self, batch, input_file_id):
+        pass
+
+
+def make_queue(completions, client_class=LocalBatchClient, **kwargs):
+    clients = []
+
+    def factory(model_config):
+        clients.append(client_class(SimpleNamespace(chat=SimpleNamespace(completions=completions))))
+        return clients[-1]
+
+    queue = DeferredBatchQueue(factory, collect_seconds=0.2, poll_seconds=0.02, **kwargs)
+    return queue, clients
+
+
+def body(model, text, n=1):
+    return {"model": model, "messages": [{"role": "user", "content": text}], "n": n}
+
+
+def complete_concurrently(queue, calls):
+    results = [None] * len(calls)
+
+    def run(index, model, text):
+        try:
+            results[index] = queue.complete(ModelConfiguration(model_id=model), body(model, text))
+        except BatchRequestFailed as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=run, args=(i, *call)) for i, call in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+
+def test_window_seconds():
+    assert window_seconds("24h") == 86400
+    assert window_seconds("30m") == 1800
+    assert window_seconds("90") == 90
+
+
+def test_calls_are_grouped_in_one_batch_per_model():
+    completions = StubCompletions()
+    queue, clients = make_queue(completions)
+    try:
+        results = complete_concurrently(queue, [("a", "uno"), ("b", "dos"), ("a", "tres")])
+    finally:
+        queue.close()
+
+    assert results == [["a: uno"], ["b: dos"], ["a: tres"]]
+    assert queue.snapshot()["batches"] == 2
+    assert len(clients) == 2
+    assert sorted(len(client._batches) for client in clients) == [1, 1]
+
+
+def test_error_file_lines_fail_only_their_calls():
+    queue, _ = make_queue(StubCompletions())
+    try:
+        results = complete_concurrently(queue, [("roto", "uno"), ("a", "dos")])
+    finally:
+        queue.close()
+
+    assert isinstance(results[0], BatchRequestFailed)
+    assert "modelo no disponible" in str(results[0])
+    assert results[1] == ["a: dos"]
+    assert queue.snapshot()["failed"] == 1
+
+
+def test_stuck_batch_is_abandoned_after_timeout():
+    queue, clients = make_queue(StubCompletions(), client_class=StuckBatchClient, timeout=0.2)
+    try:
+        with pytest.raises(BatchRequestFailed, match="sin terminar"):
+            queue.complete(ModelConfiguration(model_id="a"), body("a", "uno"))
+    finally:
+        queue.close()
+    assert [batch.status for batch in clients[0]._batches.values()] == ["cancelled"]
+
+
+class EchoAgent(BaseAgent):
+    stage = "writing"
+
+    def _get_prompt_data(self):
+        return {"system_message": "sistema", "human_template": "{texto}"}
+
+    def _format_response(self, raw_content):
+        return {"content": raw_content}
+
+
+def test_agent_uses_batch_and_falls_back_to_synchronous_call(monkeypatch):
+    agent = EchoAgent(model_name="a")
+    sync_calls = []
+    monkeypatch.setattr(agent, "run_with_fallback", lambda call: sync_calls.append(1) or "síncrono")
+
+    queue, _ = make_queue(StubCompletions())
+    token = batch_queue_var.set(queue)
+    try:
+        assert agent.generate_content(texto="hola") == {"content": "a: hola"}
+        assert not sync_calls
+
+        agent.pinned_model = ModelConfiguration(model_id="roto")
+        assert agent.generate_content(texto="hola") == {"content": "síncrono"}
+        assert sync_calls == [1]
+    finally:
+        batch_queue_var.reset(token)
+        queue.close()
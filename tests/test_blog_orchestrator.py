@@ -0,0 +1,197 @@
+from types import SimpleNamespace
+
+import pytest
+
+from blog.agents.content_writer_agent import ContentWriterAgent
+from blog.services.orchestrator import BlogOrchestrator
+from common.models.config import ModelConfiguration
+from common.services.retrieval_index import KIND_SYNTHESIS, KIND_URL, RetrievalIndex
+from core.tenancy import tenant_var
+
+OUTLINE = {
+    "title": "Energía solar",
+    "introduction": "Intro",
+    "sections": [{"heading": "Uno"}, {"heading": "Dos"}],
+    "conclusion": "Fin",
+}
+
+ARTICLE = "# Energía solar\n\nIntroducción.\n\n## Uno\n\nTexto uno.\n\n## Dos\n\nTexto dos."
+
+
+class FakeOutlinePlanner:
+    def generate_outline(self, tema, longitud, estilos, prompt_personalizado=None):
+        return OUTLINE
+
+
+class FakeWriter:
+    def __init__(self):
+        self.calls = []
+
+    def write_variants(self, n, **kwargs):
+        self.calls.append(kwargs)
+        return [ARTICLE] * n
+
+
+class FakeStyleEditor:
+    def __init__(self):
+        self.calls = 0
+
+    def edit_content(self, content, estilos):
+        self.calls += 1
+        return content
+
+
+class FakeTranslator:
+    def translate(self, content, idioma, titulo):
+        return f"[{idioma}] {content}"
+
+
+class FakeChatModel:
+    """Modelo que devuelve todas las generaciones pedidas con ``n`` en una sola llamada."""
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.generate_calls = []
+        self.invoke_calls = 0
+
+    def generate(self, messages, n=1, **kwargs):
+        self.generate_calls.append(n)
+        return SimpleNamespace(generations=[[SimpleNamespace(text=text) for text in self.texts[:n]]])
+
+    def invoke(self, messages, **kwargs):
+        self.invoke_calls += 1
+        raise AssertionError("las variantes deben salir de una sola llamada")
+
+
+@pytest.fixture
+def orchestrator(tmp_path, monkeypatch):
+    orchestrator = BlogOrchestrator()
+    orchestrator.outline_planner = FakeOutlinePlanner()
+    orchestrator.content_writer = FakeWriter()
+    orchestrator.fast_writer = FakeWriter()
+    orchestrator.style_editor = FakeStyleEditor()
+    orchestrator.translator = FakeTranslator()
+
+    researcher = orchestrator.web_researcher
+    researcher.index = RetrievalIndex(str(tmp_path / "retrieval.db"))
+    researcher.synthesized = []
+    monkeypatch.setattr(researcher, "_analyze_url", lambda url, query: f"Resumen de {url}")
+    monkeypatch.setattr(
+        researcher, "synthesize_research",
+        lambda results, tema: researcher.synthesized.append(results) or "Síntesis"
+    )
+    return orchestrator
+
+
+def generate(orchestrator, **kwargs):
+    return orchestrator.generate_blog_content(
+        tema=kwargs.pop("tema", "energía solar para empresas"), longitud="short", estilos=["informativo"],
+        reutilizar_similares=False, **kwargs
+    )
+
+
+def test_indexed_research_of_the_tenant_reaches_synthesis(orchestrator):
+    index = orchestrator.web_researcher.index
+    index.add(KIND_SYNTHESIS, "síntesis: energía solar", "Energía solar para empresas: costes", tenant="a")
+    index.add(KIND_SYNTHESIS, "síntesis: energía solar", "Energía solar para empresas: ajena", tenant="b")
+    index.add(KIND_URL, "https://example.com", "Energía solar para empresas (resumen previo)", tenant="a")
+
+    token = tenant_var.set("a")
+    try:
+        result = generate(orchestrator, urls=["https://example.com"])
+    finally:
+        tenant_var.reset(token)
+
+    synthesized = orchestrator.web_researcher.synthesized[0]
+    assert [item["content"] for item in synthesized] == [
+        "Energía solar para empresas: costes",
+        # La URL pedida se reutiliza del índice una sola vez, como resultado de su análisis
+        "Energía solar para empresas (resumen previo)",
+    ]
+    assert [item["source"] for item in synthesized] == [
+        "índice local (síntesis: energía solar)", "https://example.com"
+    ]
+    assert result["metadata"]["investigacion_local"] == 1
+    assert "INFORMACIÓN DE REFERENCIA:\nSíntesis" in orchestrator.content_writer.calls[0]["prompt_personalizado"]
+
+
+def test_requests_without_sources_get_no_indexed_research(orchestrator):
+    index = orchestrator.web_researcher.index
+    index.add(KIND_SYNTHESIS, "síntesis: energía solar", "Energía solar para empresas: costes", tenant="default")
+
+    result = generate(orchestrator)
+
+    assert orchestrator.web_researcher.synthesized == []
+    assert result["metadata"]["investigacion_local"] == 0
+    assert orchestrator.content_writer.calls[0]["prompt_personalizado"] is None
+
+
+def test_each_language_gets_its_own_translation_and_summary(orchestrator):
+    result = generate(orchestrator, idiomas=["es", "en", "pt"])
+
+    translations = result["translations"]
+    assert list(translations) == ["es", "en", "pt"]
+    assert set(translations["en"]) == set(translations["pt"]) == {"content", "title", "summary"}
+    assert translations["es"]["content"] == ARTICLE
+    assert translations["en"]["content"].startswith("[inglés] # Energía solar")
+    assert "[inglés] ## Dos" in translations["en"]["content"]
+    assert translations["pt"]["content"].startswith("[portugués] # Energía solar")
+    assert "[inglés]" not in translations["pt"]["content"]
+    assert translations["en"]["summary"] != translations["pt"]["summary"]
+    assert result["metadata"]["idiomas"] == ["es", "en", "pt"]
+
+
+def test_empty_article_is_translated_without_fragments():
+    ranking = [{"content": "", "title": "Energía solar", "summary": ""}]
+
+    translations = BlogOrchestrator._translate({"translator": FakeTranslator()}, "energía solar", ["en"], ranking)
+
+    assert translations["en"]["content"] == ""
+    assert translations["en"]["title"] == "Energía solar"
+
+
+def test_fast_tier_skips_editing_and_single_source_synthesis(orchestrator):
+    result = generate(orchestrator, calidad="fast", urls=["https://example.com"])
+
+    assert orchestrator.web_researcher.synthesized == []
+    assert orchestrator.style_editor.calls == 0
+    assert orchestrator.content_writer.calls == []
+    # La única fuente llega tal cual a la redacción
+    assert "Resumen de https://example.com" in orchestrator.fast_writer.calls[0]["prompt_personalizado"]
+    assert result["metadata"]["calidad"] == "fast"
+    tiempos = result["metadata"]["tiempos"]
+    assert {"redaccion", "total"} <= set(tiempos)
+    assert "edicion" not in tiempos and "sintesis" not in tiempos
+
+
+def test_standard_tier_edits_and_synthesizes(orchestrator):
+    result = generate(orchestrator, urls=["https://example.com"])
+
+    assert len(orchestrator.web_researcher.synthesized) == 1
+    assert orchestrator.style_editor.calls == 1
+    assert orchestrator.fast_writer.calls == []
+    assert result["metadata"]["calidad"] == "standard"
+    assert {"sintesis", "redaccion", "edicion", "total"} <= set(result["metadata"]["tiempos"])
+
+
+def test_variants_come_from_one_call_and_are_ranked_with_their_own_summaries(orchestrator, monkeypatch):
+    llm = FakeChatModel([
+        "# Parcial\n\nIntro parcial.\n\n## Uno\n\nTexto uno.",
+        "# Completa\n\nIntro completa.\n\n## Uno\n\nTexto uno.\n\n## Dos\n\nTexto dos.",
+        "# Ajena\n\nIntro ajena: en este artículo.\n\n## Otra\n\nTexto.",
+    ])
+    writer = ContentWriterAgent()
+    monkeypatch.setattr(writer, "run_with_fallback", lambda call: call(ModelConfiguration(model_id="modelo")))
+    monkeypatch.setattr(writer, "get_llm", lambda model_config: llm)
+    orchestrator.content_writer = writer
+
+    result = generate(orchestrator, variantes=3)
+
+    assert llm.generate_calls == [3] and llm.invoke_calls == 0
+    variants = result["variants"]
+    assert [variant["title"] for variant in variants] == ["Completa", "Parcial", "Ajena"]
+    assert [variant["summary"] for variant in variants] == ["Intro completa.", "Intro parcial.", "Intro ajena: en este artículo."]
+    assert [variant["rank"] for variant in variants] == [1, 2, 3]
+    assert variants[0]["score"] > variants[1]["score"] > variants[2]["score"]
+    assert (result["content"], result["summary"]) == (variants[0]["content"], "Intro completa.")
+    assert orchestrator.style_editor.calls == 3
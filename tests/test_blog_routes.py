@@ -0,0 +1,90 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from blog.api import routes
+from blog.services.batch_service import BatchGenerator
+from common.services.admission import AdmissionController
+from common.services.article_store import article_store
+from common.services.model_router import InvalidModelResponse
+from core.config import settings
+
+BLOG = f"{settings.API_V1_STR}/blog"
+
+
+@pytest.fixture
+def client():
+    # Sin el ciclo de vida: las pruebas no precalientan ni arrancan el monitor del bucle
+    return TestClient(app)
+
+
+@pytest.fixture
+def saturated(monkeypatch):
+    controller = AdmissionController(max_in_flight=1, max_queue=0)
+    controller._in_flight = 1
+    monkeypatch.setattr(routes, "admission_controller", controller)
+    return controller
+
+
+def test_priority_header_does_not_bypass_load_shedding(client, saturated):
+    response = client.post(f"{BLOG}/generar", json={"tema": "energía solar"}, headers={"X-Priority": "batch"})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"]
+    assert saturated.snapshot()["queued"] == {"interactive": 0, "batch": 0}
+
+
+def test_invalid_model_output_on_section_regeneration_is_a_bad_gateway(client, monkeypatch):
+    article_store.create(
+        "art-502", "energía solar", "short", [], "", None, "# Energía solar\n\nIntro.\n\n## Uno\n\nTexto.", tenant="default"
+    )
+
+    def regenerate_section(*args):
+        raise InvalidModelResponse("La sección generada no es válida")
+
+    monkeypatch.setattr(routes, "get_orchestrator", lambda: SimpleNamespace(regenerate_section=regenerate_section))
+
+    response = client.post(f"{BLOG}/articulos/art-502/secciones/1/regenerar", json={})
+
+    assert response.status_code == 502
+    assert response.json()["detail"].startswith("La sección generada no es válida")
+
+
+def test_articles_of_another_tenant_are_not_found(client):
+    article_store.create("art-ajeno", "energía solar", "short", [], "", None, "# Energía solar\n\nIntro.", tenant="a")
+
+    assert client.get(f"{BLOG}/articulos/art-ajeno", headers={"X-Tenant-ID": "a"}).status_code == 200
+    for path in ("articulos/art-ajeno", "articulos/art-ajeno/historial"):
+        assert client.get(f"{BLOG}/{path}", headers={"X-Tenant-ID": "b"}).status_code == 404
+    response = client.post(
+        f"{BLOG}/articulos/art-ajeno/secciones/0/regenerar", json={}, headers={"X-Tenant-ID": "b"}
+    )
+    assert response.status_code == 404
+
+
+class FakeBatchOrchestrator:
+    def generate(self, request, url_cache=None):
+        if request.tema == "fallida":
+            raise ValueError("Tema no válido")
+        return SimpleNamespace(model_dump=lambda: {"title": request.tema})
+
+
+def test_batch_streams_one_ndjson_line_per_article_and_a_summary(client, monkeypatch):
+    monkeypatch.setattr(routes, "get_batch_generator", lambda: BatchGenerator(FakeBatchOrchestrator(), concurrency=2))
+
+    response = client.post(
+        f"{BLOG}/generar-lote", json={"peticiones": [{"tema": "solar"}, {"tema": "fallida"}, {"tema": "eólica"}]}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    items = sorted(lines[:-1], key=lambda item: item["index"])
+    assert [item["status"] for item in items] == ["ok", "error", "ok"]
+    assert items[0]["result"] == {"title": "solar"}
+    assert items[1]["error"] == "Tema no válido"
+    assert lines[-1]["status"] == "done"
+    assert (lines[-1]["total"], lines[-1]["failed"]) == (3, 1)
@@ -0,0 +1,119 @@
+import time
+
+from common.services.cache import (
+    CacheBackend, LocalRemoteClient, MemoryCache, RemoteCache, SQLiteCache, TieredCache, content_key
+)
+
+
+class FailingTier(CacheBackend):
+    name = "failing"
+
+    def __init__(self):
+        super().__init__(60)
+
+    def get(self, key):
+        raise ConnectionError("caída")
+
+    def set(self, key, value, ttl=None):
+        raise ConnectionError("caída")
+
+
+class UnreachableClient:
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, key):
+        self.calls += 1
+        raise ConnectionError("connection refused")
+
+    def set(self, key, value, ex=None):
+        self.calls += 1
+        raise ConnectionError("connection refused")
+
+
+def test_content_key_is_stable_and_namespaced():
+    assert content_key("outline", {"a": 1, "b": 2}) == content_key("outline", {"b": 2, "a": 1})
+    assert content_key("outline", "x") != content_key("research", "x")
+
+
+def test_memory_cache_returns_copies():
+    cache = MemoryCache()
+    value = {"sections": [{"title": "Intro"}]}
+    cache.set("k", value)
+    value["sections"].append({"title": "mutado antes de leer"})
+
+    found, first = cache.get("k")
+    first["sections"][0]["title"] = "mutado"
+    _, second = cache.get("k")
+
+    assert found
+    assert second == {"sections": [{"title": "Intro"}]}
+
+
+def test_memory_cache_ttl_and_lru():
+    cache = MemoryCache(max_entries=2, ttl_seconds=60)
+    cache.set("short", 1, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("short") == (False, None)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.stats.evictions == 1
+
+
+def test_sqlite_cache_ttl_and_evict_cap(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), max_entries=2, ttl_seconds=60)
+    cache.set("expired", "x", ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("expired") == (False, None)
+
+    for key in ("a", "b", "c"):
+        cache.set(key, {"key": key})
+        time.sleep(0.01)
+
+    assert cache.evict() == 2
+    assert cache.get("a") == (False, None)
+    assert cache.get("b") == (True, {"key": "b"})
+    assert cache.get("c") == (True, {"key": "c"})
+
+
+def test_tiered_get_promotes_to_upper_tiers(tmp_path):
+    memory = MemoryCache()
+    shared = SQLiteCache(str(tmp_path / "cache.db"))
+    remote = RemoteCache(LocalRemoteClient())
+    remote.set("k", {"v": 1})
+    cache = TieredCache([memory, shared, remote])
+
+    assert cache.get("k") == (True, {"v": 1})
+    assert memory.get("k") == (True, {"v": 1})
+    assert shared.get("k") == (True, {"v": 1})
+    assert remote.stats.hits == 1
+
+
+def test_raising_tier_degrades_to_miss():
+    memory = MemoryCache()
+    failing = FailingTier()
+    cache = TieredCache([memory, failing])
+
+    assert cache.get("k") == (False, None)
+    cache.set("k", "v")
+
+    assert failing.stats.errors == 2
+    assert cache.get("k") == (True, "v")
+
+
+def test_remote_tier_disabled_after_first_failure():
+    client = UnreachableClient()
+    remote = RemoteCache(client)
+    cache = TieredCache([MemoryCache(), remote])
+
+    assert cache.get("k") == (False, None)
+    cache.set("k", "v")
+
+    assert remote.disabled
+    assert client.calls == 1
+    assert remote.snapshot()["disabled"] is True
@@ -0,0 +1,94 @@
+import asyncio
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+from common.services.cpu_pool import CpuPool
+
+
+class BrokenExecutor:
+    """Pool cuyos procesos han muerto: todos los envíos fallan."""
+
+    def __init__(self):
+        self.shut_down = False
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_exception(BrokenProcessPool("proceso terminado"))
+        return future
+
+    def map(self, fn, *iterables):
+        raise BrokenProcessPool("proceso terminado")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+def broken_pool():
+    pool = CpuPool(workers=1, inline_below=10)
+    executor = BrokenExecutor()
+    pool._executor = executor
+    return pool, executor
+
+
+def test_small_inputs_run_inline():
+    pool = CpuPool(workers=1, inline_below=10)
+
+    assert pool.run(len, "abc", size=3) == 3
+    assert pool.map(len, ["a", "bb"], size=3) == [1, 2]
+
+    snapshot = pool.snapshot()
+    assert (snapshot["inline"], snapshot["offloaded"]) == (2, 0)
+    assert snapshot["started"] is False
+
+
+def test_without_workers_everything_runs_inline():
+    pool = CpuPool(workers=0, inline_below=10)
+
+    assert pool.run(len, "x" * 100, size=100) == 100
+    assert asyncio.run(pool.arun(len, "x" * 100, size=100)) == 100
+    assert pool.snapshot()["inline"] == 2
+    assert pool.snapshot()["started"] is False
+
+
+def test_large_inputs_are_offloaded():
+    pool = CpuPool(workers=1, inline_below=10)
+    try:
+        assert pool.run(len, "x" * 100, size=100) == 100
+        assert pool.map(len, ["x" * 10, "x" * 20], size=30) == [10, 20]
+        assert asyncio.run(pool.arun(len, "x" * 50, size=50)) == 50
+    finally:
+        pool.shutdown()
+
+    assert pool.snapshot()["offloaded"] == 3
+    assert pool.snapshot()["inline"] == 0
+
+
+def test_broken_pool_falls_back_to_inline():
+    pool, executor = broken_pool()
+
+    assert pool.run(len, "x" * 100, size=100) == 100
+
+    snapshot = pool.snapshot()
+    assert snapshot["failures"] == 1
+    assert snapshot["started"] is False
+    assert executor.shut_down
+
+
+def test_broken_pool_falls_back_to_inline_in_map_and_arun():
+    pool, _ = broken_pool()
+    assert pool.map(len, ["a", "bb"], size=100) == [1, 2]
+
+    pool, _ = broken_pool()
+    assert asyncio.run(pool.arun(len, "abc", size=100)) == 3
+    assert pool.snapshot()["failures"] == 1
+
+
+def test_broken_pool_is_recreated_on_next_use():
+    pool, _ = broken_pool()
+    pool.run(len, "x" * 100, size=100)
+    try:
+        assert pool.run(len, "x" * 100, size=100) == 100
+        assert pool.snapshot()["failures"] == 1
+        assert pool.snapshot()["started"] is True
+    finally:
+        pool.shutdown()
@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from core.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    check_deadline,
+    deadline_scope,
+    remaining_time,
+    until_deadline,
+)
+
+
+def test_no_deadline_means_no_limit():
+    assert remaining_time() is None
+    check_deadline()
+
+    with deadline_scope():
+        assert remaining_time() is None
+
+
+def test_expired_deadline_raises():
+    with deadline_scope(0.01):
+        time.sleep(0.02)
+        assert remaining_time() == 0
+        with pytest.raises(DeadlineExceeded, match="agotado"):
+            check_deadline()
+
+
+def test_nested_deadline_is_bounded_by_its_parent():
+    with deadline_scope(1) as parent:
+        with deadline_scope(60):
+            assert remaining_time() <= 1
+
+            parent.cancel("cliente desconectado")
+            with pytest.raises(DeadlineExceeded, match="cliente desconectado"):
+                check_deadline()
+        assert remaining_time() == 0
+
+
+def test_cancelling_a_child_does_not_cancel_the_parent():
+    parent = Deadline(60)
+    child = Deadline(60, parent=parent)
+
+    child.cancel()
+
+    assert child.cancelled
+    assert not parent.cancelled
+    parent.check()
+
+
+def test_scope_restores_the_previous_deadline():
+    with deadline_scope(60) as outer:
+        with deadline_scope(1):
+            pass
+        assert remaining_time() == pytest.approx(outer.remaining(), abs=0.1)
+
+
+def test_until_deadline_stops_the_stream_and_closes_it():
+    closed = []
+
+    def chunks():
+        try:
+            for i in range(10):
+                yield i
+        finally:
+            closed.append(True)
+
+    received = []
+    with deadline_scope() as deadline:
+        with pytest.raises(DeadlineExceeded):
+            for chunk in until_deadline(chunks()):
+                received.append(chunk)
+                if chunk == 2:
+                    deadline.cancel()
+
+    assert received == [0, 1, 2]
+    assert closed == [True]
@@ -0,0 +1,51 @@
+import threading
+import time
+
+from common.services.fair_scheduler import OVERFLOW_TENANT, FairScheduler
+
+
+def test_small_tenant_overtakes_a_large_backlog():
+    scheduler = FairScheduler(max_concurrent=1, default_max_concurrency=1)
+    order = []
+    holder = scheduler.acquire("grande")
+
+    def call(tenant):
+        with scheduler.slot(tenant):
+            order.append(tenant)
+
+    threads = [threading.Thread(target=call, args=("grande",)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    small = threading.Thread(target=call, args=("pequeño",))
+    small.start()
+    time.sleep(0.02)
+    scheduler.release(holder)
+    for thread in threads + [small]:
+        thread.join()
+
+    assert order.index("pequeño") <= 1
+    assert scheduler.snapshot()["in_flight"] == 0
+
+
+def test_idle_tenants_are_evicted_at_the_cap():
+    scheduler = FairScheduler(max_tenants=2)
+    for tenant in ("a", "b", "c"):
+        with scheduler.slot(tenant):
+            pass
+
+    assert set(scheduler.snapshot()["tenants"]) == {"b", "c"}
+
+
+def test_new_tenants_share_the_overflow_state_when_all_are_busy():
+    scheduler = FairScheduler(max_tenants=2)
+    first = scheduler.acquire("a")
+    second = scheduler.acquire("b")
+
+    assert scheduler.acquire("c") == OVERFLOW_TENANT
+    scheduler.release(OVERFLOW_TENANT)
+    scheduler.release(first)
+    scheduler.release(second)
+
+    assert scheduler.snapshot()["tenants"][OVERFLOW_TENANT]["calls"] == 1
+    assert scheduler.snapshot()["in_flight"] == 0
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from common.services.idempotency import IdempotencyKeyReused, IdempotencyStore
+
+
+def test_concurrent_duplicates_run_once_and_share_the_body(tmp_path):
+    store = IdempotencyStore(str(tmp_path / "idempotency.db"))
+    runs = []
+
+    async def produce():
+        runs.append(1)
+        await asyncio.sleep(0.3)
+        return 200, b'{"ok": true}'
+
+    async def main():
+        return await asyncio.gather(*(store.run_once("t:k", "huella", produce) for _ in range(3)))
+
+    results = asyncio.run(main())
+    assert len(runs) == 1
+    assert {(status, body) for status, body, _ in results} == {(200, b'{"ok": true}')}
+    assert sorted(replayed for _, _, replayed in results) == [False, True, True]
+
+
+def test_reused_key_with_other_request_is_rejected(tmp_path):
+    store = IdempotencyStore(str(tmp_path / "idempotency.db"))
+
+    async def produce():
+        return 200, b"{}"
+
+    asyncio.run(store.run_once("t:k", "a", produce))
+    with pytest.raises(IdempotencyKeyReused):
+        asyncio.run(store.run_once("t:k", "b", produce))
+
+
+def test_failed_execution_releases_the_key(tmp_path):
+    store = IdempotencyStore(str(tmp_path / "idempotency.db"))
+
+    async def fail():
+        raise RuntimeError("proveedor caído")
+
+    async def produce():
+        return 201, b"{}"
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(store.run_once("t:k", "a", fail))
+    assert asyncio.run(store.run_once("t:k", "a", produce)) == (201, b"{}", False)
@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+from common.utils.json_stream import repair_json
+
+OUTLINE = {
+    "title": "Energía {solar}",
+    "introduction": "Texto con \"comillas\" y [corchetes]",
+    "sections": [
+        {"heading": "Uno", "subheadings": ["a", "b"], "key_points": []},
+        {"heading": "Dos \\ barra", "subheadings": [], "key_points": [{"x": [1, 2]}]},
+    ],
+    "conclusion": "Fin",
+}
+
+
+def test_repair_json_keeps_complete_responses():
+    assert repair_json(json.dumps(OUTLINE, ensure_ascii=False)) == OUTLINE
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ('```json\n{"title": "T", "sections": []}\n```', {"title": "T", "sections": []}),
+    ('{"title": "T", "sections": [{"heading": "Uno"}, {"heading": "D', {"title": "T", "sections": [{"heading": "Uno"}, {"heading": "D"}]}),
+    ('{"title": "T", "sections": [{"heading": "Uno"},', {"title": "T", "sections": [{"heading": "Uno"}]}),
+    ('{"title": "T", "conclusion": "x", "sections": [{"heading": ', {"title": "T", "conclusion": "x"}),
+])
+def test_repair_json_recovers_truncated_responses(raw, expected):
+    assert repair_json(raw) == expected
+
+
+@pytest.mark.parametrize("raw", ["sin json", '{"a": ', '{"a": "\\'])
+def test_repair_json_gives_up_on_unrecoverable_text(raw):
+    assert repair_json(raw) is None
@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from common.services.model_router import InvalidModelResponse
+from common.services.run_store import run_store
+from core.config import settings
+from linkedin.api import routes
+
+LINKEDIN = f"{settings.API_V1_STR}/linkedin"
+
+
+@pytest.fixture
+def client():
+    # Sin el ciclo de vida: las pruebas no precalientan ni arrancan el monitor del bucle
+    return TestClient(app)
+
+
+def test_runs_of_another_tenant_cannot_be_reused(client):
+    run_store.save("run-ajena", "blog", "energía solar", [], "investigación privada", None, "contenido", tenant="a")
+
+    response = client.post(f"{LINKEDIN}/generar", json={"ejecucion_id": "run-ajena"}, headers={"X-Tenant-ID": "b"})
+
+    assert response.status_code == 400
+    assert "run-ajena" in response.json()["detail"]
+    assert "investigación privada" not in response.text
+
+
+def test_invalid_model_output_is_a_bad_gateway(client, monkeypatch):
+    def generate(request):
+        raise InvalidModelResponse("Las publicaciones generadas no son válidas")
+
+    monkeypatch.setattr(routes, "get_orchestrator", lambda: SimpleNamespace(generate=generate))
+
+    response = client.post(f"{LINKEDIN}/generar", json={"ejecucion_id": "run"})
+
+    assert response.status_code == 502
+    assert response.json()["detail"].startswith("Las publicaciones generadas no son válidas")
@@ -0,0 +1,76 @@
+import json
+import logging
+import queue
+import sys
+
+from core.logger import JsonFormatter, NonBlockingQueueHandler, SamplingFilter, request_id_var, stage_var
+
+
+def make_record(msg, *args, lineno=10, exc_info=None):
+    return logging.LogRecord("prueba", logging.INFO, "modulo.py", lineno, msg, args, exc_info)
+
+
+def test_long_messages_are_truncated_before_queueing():
+    log_queue = queue.Queue()
+    handler = NonBlockingQueueHandler(log_queue, max_chars=10)
+
+    handler.handle(make_record("%s y más", "x" * 20))
+
+    record = log_queue.get_nowait()
+    assert record.msg == f"{'x' * 10}… [+16 caracteres]"
+    assert record.args is None
+
+
+def test_exceptions_are_truncated_and_formatted_with_the_request_context():
+    log_queue = queue.Queue()
+    handler = NonBlockingQueueHandler(log_queue, max_chars=40)
+    try:
+        raise RuntimeError("fallo " * 20)
+    except RuntimeError:
+        record = make_record("Error", exc_info=sys.exc_info())
+    request_token = request_id_var.set("req-1")
+    stage_token = stage_var.set("redaccion")
+    try:
+        handler.handle(record)
+    finally:
+        request_id_var.reset(request_token)
+        stage_var.reset(stage_token)
+
+    entry = json.loads(JsonFormatter().format(log_queue.get_nowait()))
+    assert (entry["message"], entry["request_id"], entry["stage"]) == ("Error", "req-1", "redaccion")
+    assert entry["tenant"] == "default"
+    assert entry["exception"].startswith("Traceback")
+    assert "caracteres]" in entry["exception"]
+
+
+def test_full_queue_drops_and_counts_without_blocking():
+    log_queue = queue.Queue(maxsize=1)
+    handler = NonBlockingQueueHandler(log_queue)
+
+    for i in range(3):
+        handler.handle(make_record(f"mensaje {i}"))
+
+    assert handler.dropped == 2
+    assert log_queue.get_nowait().msg == "mensaje 0"
+
+
+def test_sampling_window_limits_each_call_site(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("core.logger.time.monotonic", lambda: now[0])
+    sampler = SamplingFilter(burst=2, window_seconds=10)
+
+    assert [sampler.filter(make_record("repetido")) for _ in range(4)] == [True, True, False, False]
+    # Otro punto de emisión tiene su propia ventana
+    assert sampler.filter(make_record("otro", lineno=20))
+
+    now[0] += 10
+    record = make_record("repetido")
+    assert sampler.filter(record)
+    assert record.suppressed == 2
+    assert json.loads(JsonFormatter().format(record))["suppressed"] == 2
+
+
+def test_sampling_is_disabled_without_burst():
+    sampler = SamplingFilter(burst=0)
+
+    assert all(sampler.filter(make_record("repetido")) for _ in range(100))
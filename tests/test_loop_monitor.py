@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+from core.loop_monitor import LoopMonitor
+
+
+def test_measures_lag_without_stalls():
+    monitor = LoopMonitor(interval=0.01, stall_threshold=0.5)
+
+    async def main():
+        monitor.start()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+    asyncio.run(main())
+    snapshot = monitor.snapshot()
+    assert snapshot["probes"] > 0
+    assert snapshot["lag_ms"]["buckets"]["+Inf"] == snapshot["probes"]
+    assert snapshot["stalls"] == 0
+    assert snapshot["running"] is False
+
+
+def blocking_callback():
+    time.sleep(0.4)
+
+
+def test_captures_the_stack_of_a_blocking_callback():
+    monitor = LoopMonitor(interval=0.01, stall_threshold=0.1)
+
+    async def main():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        blocking_callback()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    asyncio.run(main())
+    stalls = monitor.recent_stalls()
+    assert monitor.snapshot()["stalls"] == 1
+    assert "blocking_callback" in stalls[0]["callback"]
+    assert "blocking_callback" in stalls[0]["stack"]
+    assert stalls[0]["duration_ms"] >= 300
+    assert monitor.snapshot()["stalled_now"] is False
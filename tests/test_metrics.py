@@ -0,0 +1,32 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from api import router
+from api.main import app
+from common.services.provider_pool import CircuitBreaker, Endpoint, ProviderPool
+from core.config import settings
+
+
+@pytest.fixture
+def open_circuit(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, open_seconds=60)
+    breaker.on_failure()
+    pool = ProviderPool([Endpoint("caido", base_url="http://caido", breaker=breaker), Endpoint("sano")])
+    pool.endpoints[1].outstanding = 2
+    monkeypatch.setattr(router, "provider_pool", pool)
+
+
+def test_metrics_expose_model_health():
+    response = TestClient(app).get(f"{settings.API_V1_STR}/metrics")
+
+    assert response.status_code == 200
+    assert isinstance(response.json()["models"], dict)
+
+
+@pytest.mark.parametrize("path", ["metrics", "health"])
+def test_open_circuits_and_outstanding_calls_are_exposed(open_circuit, path):
+    providers = TestClient(app).get(f"{settings.API_V1_STR}/{path}").json()["providers"]
+
+    assert providers["caido"]["breaker"] == CircuitBreaker.OPEN
+    assert providers["sano"]["breaker"] == CircuitBreaker.CLOSED
+    assert providers["sano"]["outstanding"] == 2
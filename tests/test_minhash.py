@@ -0,0 +1,52 @@
+import pytest
+
+from common.utils.minhash import MinHasher, normalize_tokens
+
+
+def test_normalize_tokens_folds_variants_of_a_topic():
+    assert normalize_tokens("La IA en los Recursos Humanos") == normalize_tokens(
+        "inteligencia artificial para RRHH"
+    )
+    assert normalize_tokens("Tendencias de marketing") == {"tendencia", "marketing"}
+
+
+def test_identical_sets_have_identical_signatures():
+    hasher = MinHasher()
+    tokens = normalize_tokens("ciberseguridad para pequeñas empresas")
+
+    assert hasher.signature(tokens) == MinHasher().signature(set(tokens))
+    assert hasher.similarity(hasher.signature(tokens), hasher.signature(tokens)) == 1.0
+
+
+def test_similarity_estimates_jaccard():
+    hasher = MinHasher(num_perm=256, bands=32)
+    first = {f"t{i}" for i in range(100)}
+    second = {f"t{i}" for i in range(50, 150)}
+
+    estimate = hasher.similarity(hasher.signature(first), hasher.signature(second))
+
+    # Jaccard real: 50 / 150
+    assert estimate == pytest.approx(1 / 3, abs=0.1)
+
+
+def test_similar_texts_share_a_band_and_unrelated_ones_do_not():
+    hasher = MinHasher()
+    base = hasher.signature(normalize_tokens("Guía de inteligencia artificial generativa para empresas"))
+    similar = hasher.signature(normalize_tokens("guia de IA generativa para empresas"))
+    unrelated = hasher.signature(normalize_tokens("Recetas de cocina mediterránea tradicional"))
+
+    assert set(hasher.band_keys(base)) & set(hasher.band_keys(similar))
+    assert not set(hasher.band_keys(base)) & set(hasher.band_keys(unrelated))
+    assert hasher.similarity(base, unrelated) < 0.2
+
+
+def test_empty_input_has_no_signature():
+    hasher = MinHasher()
+
+    assert hasher.signature(set()) == ()
+    assert hasher.similarity((), ()) == 0.0
+
+
+def test_bands_must_divide_the_signature():
+    with pytest.raises(ValueError):
+        MinHasher(num_perm=64, bands=10)
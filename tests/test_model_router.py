@@ -0,0 +1,124 @@
+import pytest
+
+from common.models.config import ModelConfiguration
+from common.services.model_router import ModelRouter
+from core.deadline import DeadlineExceeded, deadline_scope
+
+# Endpoints explícitos: las llamadas no pasan por el pool de proveedores compartido
+POLICY = {
+    "outline": [
+        {"model_id": "principal", "base_url": "http://principal"},
+        {"model_id": "alternativa", "base_url": "http://alternativa"},
+    ],
+}
+
+
+def test_falls_back_to_the_next_model_on_failure():
+    router = ModelRouter(policy=POLICY)
+    calls = []
+
+    def call(model_config):
+        calls.append(model_config.model_id)
+        if model_config.model_id == "principal":
+            raise ConnectionError("caído")
+        return "ok"
+
+    assert router.execute("outline", call) == "ok"
+    assert calls == ["principal", "alternativa"]
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def test_client_errors_are_raised_without_fallback_or_penalty():
+    router = ModelRouter(policy=POLICY, max_consecutive_failures=1)
+    calls = []
+
+    def call(model_config):
+        calls.append(model_config.model_id)
+        raise StatusError(400)
+
+    with pytest.raises(StatusError):
+        router.execute("outline", call)
+
+    assert calls == ["principal"]
+    assert router.snapshot()["openai:http://principal:principal"]["errors"] == 0
+    assert [m.model_id for m in router.candidates("outline")] == ["principal", "alternativa"]
+
+
+def test_rate_limits_and_server_errors_fall_back():
+    router = ModelRouter(policy=POLICY)
+
+    def call(model_config):
+        if model_config.model_id == "principal":
+            raise StatusError(429)
+        return "ok"
+
+    assert router.execute("outline", call) == "ok"
+    assert router.snapshot()["openai:http://principal:principal"]["errors"] == 1
+
+
+def test_degraded_model_moves_behind_healthy_ones():
+    router = ModelRouter(policy=POLICY, max_consecutive_failures=2)
+    principal, alternativa = router.policy["outline"]
+
+    router.record(principal, 1.0, success=False)
+    router.record(principal, 1.0, success=False)
+
+    assert [m.model_id for m in router.candidates("outline")] == ["alternativa", "principal"]
+    assert router.snapshot()["openai:http://principal:principal"]["cooling_down"] is True
+
+
+def test_slow_primary_gives_way_to_a_faster_alternative():
+    router = ModelRouter(policy=POLICY, latency_budgets={"outline": 5.0})
+    principal, alternativa = router.policy["outline"]
+
+    router.record(principal, 30.0, success=True)
+    router.record(alternativa, 2.0, success=True)
+
+    assert [m.model_id for m in router.candidates("outline")] == ["alternativa", "principal"]
+
+
+def test_pinned_model_goes_first_and_is_not_reordered():
+    router = ModelRouter(policy=POLICY, latency_budgets={"outline": 5.0})
+    pinned = ModelConfiguration(model_id="propio", base_url="http://propio")
+    router.record(pinned, 30.0, success=True)
+
+    assert [m.model_id for m in router.candidates("outline", pinned)] == ["propio", "principal", "alternativa"]
+
+
+def test_unknown_stage_uses_the_default_policy():
+    router = ModelRouter(policy={"default": ["gpt-4o-mini"]})
+
+    assert [m.model_id for m in router.candidates("inexistente")] == ["gpt-4o-mini"]
+
+
+def test_raises_the_last_error_when_every_model_fails():
+    router = ModelRouter(policy=POLICY)
+
+    def call(model_config):
+        raise ConnectionError(model_config.model_id)
+
+    with pytest.raises(ConnectionError, match="alternativa"):
+        router.execute("outline", call)
+
+
+def test_cancelled_request_does_not_try_alternatives():
+    router = ModelRouter(policy=POLICY)
+    calls = []
+
+    with deadline_scope() as deadline:
+        deadline.cancel()
+        with pytest.raises(DeadlineExceeded):
+            router.execute("outline", lambda model_config: calls.append(model_config))
+    assert calls == []
+
+
+def test_rejects_unsupported_providers():
+    router = ModelRouter(policy={"outline": [{"model_id": "claude", "provider": "otro"}]})
+
+    with pytest.raises(ValueError, match="no soportado"):
+        router.execute("outline", lambda model_config: "ok")
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from blog.agents.outline_planner_agent import OutlinePlannerAgent
+from common.models.config import ModelConfiguration
+from common.services.model_router import InvalidModelResponse
+
+OUTLINE = {
+    "title": "Energía solar",
+    "introduction": "Intro",
+    "sections": [{"heading": "Uno", "subheadings": ["a"], "key_points": ["b"]}],
+    "conclusion": "Fin",
+}
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    agent = OutlinePlannerAgent()
+    monkeypatch.setattr(agent, "run_with_fallback", lambda call: call(ModelConfiguration(model_id="modelo")))
+    return agent
+
+
+def _stream(monkeypatch, agent, chunks):
+    monkeypatch.setattr(agent, "stream_content", lambda model_config, **kwargs: iter(chunks))
+
+
+def _complete(monkeypatch, agent, responses):
+    llm = FakeListChatModel(responses=responses)
+    monkeypatch.setattr(agent, "get_llm", lambda model_config: llm)
+    return llm
+
+
+def test_streamed_outline_is_parsed(agent, monkeypatch):
+    text = json.dumps(OUTLINE)
+    _stream(monkeypatch, agent, [text[:40], text[40:]])
+
+    outline = agent.generate_outline("energía solar", "short", ["informativo"])
+
+    assert outline["title"] == "Energía solar"
+    assert [section["heading"] for section in outline["sections"]] == ["Uno"]
+
+
+def test_truncated_stream_is_repaired_without_a_new_call(agent, monkeypatch):
+    text = json.dumps(OUTLINE)
+    _stream(monkeypatch, agent, [text[:text.index('"conclusion"')]])
+    _complete(monkeypatch, agent, [])
+
+    outline = agent.generate_outline("energía solar", "short", [])
+
+    assert [section["heading"] for section in outline["sections"]] == ["Uno"]
+
+
+def test_unrecoverable_stream_is_retried_without_streaming(agent, monkeypatch):
+    _stream(monkeypatch, agent, ['{"title": '])
+    _complete(monkeypatch, agent, [json.dumps(OUTLINE)])
+
+    assert agent.generate_outline("energía solar", "short", [])["title"] == "Energía solar"
+
+
+def test_unrecoverable_retry_raises_provider_error(agent, monkeypatch):
+    _stream(monkeypatch, agent, ['{"title": '])
+    _complete(monkeypatch, agent, ["no es json"])
+
+    with pytest.raises(InvalidModelResponse):
+        agent.generate_outline("energía solar", "short", [])
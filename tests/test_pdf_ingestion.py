@@ -0,0 +1,100 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from blog.services.pdf_ingestion import PdfIngestionService, UploadTooLarge
+from common.services.document_store import DocumentStore
+from common.services.retrieval_index import RetrievalIndex
+
+BOUNDARY = "frontera"
+
+
+def _form(content: bytes, field: str = "file", filename: str = "informe.pdf") -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode() + content + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def _headers(body: bytes, **extra):
+    return {"content-type": f"multipart/form-data; boundary={BOUNDARY}", "content-length": str(len(body)), **extra}
+
+
+async def _chunks(body: bytes, size: int = 7):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    service = PdfIngestionService(
+        DocumentStore(str(tmp_path / "documents.db")), RetrievalIndex(str(tmp_path / "retrieval.db")), max_bytes=64
+    )
+    processed = []
+
+    async def fake_process(path, document_id, filename):
+        with open(path, "rb") as f:
+            processed.append((document_id, filename, f.read()))
+        os.unlink(path)
+
+    monkeypatch.setattr(service, "_process", fake_process)
+    service.processed = processed
+    return service
+
+
+def test_upload_is_streamed_to_disk(service):
+    body = _form(b"%PDF-1.7 contenido")
+
+    async def main():
+        document_id, filename = await service.ingest(_headers(body), _chunks(body))
+        await asyncio.gather(*service._tasks)
+        return document_id, filename
+
+    document_id, filename = asyncio.run(main())
+
+    assert filename == "informe.pdf"
+    assert service.processed == [(document_id, "informe.pdf", b"%PDF-1.7 contenido")]
+    assert service.store.get_document(document_id)["status"] == "processing"
+
+
+def test_declared_size_over_limit_is_rejected_before_reading(service):
+    async def body():
+        raise AssertionError("no debería leerse el cuerpo")
+        yield b""
+
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(service.ingest(_headers(b"", **{"content-length": str(10 ** 9)}), body()))
+
+
+def test_streamed_size_over_limit_is_rejected(service):
+    body = _form(b"%PDF-" + b"x" * 100)
+    headers = _headers(body)
+    del headers["content-length"]
+
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(service.ingest(headers, _chunks(body)))
+
+
+@pytest.mark.parametrize("body, message", [
+    (_form(b"<html>no es un pdf</html>"), "PDF válido"),
+    (_form(b""), "vacío"),
+    (_form(b"%PDF-1.7", field="otro"), "Falta el campo"),
+])
+def test_invalid_uploads_are_rejected(service, body, message):
+    with pytest.raises(ValueError, match=message):
+        asyncio.run(service.ingest(_headers(body), _chunks(body)))
+
+
+def test_recover_marks_stale_documents_as_failed(service):
+    stale = service.store.create_document("viejo.pdf")
+    service.index.add_document_chunks(stale, "viejo.pdf", [(1, "fragmento parcial del documento")])
+    time.sleep(0.01)
+    fresh = service.store.create_document("nuevo.pdf")
+
+    assert service.recover(max_age=0.005) == 1
+    assert service.store.get_document(stale)["status"] == "error"
+    assert service.store.get_document(fresh)["status"] == "processing"
+    assert service.index.search("fragmento parcial", document_ids=[stale]) == []
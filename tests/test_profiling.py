@@ -0,0 +1,76 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.logger import bind_log_context
+from core.profiling import ProfileStore, RequestProfile, _categorize, profile_var
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_categorize_uses_the_innermost_known_module():
+    assert _categorize(["etapa", "blog.agents.writer:run", "httpx._client:send", "ssl:read"]) == "espera_proveedor"
+    assert _categorize(["etapa", "blog.services.orchestrator:run", "json.decoder:decode"]) == "json"
+    assert _categorize(["etapa", "common.utils.text_processor:split", "re:sub"]) == "regex"
+    assert _categorize(["etapa", "concurrent.futures.thread:_worker", "threading:wait"]) == "espera_hilos"
+    assert _categorize(["etapa", "blog.services.orchestrator:run"]) == "otros"
+
+
+def test_profile_samples_tracked_stages():
+    profile = RequestProfile("p1", "/blog/generar", interval=0.001)
+    with profile.stage("redaccion"):
+        busy(0.05)
+    profile.stop(200)
+
+    summary = profile.summary()
+    assert summary["status_code"] == 200
+    assert summary["stages"]["redaccion"]["count"] == 1
+    assert summary["stages"]["redaccion"]["wall"] >= 0.05
+    assert summary["samples"] > 0
+    assert all(line.startswith("redaccion;") for line in profile.collapsed().splitlines())
+    assert "tests.test_profiling:busy" in profile.collapsed()
+
+
+def test_untracked_threads_are_not_sampled():
+    profile = RequestProfile("p2", "/blog/generar", interval=0.001)
+    busy(0.02)
+    profile.stop()
+
+    assert profile.samples == {}
+
+
+def test_work_handed_to_threads_is_sampled():
+    profile = RequestProfile("p3", "/blog/generar", interval=0.001)
+    token = profile_var.set(profile)
+    try:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(bind_log_context(busy), 0.05).result()
+    finally:
+        profile_var.reset(token)
+    profile.stop()
+
+    assert profile.summary()["samples"] > 0
+    assert all(line.startswith("busy;") for line in profile.collapsed().splitlines())
+
+
+def test_armed_paths_are_profiled_the_requested_number_of_times():
+    store = ProfileStore()
+    store.arm("/blog/generar", 2)
+
+    assert [store.take_armed("/blog/generar") for _ in range(3)] == [True, True, False]
+    assert store.take_armed("/otra") is False
+    assert store.armed() == {}
+
+
+def test_store_keeps_the_most_recent_profiles():
+    store = ProfileStore(max_profiles=2)
+    for profile_id in ("a", "b", "c"):
+        profile = RequestProfile(profile_id, "/ruta", interval=0.01)
+        profile.stop()
+        store.add(profile)
+
+    assert store.get("a") is None
+    assert [item["id"] for item in store.list()] == ["c", "b"]
@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+import pytest
+
+from common.models.config import ModelConfiguration
+from common.services.provider_pool import CircuitBreaker, Endpoint, ProviderPool, is_endpoint_failure
+from core.deadline import DeadlineExceeded
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class APIConnectionError(Exception):
+    pass
+
+
+def make_pool(count=2, threshold=1):
+    return ProviderPool([
+        Endpoint(f"e{i}", base_url=f"http://e{i}", breaker=CircuitBreaker(failure_threshold=threshold, open_seconds=60))
+        for i in range(count)
+    ])
+
+
+def test_endpoint_failures_are_connection_timeout_429_and_5xx():
+    assert is_endpoint_failure(StatusError(429))
+    assert is_endpoint_failure(StatusError(503))
+    assert is_endpoint_failure(TimeoutError())
+    assert is_endpoint_failure(APIConnectionError())
+    assert not is_endpoint_failure(StatusError(400))
+    assert not is_endpoint_failure(ValueError("respuesta inválida"))
+
+
+def test_fails_over_on_endpoint_failure():
+    pool = make_pool()
+    calls = []
+
+    def call(config):
+        calls.append(config.base_url)
+        if len(calls) == 1:
+            raise StatusError(502)
+        return "ok"
+
+    assert pool.execute(ModelConfiguration(model_id="m"), call) == "ok"
+    assert len(calls) == 2
+    assert sorted(e.breaker.state for e in pool.endpoints) == ["closed", "open"]
+
+
+@pytest.mark.parametrize("error", [StatusError(400), DeadlineExceeded("plazo agotado"), asyncio.CancelledError()])
+def test_client_errors_and_cancellation_do_not_fail_over(error):
+    pool = make_pool()
+    calls = []
+
+    def call(config):
+        calls.append(config.base_url)
+        raise error
+
+    with pytest.raises(type(error)):
+        pool.execute(ModelConfiguration(model_id="m"), call)
+    assert len(calls) == 1
+    assert all(e.breaker.state == "closed" and e.outstanding == 0 for e in pool.endpoints)
+
+
+def test_slow_success_started_before_opening_does_not_close_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, open_seconds=60)
+    started = time.monotonic()
+    breaker.on_failure()
+    breaker.on_success(started)
+    assert breaker.state == "open"
+    breaker.on_success(time.monotonic())
+    assert breaker.state == "closed"
+
+
+def test_abandoned_probe_frees_half_open_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, open_seconds=0)
+    breaker.on_failure()
+    assert breaker.allows()
+    breaker.on_dispatch()
+    assert not breaker.allows()
+    breaker.on_abandon()
+    assert breaker.allows()
@@ -0,0 +1,26 @@
+import pytest
+
+from common.utils.rate_limiter import RateLimiter
+
+
+def test_allows_a_burst_then_asks_to_wait():
+    limiter = RateLimiter(rate_per_minute=60, burst=3)
+
+    assert [limiter.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.try_acquire() == pytest.approx(1.0, abs=0.05)
+
+
+def test_tokens_refill_over_time(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("common.utils.rate_limiter.time.monotonic", lambda: now[0])
+    limiter = RateLimiter(rate_per_minute=120, burst=1)
+
+    assert limiter.try_acquire() == 0.0
+    assert limiter.try_acquire() == pytest.approx(0.5)
+    now[0] += 0.5
+    assert limiter.try_acquire() == 0.0
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        RateLimiter(rate_per_minute=0)
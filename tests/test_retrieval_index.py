@@ -0,0 +1,52 @@
+import sqlite3
+
+from common.services.retrieval_index import KIND_DOCUMENT, KIND_URL, KIND_WEB_SEARCH, RetrievalIndex
+
+
+def test_search_ranks_by_relevance(tmp_path):
+    index = RetrievalIndex(str(tmp_path / "retrieval.db"))
+    index.add(KIND_WEB_SEARCH, "web_search", "Energía solar fotovoltaica en tejados urbanos", tenant="a")
+    index.add(KIND_WEB_SEARCH, "web_search", "Recetas de cocina mediterránea", tenant="a")
+
+    results = index.search("energia solar", tenant="a")
+
+    assert [result["text"] for result in results] == ["Energía solar fotovoltaica en tejados urbanos"]
+    assert results[0]["coverage"] == 1.0
+
+
+def test_research_passages_are_scoped_by_tenant(tmp_path):
+    index = RetrievalIndex(str(tmp_path / "retrieval.db"))
+    index.add(KIND_WEB_SEARCH, "web_search", "Energía solar para empresas", tenant="a")
+    index.add(KIND_URL, "https://example.com", "Resumen de la página", tenant="a")
+
+    assert index.search("energia solar", tenant="b") == []
+    assert len(index.search("energia solar", tenant="a")) == 1
+    assert index.latest(KIND_URL, "https://example.com", "b") is None
+    assert index.latest(KIND_URL, "https://example.com", "a") == "Resumen de la página"
+
+
+def test_document_chunks_can_be_removed(tmp_path):
+    index = RetrievalIndex(str(tmp_path / "retrieval.db"))
+    assert index.add_document_chunks("doc", "informe.pdf", [(1, "Movilidad eléctrica urbana")]) == 1
+    assert index.search("movilidad electrica", kinds=[KIND_DOCUMENT], document_ids=["doc"])
+
+    index.remove_document("doc")
+
+    assert index.search("movilidad electrica", kinds=[KIND_DOCUMENT], document_ids=["doc"]) == []
+
+
+def test_index_created_before_tenants_is_migrated(tmp_path):
+    path = str(tmp_path / "retrieval.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE passages (id INTEGER PRIMARY KEY, kind TEXT NOT NULL, source TEXT NOT NULL, "
+        "tema TEXT NOT NULL DEFAULT '', document_id TEXT, page INTEGER, created_at REAL NOT NULL, text TEXT NOT NULL)"
+    )
+    conn.execute("INSERT INTO passages (kind, source, created_at, text) VALUES ('url', 'https://x', 0, 'antiguo')")
+    conn.commit()
+    conn.close()
+
+    index = RetrievalIndex(path)
+    index.add(KIND_URL, "https://x", "nuevo", tenant="a")
+
+    assert index.latest(KIND_URL, "https://x", "a") == "nuevo"
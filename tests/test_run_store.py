@@ -0,0 +1,55 @@
+import sqlite3
+
+from common.services.run_store import RunStore
+
+
+def test_saved_run_round_trips(tmp_path):
+    store = RunStore(str(tmp_path / "runs.db"))
+    store.save("r1", "blog", "tema", ["informativo"], "investigación", {"title": "Título"}, "# Título", "Resumen",
+               tenant="a")
+
+    run = store.get("r1", "a")
+
+    assert run["kind"] == "blog"
+    assert run["estilos"] == ["informativo"]
+    assert run["outline"] == {"title": "Título"}
+    assert (run["content"], run["summary"]) == ("# Título", "Resumen")
+    assert store.get("otro", "a") is None
+
+
+def test_runs_are_only_returned_to_their_tenant(tmp_path):
+    store = RunStore(str(tmp_path / "runs.db"))
+    store.save("r1", "blog", "tema", [], "investigación de a", None, "contenido de a", tenant="a")
+
+    assert store.get("r1", "b") is None
+    assert store.get("r1", "a")["research"] == "investigación de a"
+
+
+def test_stores_without_tenant_are_migrated(tmp_path):
+    path = str(tmp_path / "runs.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE runs (id TEXT PRIMARY KEY, kind TEXT NOT NULL, tema TEXT NOT NULL, estilos TEXT NOT NULL, "
+            "created_at REAL NOT NULL, research TEXT, outline TEXT, content TEXT NOT NULL, summary TEXT)"
+        )
+        conn.execute("INSERT INTO runs VALUES ('viejo', 'blog', 'tema', '[]', 1e12, NULL, NULL, 'contenido', NULL)")
+    conn.close()
+    store = RunStore(path)
+
+    store.save("r1", "blog", "tema", [], None, None, "contenido", tenant="a")
+
+    assert store.get("r1", "a")["content"] == "contenido"
+    # Las ejecuciones anteriores no tienen dueño conocido: no se devuelven a nadie
+    assert store.get("viejo", "default") is None
+
+
+def test_expired_runs_are_hidden_and_pruned(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("common.services.run_store.time.time", lambda: now[0])
+    store = RunStore(str(tmp_path / "runs.db"), max_age=60)
+    store.save("r1", "blog", "tema", [], None, None, "contenido")
+
+    now[0] += 61
+
+    assert store.get("r1", "") is None
+    assert store.prune() == 1
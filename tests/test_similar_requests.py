@@ -0,0 +1,34 @@
+from common.services.similar_requests import SimilarRequestStore
+
+
+def _store(tmp_path):
+    return SimilarRequestStore(str(tmp_path / "similar.db"), threshold=0.6)
+
+
+def test_near_duplicate_is_found_within_the_tenant(tmp_path):
+    store = _store(tmp_path)
+    outline = {"title": "Energía solar", "sections": []}
+    store.add("a", "Beneficios de la energía solar para pequeñas empresas", None, "medium", ["informativo"],
+              "investigación", outline)
+
+    match = store.find("a", "Beneficios de la energía solar para las pequeñas empresas")
+
+    assert match is not None
+    assert match["research"] == "investigación"
+    assert match["outline"] == outline
+    assert match["similarity"] >= 0.6
+
+
+def test_requests_are_not_shared_across_tenants(tmp_path):
+    store = _store(tmp_path)
+    store.add("a", "Beneficios de la energía solar para pequeñas empresas", None, "medium", ["informativo"],
+              "investigación privada", None)
+
+    assert store.find("b", "Beneficios de la energía solar para pequeñas empresas") is None
+
+
+def test_unrelated_topic_is_not_reused(tmp_path):
+    store = _store(tmp_path)
+    store.add("a", "Beneficios de la energía solar para pequeñas empresas", None, "medium", [], "x", None)
+
+    assert store.find("a", "Recetas tradicionales de la cocina mediterránea") is None
@@ -0,0 +1,43 @@
+import threading
+import time
+
+import pytest
+
+from common.utils.single_flight import SingleFlightCache
+
+
+def test_concurrent_callers_compute_once():
+    cache = SingleFlightCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "valor"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("clave", compute)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["valor"] * 5
+    assert len(calls) == 1
+    assert len(cache) == 1
+
+
+def test_errors_are_not_memoized():
+    cache = SingleFlightCache()
+
+    def fail():
+        raise RuntimeError("fallo")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("clave", fail)
+
+    assert cache.get_or_compute("clave", lambda: "valor") == "valor"
+    assert cache.get_or_compute("clave", fail) == "valor"
@@ -0,0 +1,28 @@
+import threading
+
+from common.services.article_store import ArticleStore
+from common.services.document_store import DocumentStore
+
+
+def test_store_touches_disk_only_on_first_use(tmp_path):
+    path = tmp_path / "nuevo" / "documents.db"
+    store = DocumentStore(str(path))
+
+    assert not path.parent.exists()
+
+    document_id = store.create_document("informe.pdf")
+
+    assert path.exists()
+    assert store.get_document(document_id)["status"] == "processing"
+
+
+def test_each_thread_reuses_its_own_connection(tmp_path):
+    store = ArticleStore(str(tmp_path / "articles.db"))
+    main = store._connect()
+    other = []
+    thread = threading.Thread(target=lambda: other.append(store._connect()))
+    thread.start()
+    thread.join()
+
+    assert store._connect() is main
+    assert other[0] is not main
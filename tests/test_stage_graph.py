@@ -0,0 +1,179 @@
+import threading
+
+import pytest
+
+from common.services.cache import MemoryCache, TieredCache
+from common.stage_graph import Stage, StageGraph
+from core.deadline import DeadlineExceeded, deadline_scope
+
+
+def test_runs_stages_in_dependency_order():
+    graph = StageGraph("prueba")
+    graph.add(Stage("dobles", lambda numero: numero * 2, inputs=["numero"]))
+    graph.add(Stage("suma", lambda numero, dobles: numero + dobles, inputs=["numero", "dobles"]))
+
+    graph_run = graph.run({"numero": 3})
+
+    assert graph_run["suma"] == 9
+    assert graph_run.statuses == {"dobles": "ok", "suma": "ok"}
+    assert set(graph_run.timings) == {"dobles", "suma"}
+    assert graph.validate(["numero"]) == ["dobles", "suma"]
+
+
+def test_independent_stages_overlap():
+    graph = StageGraph("prueba", max_workers=2)
+    barrier = threading.Barrier(2, timeout=2)
+    graph.add(Stage("a", lambda: barrier.wait() is not None))
+    graph.add(Stage("b", lambda: barrier.wait() is not None))
+
+    # Con las etapas en secuencia la barrera no se completaría
+    graph_run = graph.run({})
+
+    assert graph_run["a"] and graph_run["b"]
+
+
+def test_stage_with_several_outputs():
+    graph = StageGraph("prueba")
+    graph.add(Stage("dividir", lambda texto: {"izquierda": texto[:2], "derecha": texto[2:]},
+                    inputs=["texto"], outputs=["izquierda", "derecha"]))
+
+    graph_run = graph.run({"texto": "abcd"})
+
+    assert (graph_run["izquierda"], graph_run["derecha"]) == ("ab", "cd")
+
+
+def test_missing_output_fails():
+    graph = StageGraph("prueba")
+    graph.add(Stage("dividir", lambda: {"izquierda": 1}, outputs=["izquierda", "derecha"]))
+
+    with pytest.raises(ValueError, match="derecha"):
+        graph.run({})
+
+
+def test_skipped_stage_takes_its_default():
+    graph = StageGraph("prueba")
+    calls = []
+    graph.add(Stage("urls", lambda enlaces: calls.append(enlaces) or "analizado", inputs=["enlaces"],
+                    when=lambda enlaces: bool(enlaces), default=""))
+    hooks = []
+
+    graph_run = graph.run({"enlaces": []}, hooks=[lambda *args: hooks.append(args[:2])])
+
+    assert graph_run["urls"] == ""
+    assert graph_run.statuses["urls"] == "skipped"
+    assert "urls" not in graph_run.timings
+    assert calls == []
+    assert hooks == [("urls", "skipped")]
+
+
+def test_retries_only_the_listed_errors():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("caído")
+        return "ok"
+
+    graph = StageGraph("prueba")
+    graph.add(Stage("flaky", flaky, retries=2, retry_on=(ConnectionError,)))
+    assert graph.run({})["flaky"] == "ok"
+    assert len(attempts) == 3
+
+    def broken():
+        attempts.append(1)
+        raise KeyError("no se reintenta")
+
+    attempts.clear()
+    graph = StageGraph("prueba")
+    graph.add(Stage("broken", broken, retries=2, retry_on=(ConnectionError,)))
+    with pytest.raises(KeyError):
+        graph.run({})
+    assert len(attempts) == 1
+
+
+def test_exhausted_retries_raise_the_last_error():
+    graph = StageGraph("prueba")
+    graph.add(Stage("caida", lambda: (_ for _ in ()).throw(ConnectionError("caído")), retries=1))
+
+    with pytest.raises(ConnectionError):
+        graph.run({})
+
+
+def test_expired_deadline_is_not_retried():
+    calls = []
+    graph = StageGraph("prueba")
+    graph.add(Stage("lenta", lambda: calls.append(1), retries=3))
+
+    with deadline_scope() as deadline:
+        deadline.cancel("cliente desconectado")
+        with pytest.raises(DeadlineExceeded, match="cliente desconectado"):
+            graph.run({})
+    assert calls == []
+
+
+def test_failure_stops_pending_stages():
+    calls = []
+    graph = StageGraph("prueba")
+    graph.add(Stage("falla", lambda: (_ for _ in ()).throw(RuntimeError("error"))))
+    graph.add(Stage("despues", lambda falla: calls.append(falla), inputs=["falla"]))
+
+    with pytest.raises(RuntimeError):
+        graph.run({})
+    assert calls == []
+
+
+def test_cached_stage_is_not_run_again():
+    cache = TieredCache([MemoryCache()])
+    calls = []
+
+    def build():
+        graph = StageGraph("prueba")
+        graph.add(Stage("cara", lambda tema: calls.append(tema) or tema.upper(), inputs=["tema"],
+                        cache=cache, cache_key=lambda tema: tema))
+        return graph
+
+    assert build().run({"tema": "ia"})["cara"] == "IA"
+    graph_run = build().run({"tema": "ia"})
+
+    assert graph_run["cara"] == "IA"
+    assert graph_run.statuses["cara"] == "cached"
+    assert calls == ["ia"]
+
+
+def test_duplicate_stage_or_output_is_rejected():
+    graph = StageGraph("prueba")
+    graph.add(Stage("a", lambda: 1))
+
+    with pytest.raises(ValueError, match="ya existe"):
+        graph.add(Stage("a", lambda: 2, outputs=["otro"]))
+    with pytest.raises(ValueError, match="ya lo produce"):
+        graph.add(Stage("b", lambda: 2, outputs=["a"]))
+
+
+def test_missing_input_is_rejected():
+    graph = StageGraph("prueba")
+    graph.add(Stage("a", lambda tema: tema, inputs=["tema"]))
+
+    with pytest.raises(ValueError, match="tema"):
+        graph.run({})
+
+
+def test_circular_dependencies_are_rejected():
+    graph = StageGraph("prueba")
+    graph.add(Stage("a", lambda b: b, inputs=["b"]))
+    graph.add(Stage("b", lambda a: a, inputs=["a"]))
+
+    with pytest.raises(ValueError, match="circulares"):
+        graph.validate()
+
+
+def test_stage_decorator_registers_the_function():
+    graph = StageGraph("prueba")
+
+    @graph.stage(inputs=["tema"])
+    def titulo(tema):
+        return tema.title()
+
+    assert titulo("ia generativa") == "Ia Generativa"
+    assert graph.run({"tema": "ia generativa"})["titulo"] == "Ia Generativa"
@@ -0,0 +1,20 @@
+import pytest
+
+from core.tenancy import tenant_for_key, tenant_from_headers
+
+
+def test_api_key_takes_precedence_over_tenant_header():
+    assert tenant_from_headers({"x-api-key": "secreta", "x-tenant-id": "otro"}) == tenant_for_key("secreta")
+    assert tenant_from_headers({"authorization": "Bearer secreta"}) == tenant_for_key("secreta")
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("acme", "acme"),
+    ("acme.eu:prod-1", "acme.eu:prod-1"),
+    ("", "default"),
+    ("a" * 65, "default"),
+    ("../acme", "default"),
+    ("acme corp", "default"),
+])
+def test_tenant_header_is_validated(header, expected):
+    assert tenant_from_headers({"x-tenant-id": header}) == expected